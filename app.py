@@ -1,15 +1,16 @@
 import streamlit as st
-import feedparser
 import time
-from datetime import datetime, timedelta, timezone
-from email.utils import parsedate_to_datetime
-import json
-import os
-import concurrent.futures
-from collections import OrderedDict
+from datetime import datetime, timedelta
 import html
-import re
-import fcntl
+
+from thainews.config import (
+    COMPANY_MAP, DATE_MAP, FEED_CACHE_PATH, LEGACY_JSON_PATH, LINK_CACHE_PATH, NEWS_DB_PATH, RESULT_MAX_AGE,
+    TOPIC_MAP,
+)
+from thainews.feed_cache import FeedCache
+from thainews.links import LinkCache, LinkResolver
+from thainews.news_store import NewsStore, parse_timestamp
+from thainews.pipeline import run_company_history, shared_company_batch, shared_scan
 
 # ================= 1. 頁面設定 (必須放第一行) =================
 st.set_page_config(
@@ -70,421 +71,69 @@ CUSTOM_CSS = """
 </style>
 """
 
-# VIP 公司清單：顯示名 → {泰國中文名, 台灣母公司名, 英文名, 泰交所代碼}
-# 搜尋時以泰國當地名稱為主，同時涵蓋母公司名與英文名
-COMPANY_MAP = {
-    # --- PCB ---
-    "泰達電": {"thai_cn": "泰達電", "tw_cn": "台達電", "en": "Delta Electronics Thailand", "set": "DELTA"},
-    "泰鼎":   {"thai_cn": "泰鼎",   "tw_cn": "臻鼎",   "en": "Zhen Ding Technology",      "set": ""},
-    "欣興":   {"thai_cn": "欣興",   "tw_cn": "欣興",   "en": "Unimicron",                  "set": ""},
-    "華通":   {"thai_cn": "華通",   "tw_cn": "華通",   "en": "Compeq Manufacturing",        "set": ""},
-    "金像電": {"thai_cn": "金像電", "tw_cn": "金像電", "en": "Gold Circuit Electronics",     "set": ""},
-    "定穎":   {"thai_cn": "定穎",   "tw_cn": "定穎",   "en": "Dynamic Electronics",         "set": ""},
-    "健鼎":   {"thai_cn": "健鼎",   "tw_cn": "健鼎",   "en": "Tripod Technology",            "set": ""},
-    "燿華":   {"thai_cn": "燿華",   "tw_cn": "燿華",   "en": "Unitech PCB",                  "set": "UPCB"},
-    "敬鵬":   {"thai_cn": "敬鵬",   "tw_cn": "敬鵬",   "en": "Chin-Poon Industrial",         "set": ""},
-    "競國":   {"thai_cn": "競國",   "tw_cn": "競國",   "en": "Chin-Gou Electronic",           "set": ""},
-    "高技":   {"thai_cn": "高技",   "tw_cn": "高技",   "en": "Kao Chi Enterprises",            "set": ""},
-    # --- 伺服器/電子代工 ---
-    "鴻海":   {"thai_cn": "鴻海",   "tw_cn": "鴻海",   "en": "Foxconn",                      "set": ""},
-    "英業達": {"thai_cn": "英業達", "tw_cn": "英業達", "en": "Inventec",                      "set": ""},
-    "廣達":   {"thai_cn": "廣達",   "tw_cn": "廣達",   "en": "Quanta Computer",               "set": ""},
-    "群光":   {"thai_cn": "群光",   "tw_cn": "群光",   "en": "Chicony Electronics",            "set": ""},
-    # --- 散熱 ---
-    "雙鴻":   {"thai_cn": "泰鴻",   "tw_cn": "雙鴻",   "en": "Auras Technology",              "set": ""},
-    "泰碩":   {"thai_cn": "泰碩",   "tw_cn": "泰碩",   "en": "Taisol Electronics",             "set": ""},
-    # --- PCB 上游材料 ---
-    "台虹":   {"thai_cn": "台虹",   "tw_cn": "台虹",   "en": "Taiflex Scientific",             "set": ""},
-    "聯茂":   {"thai_cn": "聯茂",   "tw_cn": "聯茂",   "en": "Elite Material",                 "set": ""},
-    "台燿":   {"thai_cn": "台燿",   "tw_cn": "台燿",   "en": "Taiwan Union Technology",        "set": ""},
-}
-
-# 向下相容：產生 VIP 查詢字串
-VIP_COMPANIES_EN = [f'"{info["en"]}"' for info in COMPANY_MAP.values()]
-VIP_COMPANIES_CN = [f'"{info["tw_cn"]}"' for info in COMPANY_MAP.values()]
-
-# 預先計算好查詢字串 (避免在函式內重複計算)
-VIP_QUERY_EN = "+OR+".join([c.replace(" ", "+") for c in VIP_COMPANIES_EN])
-VIP_QUERY_CN = "+OR+".join([c.replace(" ", "+") for c in VIP_COMPANIES_CN])
-
-# 選項映射
-DATE_MAP = {
-    "1天": 1, "3天": 3, "1週": 7, "1月": 30
-}
-
-TOPIC_MAP = {
-    "泰國政經": "macro",
-    "電子產業": "industry",
-    "重點台商": "vip"
-}
-
 # 套用 CSS
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # ================= 3. 爬蟲核心邏輯 =================
 
-# 各模式的相關性關鍵字（標題必須包含至少一個才保留）
-RELEVANCE_KEYWORDS = {
-    "macro": [
-        "泰國", "泰", "thailand", "thai", "bangkok", "曼谷",
-        "台泰", "台商", "東南亞", "asean", "southeast asia",
-    ],
-    "industry": [
-        "泰國", "泰", "thailand", "thai", "bangkok", "曼谷",
-        "pcb", "印刷電路板", "電路板", "circuit board",
-        "電子製造", "electronics manufacturing",
-    ],
-    "vip": [
-        "泰國", "泰", "thailand", "thai", "bangkok", "曼谷",
-        "pcb", "印刷電路板", "台商",
-    ] + [name for info in COMPANY_MAP.values()
-         for name in [info["thai_cn"], info["tw_cn"], info["en"]]],
-}
-
-
-def is_relevant(title, mode, custom_keyword=None):
-    """檢查標題是否與搜尋模式相關（至少包含一個關鍵字）"""
-    if mode == "company" and custom_keyword:
-        # 個別台商：標題須含任一名稱變體
-        title_lower = title.lower()
-        info = COMPANY_MAP.get(custom_keyword, {})
-        # 中英文名稱用子字串比對（夠具體）
-        names = [
-            info.get("thai_cn", ""), info.get("tw_cn", ""),
-            info.get("en", ""),
-            custom_keyword,
-        ]
-        if any(n and n.lower() in title_lower for n in names):
-            return True
-        # SET 代碼用完整單詞比對，避免 "DELTA" 匹配到 Delta Airlines
-        set_ticker = info.get("set", "")
-        if set_ticker and re.search(r'\b' + re.escape(set_ticker.lower()) + r'\b', title_lower):
-            # 額外要求標題也含泰國/PCB 相關詞，排除純美股/其他國家新聞
-            thai_patterns = [
-                r'\bthai(?:land)?\b', r'\bbangkok\b', r'\bset[:\s]',  # 英文泰國詞
-                r'\bpcb\b', r'電路板',                                  # PCB 產業
-                "泰", "曼谷", "泰銖",                                    # 中文泰國詞
-            ]
-            if any(re.search(p, title_lower) if '\\' in p else p in title_lower
-                   for p in thai_patterns):
-                return True
-        return False
-    if mode == "custom" and custom_keyword:
-        title_lower = title.lower()
-        kw = custom_keyword.strip().lower()
-        # 完整關鍵字比對（優先且最精確）
-        if kw in title_lower:
-            return True
-        # 多詞比對：詞必須相鄰出現，避免 "Siam...AI" 散落匹配
-        words = kw.split()
-        if len(words) >= 2:
-            # 允許詞間有少量非字母字元（如 "Siam-AI" 或 "Siam's AI"）
-            pattern = r'\b' + r'[\s\-\']{0,3}'.join(re.escape(w) for w in words) + r'\b'
-            if re.search(pattern, title_lower):
-                return True
-        # 中文逐字比對：僅對非 ASCII 字元拆分（如「泰達電」→「泰」「達」「電」）
-        cjk_chars = [c for c in kw if ord(c) > 127]
-        if len(cjk_chars) >= 2:
-            matched = sum(1 for c in cjk_chars if c in title_lower)
-            # 全部命中或至少超過一半（容許部分不符，如「泰達電」→「台達電」差一字）
-            if matched >= len(cjk_chars) or (len(cjk_chars) >= 3 and matched >= len(cjk_chars) - 1):
-                return True
-        return False
-    keywords = RELEVANCE_KEYWORDS.get(mode)
-    if not keywords:
-        return True
-    title_lower = title.lower()
-    return any(kw.lower() in title_lower for kw in keywords)
-
-
-def _build_query_templates(mode, custom_keyword=None):
-    """
-    依搜尋模式產生查詢模板列表。
-    每個模板包含 name、query、hl/gl/ceid 參數，日期過濾由呼叫端填入。
-    """
-    templates = []
-
-    if mode == "company" and custom_keyword:
-        # 個別台商模式：泰國當地名 + 母公司名 + 英文名
-        info = COMPANY_MAP.get(custom_keyword, {})
-        thai_cn = info.get("thai_cn", custom_keyword)
-        tw_cn = info.get("tw_cn", custom_keyword)
-        en_name = info.get("en", custom_keyword)
-        set_ticker = info.get("set", "")
-
-        # 組合所有名稱變體（去重）
-        cn_names = list(dict.fromkeys([thai_cn, tw_cn]))  # 保序去重
-        cn_or = "+OR+".join(f"%22{n}%22" for n in cn_names)
-        en_encoded = en_name.replace(" ", "+")
-
-        # 中文查詢：泰國 + (泰達電 OR 台達電 OR "Delta Electronics Thailand")
-        cn_query = f"泰國+{cn_or}+OR+%22{en_encoded}%22"
-        # 英文查詢：Thailand + "Delta Electronics Thailand" OR 泰達電 OR 台達電
-        en_query = f"Thailand+%22{en_encoded}%22+OR+{cn_or}"
-
-        # 若有泰交所代碼，額外加入
-        if set_ticker:
-            cn_query += f"+OR+%22{set_ticker}%22"
-            en_query += f"+OR+%22{set_ticker}%22"
-
-        templates.extend([
-            {"name": f"🏭 {custom_keyword} (中)", "query": cn_query,
-             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
-            {"name": f"🏭 {custom_keyword} (EN)", "query": en_query,
-             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
-        ])
-    elif mode == "custom" and custom_keyword:
-        kw_stripped = custom_keyword.strip()
-        # 多詞關鍵字用引號包裹，確保搜尋完整片語（如 "Siam AI"）
-        if " " in kw_stripped:
-            clean_keyword = f"%22{kw_stripped.replace(' ', '+')}%22"
-        else:
-            clean_keyword = kw_stripped.replace(" ", "+")
-        templates.extend([
-            {"name": f"🔍 深度追蹤: {custom_keyword} (中)", "query": clean_keyword,
-             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
-            {"name": f"🔍 深度追蹤: {custom_keyword} (EN)", "query": clean_keyword,
-             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
-        ])
-    elif mode == "macro":
-        templates.extend([
-            {"name": "🇹🇭 泰國整體 (中)", "query": "泰國",
-             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
-            {"name": "🇹🇭 泰國整體 (EN)", "query": "Thailand",
-             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
-            {"name": "🇹🇼 台泰關係 (中)", "query": "泰國+台灣+OR+%22台商%22",
-             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
-            {"name": "🇹🇼 台泰關係 (EN)", "query": "Thailand+Taiwan+OR+%22Taiwanese+investment%22",
-             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
-        ])
-    elif mode == "industry":
-        templates.extend([
-            {"name": "🔌 PCB製造 (中)", "query": "泰國+%22PCB%22+OR+%22印刷電路板%22+OR+%22電子製造%22",
-             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
-            {"name": "🔌 PCB製造 (EN)", "query": "Thailand+%22printed+circuit+board%22+OR+%22PCB+manufacturing%22+OR+%22electronics+manufacturing%22",
-             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
-        ])
-    elif mode == "vip":
-        templates.extend([
-            {"name": "🏢 台商動態 (中)", "query": f"泰國+OR+{VIP_QUERY_CN}",
-             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
-            {"name": "🏢 台商動態 (EN)", "query": f"Thailand+PCB+OR+{VIP_QUERY_EN}",
-             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
-        ])
-
-    return templates
-
-
-def get_rss_sources(days, mode="all", custom_keyword=None):
-    """
-    產生 RSS 來源列表，逐日拆分請求以確保每天都能獨立抓取。
-    :param days: 天數 (int)
-    """
-    templates = _build_query_templates(mode, custom_keyword)
-    exclude_sites = "-site:msn.com+-site:aol.com"
-    sources = []
-
-    # 逐日產生 RSS URL，每天一個獨立請求
-    today = datetime.now().date()
-    for day_offset in range(days):
-        day_start = today - timedelta(days=day_offset)
-        day_end = day_start + timedelta(days=1)
-        date_filter = (
-            f"after:{day_start.strftime('%Y-%m-%d')}"
-            f"+before:{day_end.strftime('%Y-%m-%d')}"
-            f"+{exclude_sites}"
-        )
-        date_label = day_start.strftime('%m/%d')
-
-        for tmpl in templates:
-            sources.append({
-                "name": f"{tmpl['name']} {date_label}",
-                "url": (
-                    f"https://news.google.com/rss/search?"
-                    f"q={tmpl['query']}+{date_filter}"
-                    f"&hl={tmpl['hl']}&gl={tmpl['gl']}&ceid={tmpl['ceid']}"
-                ),
-                "category": tmpl["name"],  # 用於顯示時歸類（不含日期）
-            })
-
-    return sources
-
-def fetch_feed(source):
-    """Helper function to fetch a single RSS feed."""
-    try:
-        return source, feedparser.parse(source['url'])
-    except Exception as e:
-        return source, None
-
-def is_within_date_range(published_str, days):
-    """檢查新聞發布日期是否在指定天數範圍內"""
-    if not published_str:
-        return True  # 無日期資訊則保留
-    try:
-        pub_date = parsedate_to_datetime(published_str)
-        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        return pub_date >= cutoff
-    except Exception:
-        return True  # 解析失敗則保留
-
-def generate_chatgpt_prompt(days_label, days_int, search_mode, custom_keyword=None):
+# 逐日來源的本地快取：過去日期長期保留，今天的資料快速過期
+FEED_CACHE = FeedCache(FEED_CACHE_PATH)
+
+# 歷史新聞庫（首次啟動自動匯入舊版 news_data.json）
+NEWS_STORE = NewsStore(NEWS_DB_PATH, legacy_json=LEGACY_JSON_PATH)
+
+# 轉址連結還原：互動搜尋只就地解碼與查快取，不額外連網（背景預抓與工作佇列會連網補齊快取）
+LINK_RESOLVER = LinkResolver(LinkCache(LINK_CACHE_PATH), fetch=False)
+
+def generate_chatgpt_prompt(days_label, days_int, search_mode, custom_keyword=None, force=False):
     status_text = st.empty() 
     progress_bar = st.progress(0)
-    
-    # 呼叫 get_rss_sources，並傳入 days_int 作為 days 參數
-    sources = get_rss_sources(days_int, search_mode, custom_keyword)
-    news_items_for_json = []
 
-    # 計算實際日期範圍，避免「1月」被誤解為「一月份」
-    date_end = datetime.now().strftime('%Y-%m-%d')
-    date_start = (datetime.now() - timedelta(days=days_int)).strftime('%Y-%m-%d')
-    date_range_str = f"近 {days_label}（{date_start} ~ {date_end}）"
+    # 即時預覽區：來源一完成就先顯示卡片，全部完成後再換成排序好的正式結果
+    live_placeholder = st.empty()
+    live_area = live_placeholder.container()
 
-    if search_mode == "company":
-        info = COMPANY_MAP.get(custom_keyword, {})
-        en_name = info.get("en", custom_keyword)
-        tw_cn = info.get("tw_cn", "")
-        label_parts = [custom_keyword]
-        if tw_cn and tw_cn != custom_keyword:
-            label_parts.append(tw_cn)
-        label_parts.append(en_name)
-        topic_desc = f"{date_range_str} {'／'.join(label_parts)} 泰國動態"
-    elif search_mode == "custom":
-        topic_desc = f"關鍵字【{custom_keyword}】{date_range_str}"
-    elif search_mode == "macro":
-        topic_desc = f"{date_range_str} 泰國整體與台泰關係"
-    elif search_mode == "industry":
-        topic_desc = f"{date_range_str} 泰國 PCB 與電子製造"
-    elif search_mode == "vip":
-        topic_desc = f"{date_range_str} 泰國重點台商"
-
-    output_text = f"""請扮演一位資深的「產業分析師」，分析【{topic_desc}】。
-
-## 任務
-1. 從以下新聞標題中，挑出 **10-15 則最重要的新聞**，說明為何重要
-2. 歸納本期 **3-5 大關鍵趨勢**
-3. 提出 **機會與風險** 評估
-4. 如有特別重要的新聞需要深入了解，請自行上網搜尋該新聞的詳細內容
-
-請用**繁體中文**，以 **Markdown** 條列式輸出，風格需專業且易讀。
-
-========= 以下是新聞標題庫 ({datetime.now().strftime('%Y-%m-%d')}) =========
-"""
-    
-    seen_titles = set()
-    total_steps = len(sources)
-
-    # 平行抓取 RSS（逐日拆分後請求數較多，提高併發數）
-    max_workers = min(20, len(sources))
-    status_text.text(f"📡 正在平行掃描 {len(sources)} 個來源（逐日拆分）...")
-
-    # 按類別收集結果（去除日期後歸類）
-    category_entries = OrderedDict()
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_source = {executor.submit(fetch_feed, source): source for source in sources}
-        concurrent.futures.wait(future_to_source.keys())
-
-        for completed_count, (future, source) in enumerate(future_to_source.items(), 1):
-            progress_bar.progress(completed_count / total_steps)
-
-            source, feed = future.result()
-            category = source.get('category', source['name'])
-
-            if category not in category_entries:
-                category_entries[category] = []
-
-            if feed and len(feed.entries) > 0:
-                for entry in feed.entries:
-                    if entry.title in seen_titles:
-                        continue
-                    pub_date = entry.published if 'published' in entry else ""
-                    if not is_within_date_range(pub_date, days_int):
-                        continue
-                    # 相關性過濾：標題須包含至少一個模式關鍵字
-                    if not is_relevant(entry.title, search_mode, custom_keyword):
-                        continue
-                    seen_titles.add(entry.title)
-                    source_name = entry.source.title if 'source' in entry else "Google News"
-                    category_entries[category].append({
-                        "title": entry.title, "link": entry.link,
-                        "date": pub_date, "source": source_name, "category": category
-                    })
-
-    # 按日期排序（新→舊），並分離 prompt 輸出與完整資料
-    def _sort_key(item):
-        try:
-            return parsedate_to_datetime(item["date"]).timestamp()
-        except Exception:
-            return 0
+    def show_live_items(items):
+        with live_area:
+            render_news_cards(items)
 
-    def _get_date_str(item):
-        """取得文章的日期字串（YYYY-MM-DD），用於逐日分組"""
-        try:
-            return parsedate_to_datetime(item["date"]).strftime('%Y-%m-%d')
-        except Exception:
-            return "unknown"
-
-    DAILY_PROMPT_LIMIT = 10  # 每天每類別最多放入 prompt 的篇數
-
-    for category, entries in category_entries.items():
-        # 依日期排序（新→舊）
-        entries.sort(key=_sort_key, reverse=True)
-        # 全部納入顯示與儲存
-        news_items_for_json.extend(entries)
-
-        output_text += f"\n## 【{category}】\n"
-        if not entries:
-            output_text += "(無相關新聞)\n"
-            continue
-
-        limit_per_day = DAILY_PROMPT_LIMIT
-
-        # 依日期分組輸出純標題
-        daily_count = {}
-        current_day = None
-        for item in entries:
-            day = _get_date_str(item)
-            daily_count.setdefault(day, 0)
-            if daily_count[day] >= limit_per_day:
-                continue
-            daily_count[day] += 1
-            if day != current_day:
-                current_day = day
-                output_text += f"\n### {day}\n"
-            output_text += f"- [{item['source']}] {item['title']}\n"
-
-    output_text += "\n========= 資料結束 ========="
-    
-    # 累積歷史資料邏輯（加檔案鎖防止並發寫入損毀）
-    MAX_NEWS_ITEMS = 5000  # 歷史上限，避免無限增長
-    try:
-        with open('news_data.json', 'a+', encoding='utf-8') as f:
-            fcntl.flock(f, fcntl.LOCK_EX)
-            try:
-                f.seek(0)
-                content = f.read()
-                existing_data = json.loads(content) if content.strip() else {"news_list": []}
-            except json.JSONDecodeError:
-                existing_data = {"news_list": []}
-
-            # 建立現有連結集合以過濾重複
-            existing_links = set(item['link'] for item in existing_data.get('news_list', []))
-
-            for item in news_items_for_json:
-                if item['link'] not in existing_links:
-                    existing_data['news_list'].insert(0, item)
-                    existing_links.add(item['link'])
-
-            # 超過上限則裁切舊資料
-            existing_data['news_list'] = existing_data['news_list'][:MAX_NEWS_ITEMS]
-            existing_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            f.seek(0)
-            f.truncate()
-            json.dump(existing_data, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print(f"存檔失敗: {e}")
+    if search_mode == "company":
+        # 先顯示歷史庫中提到該台商的新聞（含其他模式搜尋存入者），即時掃描只補抓未完整的日期
+        history_stats = {}
+        _, history = run_company_history(days_label, days_int, custom_keyword, NEWS_STORE, stats=history_stats)
+        if history:
+            first_day = (datetime.now() - timedelta(days=days_int - 1)).strftime('%Y-%m-%d')
+            day_counts = NEWS_STORE.company_day_counts(custom_keyword, first_day)
+            with live_area:
+                st.caption(f"📚 歷史庫已有 {len(history)} 則（{days_int} 天中 {len(day_counts)} 天有報導），"
+                           f"正在補抓未完整的 {len(history_stats['missing_days'])} 天...")
+                render_news_cards(history)
+
+    # 其他使用者正在進行（或剛完成）相同的搜尋時直接共用結果
+    scan = shared_scan(
+        days_label, days_int, search_mode, custom_keyword, force=force,
+        cache=FEED_CACHE, store=NEWS_STORE, resolver=LINK_RESOLVER,
+        on_status=status_text.text, on_progress=progress_bar.progress, on_items=show_live_items,
+    )
+    output_text, news_items_for_json = scan.result
+    scan_stats = scan.stats
+    st.session_state['scan_metrics'] = scan.metrics
+    live_placeholder.empty()
+    st.caption(
+        f"📡 共 {scan_stats['requests']} 個請求"
+        f"（逐日拆分需 {scan_stats['fixed_plan_requests']} 個，節省 {scan_stats['saved_requests']} 個）"
+        + (f"，沿用歷史庫已完整的 {scan_stats['reused_days']} 天" if scan_stats.get('reused_days') else "")
+        + (f"，併入歷史庫其他搜尋的 {scan_stats['indexed']} 則" if scan_stats.get('indexed') else "")
+        + ("，與其他使用者共用同一次搜尋" if scan.shared else "")
+    )
+    render_failures(scan_stats)
+    prompt_stats = scan_stats.get('prompt')
+    if prompt_stats and prompt_stats['budget']:
+        st.caption(
+            f"📝 Prompt 約 {prompt_stats['tokens']:,} tokens（上限 {prompt_stats['budget']:,}），"
+            f"放入 {prompt_stats['included']} 則"
+            + (f"，依重要性省略 {prompt_stats['dropped']} 則" if prompt_stats['dropped'] else "")
+        )
 
     status_text.text("✅ 完成！")
     time.sleep(0.5)
@@ -493,6 +142,176 @@ def generate_chatgpt_prompt(days_label, days_int, search_mode, custom_keyword=No
     
     return output_text, news_items_for_json
 
+def render_failures(scan_stats):
+    """部分來源在重試後仍失敗時提示結果不完整"""
+    failed = scan_stats.get('failed_sources')
+    if failed:
+        shown = "、".join(failed[:5]) + ("…" if len(failed) > 5 else "")
+        st.warning(f"⚠️ {len(failed)} 個來源在重試後仍抓取失敗（{shown}），結果可能不完整；稍後重新掃描只會補抓這些部分。")
+
+def show_search(spinner_text, days_label, days_int, search_mode, custom_keyword=None):
+    """
+    優先顯示背景預抓（或其他使用者剛完成）的現成結果；
+    沒有結果、已超過 RESULT_MAX_AGE 或使用者要求重新掃描時才即時爬取。
+    """
+    force = st.session_state.pop('force_refresh', False)
+    stored = None if force else NEWS_STORE.load_scan_result(search_mode, custom_keyword, days_int)
+    if stored and time.time() - stored['refreshed_at'] < RESULT_MAX_AGE:
+        refreshed = datetime.fromtimestamp(stored['refreshed_at']).strftime('%Y-%m-%d %H:%M')
+        c_stamp, c_refresh = st.columns([3, 1])
+        with c_stamp:
+            st.caption(f"🕒 最後更新：{refreshed}")
+        with c_refresh:
+            st.button("🔄 重新掃描", key="force_refresh_btn",
+                      on_click=lambda: st.session_state.update(force_refresh=True))
+        display_results(stored['output_text'], stored['news_list'])
+    else:
+        with st.spinner(spinner_text):
+            prompt, news_list = generate_chatgpt_prompt(days_label, days_int, search_mode, custom_keyword, force)
+            display_results(prompt, news_list)
+    render_diagnostics(search_mode, custom_keyword, days_int)
+
+
+def render_diagnostics(search_mode, custom_keyword, days_int):
+    """可收合的診斷面板：顯示本工作階段最近一次即時掃描（相同模式與天數）的量測資料"""
+    metrics = st.session_state.get('scan_metrics')
+    if not metrics or (metrics.mode, metrics.keyword, metrics.days) != (search_mode, custom_keyword, days_int):
+        return
+    with st.expander("🔧 診斷資訊", expanded=False):
+        summary = metrics.summary()
+        st.caption(
+            f"總耗時 {summary['wall_seconds']:.2f}s · {summary['requests']} 個請求 · "
+            f"{summary['bytes'] / 1024:.0f} KiB · 取得 {summary['entries']} 則，保留 {summary['kept']} 則"
+        )
+
+        def _rejected(counts):
+            return "、".join(f"{reason} {n}" for reason, n in counts.items()) or "-"
+
+        st.markdown("**各階段耗時**")
+        st.table([{"階段": name, "累計秒數": f"{stage['seconds']:.3f}", "次數": stage['calls']}
+                  for name, stage in metrics.stages.items()])
+        st.markdown("**各類別**")
+        st.table([{"類別": c['category'], "請求": c['requests'], "KiB": round(c['bytes'] / 1024, 1),
+                   "取得": c['entries'], "保留": c['kept'], "排除": _rejected(c['rejected'])}
+                  for c in metrics.by_category()])
+        st.markdown("**各來源**")
+        st.dataframe([{"來源": r['source'], "快取": r['cache'], "狀態": r['status'],
+                       "KiB": round(r['bytes'] / 1024, 1), "抓取秒數": round(r['fetch_seconds'], 3), "重試": r['retries'],
+                       "取得": r['entries'], "保留": r['kept'], "排除": _rejected(r['rejected'])}
+                      for r in metrics.sources.values()], use_container_width=True, hide_index=True)
+        c_jsonl, c_prom = st.columns(2)
+        with c_jsonl:
+            st.download_button("下載 JSON lines", metrics.to_jsonl(), file_name="scan_metrics.jsonl",
+                               mime="application/x-ndjson", use_container_width=True)
+        with c_prom:
+            st.download_button("下載 Prometheus", metrics.to_prometheus(), file_name="scan_metrics.prom",
+                               mime="text/plain", use_container_width=True)
+
+def show_company_batch(days_label, days_int):
+    """
+    全部台商總覽：每家台商都有未過期的現成結果時直接讀取，
+    否則以批次查詢（數家共用一組查詢）一次重新掃描全部台商。
+    """
+    force = st.session_state.pop('force_refresh', False)
+    stored = {} if force else {
+        name: NEWS_STORE.load_scan_result("company", name, days_int) for name in COMPANY_MAP
+    }
+    fresh = stored and all(r and time.time() - r['refreshed_at'] < RESULT_MAX_AGE for r in stored.values())
+    if fresh:
+        refreshed = datetime.fromtimestamp(min(r['refreshed_at'] for r in stored.values())).strftime('%Y-%m-%d %H:%M')
+        c_stamp, c_refresh = st.columns([3, 1])
+        with c_stamp:
+            st.caption(f"🕒 最後更新：{refreshed}")
+        with c_refresh:
+            st.button("🔄 重新掃描", key="force_refresh_btn",
+                      on_click=lambda: st.session_state.update(force_refresh=True))
+        results = stored
+    else:
+        with st.spinner(f"正在批次掃描 {len(COMPANY_MAP)} 家台商..."):
+            status_text = st.empty()
+            progress_bar = st.progress(0)
+            scan = shared_company_batch(
+                days_label, days_int, force=force, cache=FEED_CACHE, store=NEWS_STORE, resolver=LINK_RESOLVER,
+                on_status=status_text.text, on_progress=progress_bar.progress,
+            )
+            scan_stats = scan.stats
+            st.session_state['scan_metrics'] = scan.metrics
+            status_text.empty()
+            progress_bar.empty()
+        st.caption(
+            f"📡 共 {scan_stats['requests']} 個請求"
+            f"（逐一掃描需 {scan_stats['fixed_plan_requests']} 個，節省 {scan_stats['saved_requests']} 個）"
+            + ("，與其他使用者共用同一次搜尋" if scan.shared else "")
+        )
+        render_failures(scan_stats)
+        results = {name: {"output_text": text, "news_list": items} for name, (text, items) in scan.result.items()}
+
+    company = st.selectbox(
+        "台商", list(results.keys()), key="batch_company",
+        format_func=lambda name: f"{name}（{len(results[name]['news_list'])} 則）",
+    )
+    display_results(results[company]['output_text'], results[company]['news_list'])
+    render_diagnostics("company_batch", None, days_int)
+
+def render_news_cards(news_list):
+    """將多則新聞卡片組成單一 HTML 區塊輸出，避免每則卡片各佔一個 Streamlit 元件"""
+    cards = []
+    for news in news_list:
+        # Security fix: Escape HTML special characters
+        cat = html.escape(news.get('category', '一般'))
+        safe_title = html.escape(news['title'])
+        safe_source = html.escape(news['source'])
+        safe_link = html.escape(news.get('link', '#'))
+        safe_date = html.escape(news.get('date', ''))
+        # 近似重複群的代表標註轉載家數
+        sources_count = len(news.get('cluster_sources', ()))
+        dup_tag = f' <span class="news-tag">同題 {sources_count} 家</span>' if sources_count > 1 else ''
+        cards.append(
+            f'<div class="news-card">'
+            f'<a href="{safe_link}" target="_blank" class="news-title">{safe_title}</a>'
+            f'<div class="news-meta">{safe_date} • {safe_source} <span class="news-tag">{cat}</span>{dup_tag}</div>'
+            f'</div>'
+        )
+    st.markdown("\n".join(cards), unsafe_allow_html=True)
+
+PAGE_SIZE_OPTIONS = [20, 50, 100]
+
+def pagination_controls(total, key, sort_options=None):
+    """
+    顯示排序、每頁筆數與頁碼控制項。
+    :return: (offset, limit, sort_key)；未提供 sort_options 時 sort_key 為 None
+    """
+    cols = st.columns([2, 1, 1] if sort_options else [1, 1])
+    sort_key = None
+    if sort_options:
+        with cols[0]:
+            sort_label = st.selectbox("排序", list(sort_options.keys()), key=f"{key}_sort")
+            sort_key = sort_options[sort_label]
+    with cols[-2]:
+        page_size = st.selectbox("每頁筆數", PAGE_SIZE_OPTIONS, key=f"{key}_size")
+    total_pages = max(1, -(-total // page_size))
+    with cols[-1]:
+        page = st.number_input("頁碼", min_value=1, max_value=total_pages, value=1, step=1, key=f"{key}_page")
+    page = min(int(page), total_pages)
+    st.caption(f"第 {page} / {total_pages} 頁（共 {total} 則）")
+    return (page - 1) * page_size, page_size, sort_key
+
+# 生成結果的排序方式（依類別＝生成器原本的類別→日期順序）
+RESULT_SORT_OPTIONS = {"依類別": "category", "最新發布": "newest", "最早發布": "oldest", "來源": "source"}
+
+def _sort_news(news_list, sort_key):
+    """依排序方式回傳新的列表（日期無法解析者排最後）"""
+    if sort_key == "category":
+        return news_list
+    if sort_key == "source":
+        return sorted(news_list, key=lambda n: n['source'].lower())
+    # 新版結果已帶有 published_ts，只有舊版存檔才需要重新解析日期字串
+    stamped = [(n['published_ts'] if 'published_ts' in n else parse_timestamp(n.get('date')), n)
+               for n in news_list]
+    dated = sorted((pair for pair in stamped if pair[0] is not None),
+                   key=lambda pair: pair[0], reverse=(sort_key == "newest"))
+    return [n for _, n in dated] + [n for ts, n in stamped if ts is None]
+
 def display_results(prompt, news_list):
     """顯示搜尋結果的共用函數"""
     st.markdown("##### 1. AI 分析指令")
@@ -501,27 +320,75 @@ def display_results(prompt, news_list):
         
     st.markdown("##### 2. 相關新聞速覽")
     if news_list:
-        for news in news_list:
-            cat = news.get('category', '一般')
-            # Security fix: Escape HTML special characters
-            safe_title = html.escape(news['title'])
-            safe_source = html.escape(news['source'])
-            safe_link = html.escape(news.get('link', '#'))
-
-            st.markdown(f'''
-            <div class="news-card">
-                <a href="{safe_link}" target="_blank" class="news-title">{safe_title}</a>
-                <div class="news-meta">{news['date']} • {safe_source} <span class="news-tag">{cat}</span></div>
-            </div>
-            ''', unsafe_allow_html=True)
+        offset, limit, sort_key = pagination_controls(len(news_list), "results", RESULT_SORT_OPTIONS)
+        render_news_cards(_sort_news(news_list, sort_key)[offset:offset + limit])
     else:
         st.warning("查無新聞資料。")
 
+# 趨勢分析的統計範圍（天數，None 為整個歷史）與匯出格式
+TREND_RANGE_OPTIONS = {"近 30 天": 30, "近 90 天": 90, "近 180 天": 180, "全部": None}
+EXPORT_FORMATS = {"Parquet": ("parquet", "application/octet-stream"), "CSV": ("csv", "text/csv")}
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_history_frame(last_updated, total):
+    """歷史庫轉為分析用的 DataFrame；以上次寫入時間與筆數為鍵，歷史庫有變動才重新讀取"""
+    from thainews.analytics import history_table, load_frame
+    return load_frame(history_table(NEWS_STORE))
+
+def render_trends():
+    """每日篇數趨勢、移動平均與異常激增，以及歷史庫匯出"""
+    from thainews.analytics import GROUP_BY, daily_counts, detect_spikes, export_history, rolling_average
+
+    total = NEWS_STORE.count()
+    if not total:
+        st.info("尚無歷史紀錄，請先在生成器執行搜尋。")
+        return
+    c_by, c_range, c_window = st.columns([2, 1, 1])
+    with c_by:
+        by = st.radio("彙總方式", list(GROUP_BY), format_func=GROUP_BY.get, horizontal=True, key="trend_by")
+    with c_range:
+        range_label = st.selectbox("範圍", list(TREND_RANGE_OPTIONS), key="trend_range")
+    with c_window:
+        window = st.slider("移動平均天數", 3, 14, 7, key="trend_window")
+
+    start = time.perf_counter()
+    frame = load_history_frame(NEWS_STORE.last_updated(), total)
+    counts = daily_counts(frame, by, TREND_RANGE_OPTIONS[range_label])
+    rolling = rolling_average(counts, window)
+    spikes = detect_spikes(counts, window)
+    st.caption(f"共 {total} 則、{len(counts)} 天、{counts.shape[1]} 個{GROUP_BY[by]}（{time.perf_counter() - start:.2f}s）")
+
+    st.markdown(f"##### 每日篇數（{window} 日移動平均）")
+    st.line_chart(rolling)
+    st.markdown("##### ⚡ 異常激增")
+    if spikes.empty:
+        st.caption("範圍內沒有明顯高於近期平均的日子。")
+    else:
+        st.dataframe(spikes.rename(columns={"day": "日期", "group": GROUP_BY[by], "count": "篇數",
+                                            "baseline": "前期平均", "z": "標準差倍數"}),
+                     hide_index=True, use_container_width=True,
+                     column_config={"日期": st.column_config.DateColumn(format="YYYY-MM-DD")})
+
+    st.markdown("##### 📦 匯出歷史庫")
+    c_fmt, c_btn = st.columns([1, 1])
+    with c_fmt:
+        fmt_label = st.selectbox("格式", list(EXPORT_FORMATS), key="export_format")
+    fmt, mime = EXPORT_FORMATS[fmt_label]
+    with c_btn:
+        if st.button("產生匯出檔"):
+            import io
+            buffer = io.BytesIO()
+            export_history(NEWS_STORE, buffer, fmt)
+            st.session_state["history_export"] = (fmt, buffer.getvalue())
+    exported = st.session_state.get("history_export")
+    if exported and exported[0] == fmt:
+        st.download_button(f"下載 {fmt_label}", exported[1], file_name=f"news_history.{fmt}", mime=mime)
+
 # ================= 4. 網頁主程式 =================
 
 st.markdown('<div class="big-font">ThaiNews.Ai 🇹🇭 戰情室</div>', unsafe_allow_html=True)
 
-tab1, tab2 = st.tabs(["🤖 生成器", "📊 歷史庫"])
+tab1, tab2, tab3 = st.tabs(["🤖 生成器", "📊 歷史庫", "📈 趨勢分析"])
 
 with tab1:
     # 核心版面：左控右顯
@@ -576,6 +443,14 @@ with tab1:
 
         company_changed = company_selection and company_selection != st.session_state.get('last_company')
 
+        def handle_company_batch():
+            st.session_state['active_source'] = "company"
+            st.session_state['last_topic'] = None
+            st.session_state['last_company'] = None
+            set_search("company_batch")
+
+        st.button("🏭 全部台商", use_container_width=True, on_click=handle_company_batch)
+
         # 優先處理最新的操作（避免 pills 殘留值互相覆蓋）
         if company_changed:
             st.session_state['last_company'] = company_selection
@@ -636,17 +511,16 @@ with tab1:
         elif s_type == "company" and s_kw:
             info = COMPANY_MAP.get(s_kw, {})
             en_name = info.get("en", s_kw)
-            with st.spinner(f"正在搜尋 {s_kw}（{en_name}）泰國動態..."):
-                prompt, news_list = generate_chatgpt_prompt(selected_label, days_int, "company", s_kw)
-                display_results(prompt, news_list)
+            show_search(f"正在搜尋 {s_kw}（{en_name}）泰國動態...", selected_label, days_int, "company", s_kw)
+        elif s_type == "company_batch":
+            show_company_batch(selected_label, days_int)
         elif s_type == "custom" and s_kw:
-            with st.spinner(f"正在全網搜索 {s_kw}..."):
-                prompt, news_list = generate_chatgpt_prompt(selected_label, days_int, "custom", s_kw)
-                display_results(prompt, news_list)
+            show_search(f"正在全網搜索 {s_kw}...", selected_label, days_int, "custom", s_kw)
         elif s_type in SPINNER_MAP:
-            with st.spinner(SPINNER_MAP[s_type]):
-                prompt, news_list = generate_chatgpt_prompt(selected_label, days_int, s_type)
-                display_results(prompt, news_list)
+            show_search(SPINNER_MAP[s_type], selected_label, days_int, s_type)
+
+# 歷史庫排序方式 → NewsStore.list_news 的 order 參數
+HISTORY_SORT_OPTIONS = {"最新存入": "saved", "最新發布": "newest", "最早發布": "oldest", "來源": "source"}
 
 with tab2:
     col_head_1, col_head_2 = st.columns([3, 1])
@@ -655,30 +529,48 @@ with tab2:
     with col_head_2:
         if st.button("🔄 刷新列表"): st.rerun()
     
-    if os.path.exists('news_data.json'):
-        with open('news_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        news_list = data.get('news_list', [])
-        st.caption(f"📅 上次更新: {data.get('timestamp', '未知')} (共 {len(news_list)} 則)")
-
-        search_query = st.text_input("🔍 搜尋歷史...", placeholder="請輸入標題關鍵字")
+    total_count = NEWS_STORE.count()
+    if total_count:
+        st.caption(f"📅 上次更新: {NEWS_STORE.last_updated() or '未知'} (共 {total_count} 則)")
+
+        search_query = st.text_input("🔍 搜尋歷史...", placeholder="輸入標題或來源關鍵字（支援中英泰文）")
+        f_cat, f_date = st.columns([2, 1])
+        with f_cat:
+            selected_categories = st.multiselect("類別", NEWS_STORE.categories(), placeholder="全部類別")
+        with f_date:
+            date_range = st.date_input("發布日期", value=(), format="YYYY-MM-DD")
+
+        # 日期區間轉為 epoch 秒數（含結束日當天）
+        since_ts = until_ts = None
+        if len(date_range) >= 1:
+            since_ts = datetime(date_range[0].year, date_range[0].month, date_range[0].day).timestamp()
+        if len(date_range) == 2:
+            until_ts = (datetime(date_range[1].year, date_range[1].month, date_range[1].day)
+                        + timedelta(days=1)).timestamp()
+
+        filters = dict(categories=selected_categories, since_ts=since_ts, until_ts=until_ts)
         if search_query:
-            news_list = [n for n in news_list if search_query.lower() in n['title'].lower()]
+            # 相關度排序：總數需查詢後才知道，先沿用目前的分頁狀態查詢，頁碼超出範圍再退回第一頁
+            page_size = st.session_state.get("history_search_size", PAGE_SIZE_OPTIONS[0])
+            page = st.session_state.get("history_search_page", 1)
+            news_list, matched = NEWS_STORE.search(
+                search_query, limit=page_size, offset=(page - 1) * page_size, **filters)
+            if not news_list and matched and page > 1:
+                st.session_state["history_search_page"] = 1
+                news_list, matched = NEWS_STORE.search(search_query, limit=page_size, **filters)
+            st.caption(f"🔎 共 {matched} 則符合，依相關度排序")
+            pagination_controls(matched, "history_search")
+        else:
+            matched = NEWS_STORE.count(**filters)
+            offset, limit, order = pagination_controls(matched, "history", HISTORY_SORT_OPTIONS)
+            news_list = NEWS_STORE.list_news(limit=limit, offset=offset, order=order, **filters)
 
         if news_list:
-            for news in news_list:
-                cat = html.escape(news.get('category', '歷史'))
-                safe_title = html.escape(news['title'])
-                safe_source = html.escape(news['source'])
-                safe_link = html.escape(news.get('link', '#'))
-                st.markdown(f"""
-                <div class="news-card">
-                    <a href="{safe_link}" target="_blank" class="news-title">{safe_title}</a>
-                    <div class="news-meta">{news['date']} • {safe_source} <span class="news-tag">{cat}</span></div>
-                </div>
-                """, unsafe_allow_html=True)
+            render_news_cards(news_list)
         else:
             st.warning("無符合資料")
     else:
-        st.info("尚無歷史紀錄，請先在生成器執行搜尋。")
\ No newline at end of file
+        st.info("尚無歷史紀錄，請先在生成器執行搜尋。")
+
+with tab3:
+    render_trends()
@@ -0,0 +1,79 @@
+"""
+歷史庫匯出與趨勢分析的耗時：以隨機產生的歷史庫（預設 30 萬則、180 天）量測
+匯出 Parquet／CSV、讀回、轉為 DataFrame，以及依類別、來源、台商彙總每日篇數並偵測激增。
+
+用法: python bench/bench_analytics.py [--rows 300000] [--days 180]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_server import TITLE_WORDS  # noqa: E402
+from thainews.analytics import (  # noqa: E402
+    daily_counts, detect_spikes, export_history, history_table, load_frame, read_history, rolling_average,
+)
+from thainews.config import COMPANY_MAP, TOPIC_MAP  # noqa: E402
+from thainews.news_store import NewsStore  # noqa: E402
+
+
+def build_store(path, rows, days, seed=1):
+    """產生隨機歷史庫；約一成標題提到某家台商（直接寫入 news 表，不建全文檢索索引）"""
+    store = NewsStore(path, legacy_json=None)
+    rng = random.Random(seed)
+    companies = list(COMPANY_MAP)
+    categories = [f"{mode} {lang}" for mode in TOPIC_MAP for lang in ("(中)", "(EN)")]
+    sources = [f"Source {i}" for i in range(200)]
+    now = time.time()
+    data = []
+    for i in range(rows):
+        title = " ".join(rng.sample(TITLE_WORDS, 6))
+        if rng.random() < 0.1:
+            title += " " + rng.choice(companies)
+        data.append((f"https://example.com/{i}", f"{title} {i}", "", now - rng.random() * days * 86400,
+                     rng.choice(sources), rng.choice(categories), now))
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO news (link, title, date, published_ts, source, category, saved_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)", data)
+    return store
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:32s} {time.perf_counter() - start:6.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--days", type=int, default=180)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = build_store(os.path.join(tmp, "news.db"), args.rows, args.days)
+        parquet, csv = os.path.join(tmp, "history.parquet"), os.path.join(tmp, "history.csv")
+        print(f"{args.rows} 則，{args.days} 天")
+        timed("export parquet", lambda: export_history(store, parquet))
+        timed("export csv", lambda: export_history(store, csv, "csv"))
+        timed("read sqlite", lambda: history_table(store))
+        timed("read csv", lambda: read_history(csv))
+        table = timed("read parquet", lambda: read_history(parquet))
+        frame = timed("load_frame", lambda: load_frame(table))
+        for by in ("category", "source", "company"):
+            def analyse():
+                counts = daily_counts(frame, by)
+                rolling_average(counts)
+                return detect_spikes(counts)
+            spikes = timed(f"counts+rolling+spikes {by}", analyse)
+            print(f"{'':32s} {len(spikes)} 個激增")
+
+
+if __name__ == "__main__":
+    main()
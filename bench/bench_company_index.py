@@ -0,0 +1,61 @@
+"""
+台商索引：以模擬伺服器跑過主題與全部台商批次搜尋後，比較個別台商的三種載入方式——
+只讀歷史庫（run_company_history）、有歷史庫的增量掃描（只補抓未完整的日期），以及沒有歷史庫的完整掃描，
+並量測寫入時標記台商的耗時。模擬伺服器的內容依查詢網址產生，批次查詢與個別台商查詢回傳的新聞不同，
+各方式的篇數不可直接比較，主要比較請求數與耗時。
+
+用法: python bench/bench_company_index.py [--days 7] [--latency 0.05] [--company 泰達電]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import thainews.planner as planner_module  # noqa: E402
+from bench.stub_server import StubServer  # noqa: E402
+from thainews.company_index import tag_companies  # noqa: E402
+from thainews.config import TOPIC_MAP  # noqa: E402
+from thainews.news_store import NewsStore  # noqa: E402
+from thainews.pipeline import days_label, run_company_batch, run_company_history, run_scan  # noqa: E402
+
+
+def timed(server, label, fn):
+    before = server.request_count
+    start = time.perf_counter()
+    news = fn()
+    print(f"{label:28s} {time.perf_counter() - start:6.3f}s  requests={server.request_count - before:3d}  "
+          f"{len(news)} 則")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--latency", type=float, default=0.05, help="模擬伺服器延遲（秒）")
+    parser.add_argument("--company", default="泰達電")
+    args = parser.parse_args()
+    label = days_label(args.days)
+
+    with StubServer(latency=args.latency, items_per_day=5) as server, tempfile.TemporaryDirectory() as tmp:
+        planner_module.RSS_SEARCH_URL = f"{server.base_url}/rss/search"
+        store = NewsStore(os.path.join(tmp, "news.db"), legacy_json=None)
+        for mode in TOPIC_MAP.values():
+            run_scan(label, args.days, mode, store=store)
+        print(f"主題搜尋後歷史庫提到 {args.company}：{store.company_day_counts(args.company)}")
+        run_company_batch(label, args.days, store=store)
+
+        timed(server, "history only", lambda: run_company_history(label, args.days, args.company, store)[1])
+        timed(server, "incremental scan", lambda: run_scan(label, args.days, "company", args.company, store=store)[1])
+        timed(server, "full scan (no store)", lambda: run_scan(label, args.days, "company", args.company)[1])
+
+        titles = [row[0] for rows in store.iter_rows(("title",)) for row in rows]
+        start = time.perf_counter()
+        for title in titles:
+            tag_companies(title)
+        print(f"標記 {len(titles)} 則標題 {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+比較舊版執行緒池（feedparser.parse(url)）與非同步抓取引擎的耗時。
+
+用法: python bench/bench_fetch.py [--sources 120] [--latency 0.2]
+"""
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser  # noqa: E402
+
+from bench.stub_server import StubServer  # noqa: E402
+from thainews.fetcher import entry_to_dict, iter_fetch  # noqa: E402
+
+
+def run_thread_pool(sources, max_workers):
+    def fetch(source):
+        return [entry_to_dict(e) for e in feedparser.parse(source["url"]).entries]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch, sources))
+
+
+def run_async(sources, max_workers):
+    return [entries for _, _, entries in iter_fetch(sources, max_concurrency=max_workers)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sources", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=0.2, help="模擬伺服器延遲（秒）")
+    parser.add_argument("--workers", type=int, default=20)
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        sources = [{"name": f"s{i}", "url": f"{server.base_url}/rss/search?q=t{i}"}
+                   for i in range(args.sources)]
+        for label, runner in [("thread-pool", run_thread_pool), ("async", run_async)]:
+            before = server.request_count
+            start = time.perf_counter()
+            results = runner(sources, args.workers)
+            elapsed = time.perf_counter() - start
+            entries = sum(len(r or []) for r in results)
+            print(f"{label:12s} {elapsed:7.3f}s  requests={server.request_count - before}  entries={entries}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+轉址連結還原：以模擬伺服器產生一批轉址連結（一半為可就地解碼的舊版 id，一半需連網還原，
+且每篇報導有兩個不同 id），量測不同同時請求數的耗時、快取命中後的第二輪（應不發出任何請求），
+並確認同一篇報導的兩個 id 還原為同一個網址，在 build_output 中只保留一則。
+
+用法: python bench/bench_links.py [--stories 200] [--latency 0.1] [--concurrency 1 8] [--mode 302|page|consent]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_server import StubServer, article_target, encode_article_id  # noqa: E402
+from thainews.links import LinkCache, LinkResolver  # noqa: E402
+from thainews.news_item import NewsItem  # noqa: E402
+from thainews.pipeline import build_output  # noqa: E402
+from thainews.throttle import FetchScheduler  # noqa: E402
+
+
+def make_links(base_url, stories):
+    """回傳 ([轉址連結], {轉址連結: 預期的原始網址})"""
+    links, expected = [], {}
+    for i in range(stories):
+        if i % 2:
+            url = f"https://www.example.com/news/{i}"
+            link = f"{base_url}/rss/articles/{encode_article_id(url)}?oc=5"
+            links.append(link)
+            expected[link] = url
+            continue
+        for version in (1, 2):
+            link = f"{base_url}/rss/articles/story{i}_{version}?oc=5"
+            links.append(link)
+            expected[link] = article_target(f"story{i}")
+    return links, expected
+
+
+def make_resolver(path, concurrency):
+    # 模擬伺服器不限流：放寬主機限速，只比較同時請求數的影響
+    scheduler = FetchScheduler(rate=1000, burst=1000, min_rate=1000, max_rate=1000)
+    return LinkResolver(LinkCache(path), max_concurrency=concurrency, hosts={"127.0.0.1"}, scheduler=scheduler)
+
+
+def run(resolver, links, server, label):
+    before = server.request_count
+    start = time.perf_counter()
+    resolved, report = resolver.resolve(links)
+    elapsed = time.perf_counter() - start
+    print(f"{label:24s} {elapsed:6.2f}s  requests={server.request_count - before:4d}  "
+          + "  ".join(f"{key}={value}" for key, value in report.items()))
+    return resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stories", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1, help="模擬伺服器延遲（秒）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--mode", choices=["302", "page", "consent"], default="302",
+                        help="模擬的轉址方式（consent 轉往同意頁，應全部還原失敗）")
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, redirect_mode=args.mode) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        links, expected = make_links(server.base_url, args.stories)
+        print(f"{len(links)} 個轉址連結，{args.stories} 篇報導，伺服器延遲 {args.latency}s，轉址方式 {args.mode}")
+        for concurrency in args.concurrency:
+            path = os.path.join(tmp, f"links-{concurrency}.db")
+            resolved = run(make_resolver(path, concurrency), links, server, f"cold concurrency={concurrency}")
+            wrong = sum(resolved.get(link) != url for link, url in expected.items())
+            print(f"{'':24s} 還原錯誤 {wrong} 個，不同網址 {len(set(resolved.values()))} 個")
+        resolver = make_resolver(path, args.concurrency[-1])
+        run(resolver, links, server, "warm cache")
+
+        items = [NewsItem(f"報導 {i}", link, "Mon, 06 Jan 2025 08:00:00 GMT", "Stub", "總經")
+                 for i, link in enumerate(links)]
+        resolver.canonicalize(items)
+        stats = {}
+        _, news = build_output("1天", 1, "macro", None, ["總經"], [({"name": "stub"}, items)], stats=stats)
+        print(f"build_output 保留 {len(news)} 則（{len(items)} 則輸入，預期 {args.stories} 則）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+比較舊版 dict 流程（日期字串在過濾、排序、分組、存檔時各解析一次）與 NewsItem
+流程（匯入時解析一次）的 CPU 時間與記憶體，模擬 30 天 vip 掃描的條目量。
+
+近似重複分群兩者相同，不列入比較。
+
+用法: python bench/bench_news_item.py [--days 30] [--per-feed 100] [--rounds 5]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_server import make_title  # noqa: E402
+from thainews.news_item import NewsItem  # noqa: E402
+from thainews.pipeline import build_query_templates, date_cutoff, is_relevant, is_within_date_range  # noqa: E402
+from thainews.relevance import get_matcher  # noqa: E402
+
+
+def make_feeds(days, per_feed):
+    """每天每個 vip 模板一個 feed（與逐日拆分相同的量）"""
+    now = datetime.now(timezone.utc)
+    feeds = []
+    for tmpl in build_query_templates("vip"):
+        for day in range(days):
+            digest = f"{tmpl['name']}-{day}"
+            feeds.append((tmpl["name"], [
+                {
+                    "title": f"{make_title(digest, i, ('Thailand', 'Delta Electronics Thailand'))} - Source {i % 30}",
+                    "link": f"https://news.google.com/rss/articles/{abs(hash(digest))}{i:04d}",
+                    "published": format_datetime(now - timedelta(days=day, minutes=13 * i)),
+                    "source": f"Source {i % 30}",
+                }
+                for i in range(per_feed)
+            ]))
+    return feeds
+
+
+def _parse_ts(date_str):
+    try:
+        return parsedate_to_datetime(date_str).timestamp()
+    except Exception:
+        return None
+
+
+# 舊版流程（dict + 重複解析日期字串），僅供比較
+def legacy_pipeline(feeds, days):
+    filtered = []
+    for category, entries in feeds:
+        for entry in entries:
+            pub_date = entry['published']
+            try:
+                if parsedate_to_datetime(pub_date) < datetime.now(timezone.utc) - timedelta(days=days):
+                    continue
+            except Exception:
+                pass
+            if not is_relevant(entry['title'], "vip"):
+                continue
+            filtered.append({"title": entry['title'], "link": entry['link'], "date": pub_date,
+                             "source": entry['source'], "category": category})
+    seen, by_category = set(), {}
+    for item in filtered:
+        if item['title'] not in seen:
+            seen.add(item['title'])
+            by_category.setdefault(item['category'], []).append(item)
+    items = []
+    for entries in by_category.values():
+        entries.sort(key=lambda item: _parse_ts(item["date"]) or 0, reverse=True)
+        items.extend(entries)
+    days_seen = [parsedate_to_datetime(item["date"]).strftime('%Y-%m-%d') for item in items]
+    rows = [(item["link"], item["title"], item["date"], _parse_ts(item["date"]), item["source"])
+            for item in items]
+    return items, days_seen, rows
+
+
+def news_item_pipeline(feeds, days):
+    cutoff = date_cutoff(days)
+    matcher = get_matcher("vip")
+    filtered = []
+    for category, entries in feeds:
+        for entry in entries:
+            item = NewsItem.from_entry(entry, category)
+            if is_within_date_range(item.published_ts, cutoff) and matcher.is_relevant_lower(item.title_lower):
+                filtered.append(item)
+    seen, by_category = set(), {}
+    for item in filtered:
+        if item.title not in seen:
+            seen.add(item.title)
+            by_category.setdefault(item.category, []).append(item)
+    items = []
+    for entries in by_category.values():
+        entries.sort(key=lambda item: item.published_ts or 0, reverse=True)
+        items.extend(entries)
+    days_seen = [item.day for item in items]
+    rows = [(item.link, item.title, item.date, item.published_ts, item.source) for item in items]
+    return items, days_seen, rows
+
+
+def measure(runner, feeds, days, rounds):
+    start = time.process_time()
+    for _ in range(rounds):
+        runner(feeds, days)
+    cpu = (time.process_time() - start) / rounds
+    tracemalloc.start()
+    result = runner(feeds, days)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak, retained, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--per-feed", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    feeds = make_feeds(args.days, args.per_feed)
+    total = sum(len(entries) for _, entries in feeds)
+    legacy = measure(legacy_pipeline, feeds, args.days, args.rounds)
+    slotted = measure(news_item_pipeline, feeds, args.days, args.rounds)
+    assert [i["link"] for i in legacy[3][0]] == [i.link for i in slotted[3][0]]
+    assert legacy[3][1] == slotted[3][1]
+
+    print(f"{len(feeds)} feeds, {total} entries, {len(slotted[3][0])} kept")
+    for label, (cpu, peak, retained, _) in [("dict", legacy), ("NewsItem", slotted)]:
+        print(f"{label:9s} cpu={cpu * 1000:8.1f}ms  peak={peak / 1024:8.0f}KiB  retained={retained / 1024:8.0f}KiB")
+    print(f"cpu speedup={legacy[0] / slotted[0]:.2f}x  peak memory ratio={slotted[1] / legacy[1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+比較 feedparser 與 Google News 專用解析器的解析耗時與記憶體峰值，並確認兩者結果一致。
+
+預設使用模擬伺服器格式產生的 feed；--fixtures 可指定存放錄製 RSS（*.xml）的目錄。
+
+用法: python bench/bench_parser.py [--feeds 120] [--items 100] [--fixtures DIR] [--rounds 3]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feedparser  # noqa: E402
+
+from bench.stub_server import make_rss  # noqa: E402
+from thainews.fetcher import entry_to_dict  # noqa: E402
+from thainews.rss_parser import parse_google_news  # noqa: E402
+
+
+def parse_with_feedparser(body):
+    return [entry_to_dict(entry) for entry in feedparser.parse(body).entries]
+
+
+def load_bodies(args):
+    if args.fixtures:
+        bodies = []
+        for path in sorted(glob.glob(os.path.join(args.fixtures, "*.xml"))):
+            with open(path, "rb") as f:
+                bodies.append(f.read())
+        return bodies
+    return [make_rss(f"/rss/search?q=%22Thailand%22+{i}", args.items) for i in range(args.feeds)]
+
+
+def measure(parser, bodies, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for body in bodies:
+            parser(body)
+    elapsed = (time.perf_counter() - start) / rounds
+    # 記憶體峰值以單份 feed 解析過程計算（與逐一解析下載結果的實際用法相同）
+    peak = 0
+    for body in bodies:
+        tracemalloc.start()
+        parser(body)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--feeds", type=int, default=120)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--fixtures", help="錄製的 RSS 目錄（*.xml）")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    bodies = load_bodies(args)
+    for body in bodies:
+        assert parse_google_news(body) == parse_with_feedparser(body)
+    total_bytes = sum(len(b) for b in bodies)
+    print(f"{len(bodies)} feeds, {total_bytes / 1024:.0f} KiB")
+
+    results = {}
+    for label, fn in [("feedparser", parse_with_feedparser), ("expat", parse_google_news)]:
+        results[label] = measure(fn, bodies, args.rounds)
+        elapsed, peak = results[label]
+        print(f"{label:10s} {elapsed * 1000:8.1f}ms  peak/feed={peak / 1024:7.0f}KiB")
+    print(f"speedup={results['feedparser'][0] / results['expat'][0]:.1f}x  "
+          f"peak memory ratio={results['expat'][1] / results['feedparser'][1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+端到端效能基準：以重播傳輸層（錄製的 fixture，或合成內容）離線執行完整搜尋流程，
+涵蓋 TOPIC_MAP 各模式、個別台商與自訂關鍵字，天數 1/3/7/30。
+記錄每組的端到端耗時、請求數、CPU 時間與記憶體峰值，可存成 JSON 作為之後比較的基準。
+
+用法:
+    python bench/bench_pipeline.py                                   # 合成內容
+    python bench/bench_pipeline.py --fixtures fixtures/ --latency 0.1
+    python bench/bench_pipeline.py --json baseline.json
+    python bench/bench_pipeline.py --compare baseline.json --failure-rate 0.05
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.replay import FixtureStore, ReplayTransport  # noqa: E402
+from thainews.config import COMPANY_MAP, TOPIC_MAP  # noqa: E402
+from thainews.fetcher import use_transport  # noqa: E402
+from thainews.news_store import NewsStore  # noqa: E402
+from thainews.pipeline import run_scan  # noqa: E402
+from thainews.prefetch import days_label  # noqa: E402
+
+DEFAULT_DAYS = [1, 3, 7, 30]
+DEFAULT_KEYWORDS = ["Siam AI"]
+
+
+def build_cases(days_list, companies=None, keywords=None):
+    """(mode, keyword, days)：TOPIC_MAP 各模式、個別台商、自訂關鍵字"""
+    companies = companies or [next(iter(COMPANY_MAP))]
+    keywords = DEFAULT_KEYWORDS if keywords is None else keywords
+    cases = []
+    for days in days_list:
+        cases += [(mode, None, days) for mode in TOPIC_MAP.values()]
+        cases += [("company", name, days) for name in companies]
+        cases += [("custom", kw, days) for kw in keywords]
+    return cases
+
+
+def run_case(mode, keyword, days, transport, store, measure_memory=True):
+    before = (transport.requests, transport.failures)
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    # 基準量測完整搜尋，不沿用同一歷史庫中前一組寫入的逐日結果
+    with use_transport(transport):
+        _, news = run_scan(days_label(days), days, mode, keyword, store=store, incremental=False)
+    row = {
+        "mode": mode, "keyword": keyword, "days": days,
+        "seconds": time.perf_counter() - start,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "requests": transport.requests - before[0],
+        "failures": transport.failures - before[1],
+        "items": len(news),
+        "peak_kib": None,
+    }
+    if measure_memory:
+        # 記憶體另跑一次量測，避免 tracemalloc 的額外負擔影響耗時數字
+        tracemalloc.start()
+        with use_transport(transport):
+            run_scan(days_label(days), days, mode, keyword, store=store, incremental=False)
+        row["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return row
+
+
+def print_rows(rows, baseline=None):
+    base = {(r["mode"], r["keyword"], r["days"]): r for r in baseline or []}
+
+    def delta(row, key):
+        old = base.get((row["mode"], row["keyword"], row["days"]), {}).get(key)
+        if not old or row[key] is None:
+            return ""
+        return f" ({(row[key] - old) / old * 100:+.0f}%)"
+
+    print(f"{'mode':9s} {'keyword':10s} {'days':>4s} {'seconds':>16s} {'cpu':>16s} {'requests':>14s} "
+          f"{'fail':>4s} {'items':>5s} {'peak KiB':>16s}")
+    for r in rows:
+        peak = f"{r['peak_kib']:.0f}" if r["peak_kib"] is not None else "-"
+        print(f"{r['mode']:9s} {str(r['keyword'] or ''):10s} {r['days']:4d} "
+              f"{r['seconds']:7.3f}{delta(r, 'seconds'):>9s} {r['cpu_seconds']:7.3f}{delta(r, 'cpu_seconds'):>9s} "
+              f"{r['requests']:5d}{delta(r, 'requests'):>9s} {r['failures']:4d} {r['items']:5d} "
+              f"{peak:>7s}{delta(r, 'peak_kib'):>9s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", help="錄製的 fixture 目錄（預設以合成內容回應）")
+    parser.add_argument("--days", type=int, nargs="+", default=DEFAULT_DAYS)
+    parser.add_argument("--company", nargs="*", help="個別台商模式要測的台商（預設第一家）")
+    parser.add_argument("--keyword", nargs="*", default=None, help="自訂關鍵字模式的關鍵字")
+    parser.add_argument("--latency", type=float, default=0.05, help="每個請求的注入延遲（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="額外隨機延遲上限（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="回傳 503 的機率")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="連線失敗的機率")
+    parser.add_argument("--items-per-day", type=int, default=15, help="合成內容每天的新聞數")
+    parser.add_argument("--no-memory", action="store_true", help="不量測記憶體峰值")
+    parser.add_argument("--json", help="將結果寫入此 JSON 檔作為基準")
+    parser.add_argument("--compare", help="與先前存下的基準 JSON 比較")
+    args = parser.parse_args()
+
+    transport = ReplayTransport(
+        FixtureStore(args.fixtures) if args.fixtures else None,
+        latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+        error_rate=args.error_rate, items_per_day=args.items_per_day,
+    )
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NewsStore(os.path.join(tmp, "bench.db"), legacy_json=os.path.join(tmp, "none.json"))
+        for mode, keyword, days in build_cases(args.days, args.company, args.keyword):
+            rows.append(run_case(mode, keyword, days, transport, store, not args.no_memory))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["rows"]
+    print_rows(rows, baseline)
+    if args.fixtures:
+        print(f"fixture 未命中: {transport.misses}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "args": vars(args), "rows": rows}, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    main()
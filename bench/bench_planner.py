@@ -0,0 +1,56 @@
+"""
+比較固定逐日拆分與自適應日期區間的請求數、耗時與取得條目數。
+
+模擬伺服器依查詢區間天數回傳 items_per_day × 天數 則（上限 100），
+分別以冷門、一般、熱門三種新聞量測試各天數範圍。
+
+用法: python bench/bench_planner.py [--templates 4] [--latency 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_server import StubServer  # noqa: E402
+from thainews import planner as planner_module  # noqa: E402
+from thainews.planner import AdaptivePlanner, DailyPlanner  # noqa: E402
+
+VOLUMES = {"冷門": 2, "一般": 15, "熱門": 60}
+DAYS = [1, 3, 7, 30]
+
+
+def make_templates(count):
+    return [{"name": f"t{i}", "query": f"bench{i}", "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"}
+            for i in range(count)]
+
+
+def run(planner_cls, templates, days):
+    plan = planner_cls(templates, days)
+    start = time.perf_counter()
+    entries = sum(len(e or []) for _, e in plan.run())
+    return plan.requests, entries, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--templates", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="模擬伺服器延遲（秒）")
+    args = parser.parse_args()
+
+    templates = make_templates(args.templates)
+    print(f"{'新聞量':6s} {'天數':>4s}  {'逐日請求':>8s} {'自適應請求':>10s}  {'逐日條目':>8s} {'自適應條目':>10s}"
+          f"  {'逐日耗時':>8s} {'自適應耗時':>10s}")
+    for label, per_day in VOLUMES.items():
+        with StubServer(latency=args.latency, items_per_day=per_day) as server:
+            planner_module.RSS_SEARCH_URL = f"{server.base_url}/rss/search"
+            for days in DAYS:
+                daily = run(DailyPlanner, templates, days)
+                adaptive = run(AdaptivePlanner, templates, days)
+                print(f"{label:6s} {days:4d}  {daily[0]:8d} {adaptive[0]:10d}  {daily[1]:8d} {adaptive[1]:10d}"
+                      f"  {daily[2]:7.2f}s {adaptive[2]:9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+工作佇列的擴展性：對模擬伺服器排入同一批逐日工作，分別以 1、2、4… 個 worker 程序處理到佇列清空，
+比較總耗時與每秒完成的工作數。每個 worker 限制同時請求數（--concurrency），
+模擬單一程序的抓取上限；伺服器不限流時吞吐量應接近隨 worker 數線性成長。
+
+用法: python bench/bench_queue.py [--workers 1 2 4] [--days 30] [--companies 0] [--latency 0.2] [--concurrency 4]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import thainews.planner as planner_module  # noqa: E402
+from bench.stub_server import StubServer  # noqa: E402
+from thainews.config import COMPANY_MAP  # noqa: E402
+from thainews.work_queue import WorkQueue, build_jobs  # noqa: E402
+
+
+def run(workers, jobs, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        queue_path = os.path.join(tmp, "queue.db")
+        queue = WorkQueue(queue_path)
+        queue.enqueue(jobs)
+        command = [sys.executable, "-m", "thainews.work_queue", "--queue", queue_path, "worker",
+                   "--store", os.path.join(tmp, "news.db"), "--exit-when-empty", "--no-cache", "--no-resolve",
+                   "--concurrency", str(args.concurrency), "--batch", str(args.batch)]
+        start = time.perf_counter()
+        processes = [subprocess.Popen(command, cwd=tmp, env={**os.environ, "PYTHONPATH": ROOT},
+                                      stdout=subprocess.DEVNULL) for _ in range(workers)]
+        for process in processes:
+            process.wait()
+        elapsed = time.perf_counter() - start
+        counts = queue.counts()
+    return elapsed, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--modes", nargs="+", default=["macro", "industry", "vip"])
+    parser.add_argument("--companies", type=int, default=0, help="另外排入的台商家數")
+    parser.add_argument("--latency", type=float, default=0.2, help="模擬伺服器延遲（秒）")
+    parser.add_argument("--concurrency", type=int, default=4, help="每個 worker 同時進行的請求上限")
+    parser.add_argument("--batch", type=int, default=8, help="每次租用的工作數")
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        planner_module.RSS_SEARCH_URL = f"{server.base_url}/rss/search"
+        jobs = build_jobs(args.days, args.modes, companies=list(COMPANY_MAP)[:args.companies])
+        print(f"{len(jobs)} 個工作，伺服器延遲 {args.latency}s，每個 worker 同時 {args.concurrency} 個請求")
+        baseline = None
+        for workers in args.workers:
+            before = server.request_count
+            elapsed, counts = run(workers, jobs, args)
+            rate = counts["done"] / elapsed
+            baseline = baseline or rate / workers
+            print(f"workers={workers:2d} {elapsed:6.1f}s  {rate:6.1f} 工作/秒  "
+                  f"done={counts['done']} failed={counts['failed']} pending={counts['pending']} "
+                  f"requests={server.request_count - before}  擴展效率 {rate / (baseline * workers):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+比較舊版逐則重建規則的 is_relevant 與預先編譯比對器的耗時，並確認兩者結果一致。
+
+用法: python bench/bench_relevance.py [--titles 5000] [--rounds 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thainews.config import COMPANY_MAP, RELEVANCE_KEYWORDS  # noqa: E402
+from thainews.relevance import get_matcher  # noqa: E402
+
+WORDS = [
+    "泰國", "台灣", "電子", "投資", "工廠", "擴產", "央行", "利率", "出口", "選舉", "曼谷", "泰銖",
+    "Thailand", "Bangkok", "PCB", "SET:", "DELTA", "Delta Airlines", "server", "EV", "baht",
+    "investment", "factory", "election", "Siam AI", "Siam-AI", "data center", "台達電", "泰達電",
+] + [info["en"] for info in COMPANY_MAP.values()]
+
+# 與任何模式都無關的常見詞，讓多數標題需走完全部規則才被排除
+NEUTRAL_WORDS = [
+    "market", "stocks", "rally", "Fed", "oil", "prices", "Japan", "Vietnam", "Malaysia", "chip",
+    "supply", "chain", "tariff", "earnings", "quarter", "growth", "AI", "cloud", "global", "outlook",
+]
+
+CASES = [("macro", None), ("industry", None), ("vip", None), ("company", "泰達電"),
+         ("company", "燿華"), ("custom", "Siam AI"), ("custom", "泰達電")]
+
+
+# 舊版實作（逐則重建關鍵字清單與正規式），僅供比較
+def legacy_is_relevant(title, mode, custom_keyword=None):
+    """檢查標題是否與搜尋模式相關（至少包含一個關鍵字）"""
+    if mode == "company" and custom_keyword:
+        # 個別台商：標題須含任一名稱變體
+        title_lower = title.lower()
+        info = COMPANY_MAP.get(custom_keyword, {})
+        # 中英文名稱用子字串比對（夠具體）
+        names = [
+            info.get("thai_cn", ""), info.get("tw_cn", ""),
+            info.get("en", ""),
+            custom_keyword,
+        ]
+        if any(n and n.lower() in title_lower for n in names):
+            return True
+        # SET 代碼用完整單詞比對，避免 "DELTA" 匹配到 Delta Airlines
+        set_ticker = info.get("set", "")
+        if set_ticker and re.search(r'\b' + re.escape(set_ticker.lower()) + r'\b', title_lower):
+            # 額外要求標題也含泰國/PCB 相關詞，排除純美股/其他國家新聞
+            thai_patterns = [
+                r'\bthai(?:land)?\b', r'\bbangkok\b', r'\bset[:\s]',  # 英文泰國詞
+                r'\bpcb\b', r'電路板',                                  # PCB 產業
+                "泰", "曼谷", "泰銖",                                    # 中文泰國詞
+            ]
+            if any(re.search(p, title_lower) if '\\' in p else p in title_lower
+                   for p in thai_patterns):
+                return True
+        return False
+    if mode == "custom" and custom_keyword:
+        title_lower = title.lower()
+        kw = custom_keyword.strip().lower()
+        # 完整關鍵字比對（優先且最精確）
+        if kw in title_lower:
+            return True
+        # 多詞比對：詞必須相鄰出現，避免 "Siam...AI" 散落匹配
+        words = kw.split()
+        if len(words) >= 2:
+            # 允許詞間有少量非字母字元（如 "Siam-AI" 或 "Siam's AI"）
+            pattern = r'\b' + r'[\s\-\']{0,3}'.join(re.escape(w) for w in words) + r'\b'
+            if re.search(pattern, title_lower):
+                return True
+        # 中文逐字比對：僅對非 ASCII 字元拆分（如「泰達電」→「泰」「達」「電」）
+        cjk_chars = [c for c in kw if ord(c) > 127]
+        if len(cjk_chars) >= 2:
+            matched = sum(1 for c in cjk_chars if c in title_lower)
+            # 全部命中或至少超過一半（容許部分不符，如「泰達電」→「台達電」差一字）
+            if matched >= len(cjk_chars) or (len(cjk_chars) >= 3 and matched >= len(cjk_chars) - 1):
+                return True
+        return False
+    keywords = RELEVANCE_KEYWORDS.get(mode)
+    if not keywords:
+        return True
+    title_lower = title.lower()
+    return any(kw.lower() in title_lower for kw in keywords)
+
+
+def make_titles(count, seed=42):
+    rng = random.Random(seed)
+    titles = []
+    for i in range(count):
+        words = rng.choices(NEUTRAL_WORDS, k=rng.randint(5, 10))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(WORDS))
+        titles.append(" ".join(words) + f" - Source {i % 40}")
+    return titles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    titles = make_titles(args.titles)
+
+    for mode, kw in CASES:
+        legacy_result = [legacy_is_relevant(t, mode, kw) for t in titles]
+        matcher = get_matcher(mode, kw)
+        assert legacy_result == [matcher.is_relevant(t) for t in titles], (mode, kw)
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for t in titles:
+                legacy_is_relevant(t, mode, kw)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for t in titles:
+                get_matcher(mode, kw).is_relevant(t)
+        matcher_time = time.perf_counter() - start
+        print(f"{mode:9s} {str(kw or ''):8s} legacy={legacy_time:6.3f}s  matcher={matcher_time:6.3f}s  "
+              f"speedup={legacy_time / matcher_time:5.1f}x  relevant={sum(legacy_result)}/{len(titles)}")
+
+
+if __name__ == "__main__":
+    main()
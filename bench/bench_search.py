@@ -0,0 +1,66 @@
+"""
+全文檢索查詢延遲：以隨機產生並建好索引的歷史庫（預設 10 萬則）量測常見詞、少見詞與多詞查詢，
+比較候選上限（預設 MAX_CANDIDATES）與不設上限（掃過常見詞全部 postings）的耗時。
+
+用法: python bench/bench_search.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_server import TITLE_WORDS  # noqa: E402
+from thainews.news_item import NewsItem  # noqa: E402
+from thainews.news_store import NEWS_COLUMNS, NewsStore  # noqa: E402
+from thainews.search_index import MAX_CANDIDATES  # noqa: E402
+
+QUERIES = ["泰國", "台商", "PCB", "央行 利率", "泰國 電動車 投資", "曼谷 工業區 台商 擴產", "story12345"]
+
+
+def build_store(path, rows, seed=1):
+    """產生隨機歷史庫並經 upsert_many 建立索引；每則標題結尾帶唯一代號（少見詞）"""
+    store = NewsStore(path, legacy_json=None)
+    rng = random.Random(seed)
+    batch = []
+    for i in range(rows):
+        batch.append(NewsItem(f"{' '.join(rng.sample(TITLE_WORDS, 7))} story{i}", f"https://example.com/{i}",
+                              source=f"Source {i % 200}"))
+        if len(batch) == 10000:
+            store.upsert_many(batch)
+            batch = []
+    store.upsert_many(batch)
+    return store
+
+
+def timed_search(store, query, repeat, max_candidates):
+    with sqlite3.connect(store.path) as conn:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rows, total = store.index.search(conn, query, NEWS_COLUMNS, max_candidates=max_candidates)
+    return (time.perf_counter() - start) / repeat, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        store = build_store(os.path.join(tmp, "news.db"), args.rows)
+        print(f"{args.rows} 則，建立索引 {time.perf_counter() - start:.1f}s")
+        for query in QUERIES:
+            capped, capped_total = timed_search(store, query, args.repeat, MAX_CANDIDATES)
+            full, full_total = timed_search(store, query, args.repeat, args.rows)
+            print(f"{query:24s} capped {capped * 1000:8.1f}ms ({capped_total:6d})   "
+                  f"uncapped {full * 1000:8.1f}ms ({full_total:6d})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+RSS 錄製與重播傳輸層。
+
+RecordingTransport 實際連網抓取，並把每個 200 回應以 URL 為鍵存成 fixture；
+ReplayTransport 從 fixture 回應請求，可注入延遲、錯誤狀態碼與連線失敗。
+兩者皆以 thainews.fetcher.use_transport 套用，流程其他部分完全不變。
+
+查詢網址中的 after:/before: 日期以「相對錄製當天的天數」作為鍵，
+重播時依當天日期換算，並將 pubDate 平移相同天數，讓舊錄製仍能通過日期過濾。
+
+錄製: python -m bench.replay --fixtures fixtures/ --days 1 3 7 30
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+from datetime import date, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import unquote_plus, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.stub_server import FEED_ITEM_CAP, make_rss, query_window  # noqa: E402
+from thainews.feed_cache import normalize_url  # noqa: E402
+from thainews.fetcher import AsyncFeedFetcher, Response  # noqa: E402
+
+_DATE_RE = re.compile(r'\b(after|before):(\d{4}-\d{2}-\d{2})')
+_PUBDATE_RE = re.compile(rb'<pubDate>([^<]+)</pubDate>')
+
+
+def url_key(url, today=None):
+    """fixture 鍵：正規化後的路徑與參數（不含主機），日期改為相對 today 的天數"""
+    today = today or date.today()
+    parts = urlsplit(normalize_url(url))
+    text = unquote_plus(f"{parts.path}?{parts.query}")
+    return _DATE_RE.sub(lambda m: f"{m.group(1)}:{(date.fromisoformat(m.group(2)) - today).days:+d}d", text)
+
+
+def shift_pubdates(body, days):
+    """將 RSS 內所有 pubDate 平移指定天數"""
+    if not days:
+        return body
+
+    def shift(match):
+        try:
+            dt = parsedate_to_datetime(match.group(1).decode()) + timedelta(days=days)
+        except (TypeError, ValueError):
+            return match.group(0)
+        return b"<pubDate>" + format_datetime(dt.astimezone(timezone.utc), usegmt=True).encode() + b"</pubDate>"
+
+    return _PUBDATE_RE.sub(shift, body)
+
+
+class FixtureStore:
+    """fixture 目錄：index.json 記錄鍵 → 檔名、原始網址與錄製日期，內容另存為 .xml"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.index_path = os.path.join(path, "index.json")
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def save(self, url, body):
+        recorded_on = date.today()
+        key = url_key(url, recorded_on)
+        filename = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".xml"
+        with open(os.path.join(self.path, filename), "wb") as f:
+            f.write(body)
+        self.index[key] = {"url": url, "file": filename, "recorded_on": recorded_on.isoformat()}
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+
+    def load(self, url, today=None):
+        """回傳 (body, 錄製日距今天數)；沒有此 fixture 回傳 None"""
+        today = today or date.today()
+        record = self.index.get(url_key(url, today))
+        if record is None:
+            return None
+        with open(os.path.join(self.path, record["file"]), "rb") as f:
+            body = f.read()
+        return body, (today - date.fromisoformat(record["recorded_on"])).days
+
+
+class RecordingTransport:
+    """實際連網並錄製回應（不帶條件式標頭，確保取得完整內容）"""
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.recorded = 0
+        self._inner = None
+
+    def __call__(self, max_concurrency, timeout):
+        self._inner = AsyncFeedFetcher(max_concurrency, timeout)
+        return self
+
+    async def __aenter__(self):
+        await self._inner.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._inner.__aexit__(*exc_info)
+
+    async def get(self, url, headers=None):
+        resp = await self._inner.get(url)
+        if resp.status == 200:
+            self.fixtures.save(url, resp.body)
+            self.recorded += 1
+        return resp
+
+
+class ReplayTransport:
+    """
+    以 fixture 回應請求。
+    :param fixtures: FixtureStore；None 表示全部以合成內容回應
+    :param latency: 每個請求的延遲秒數；jitter 為額外的隨機延遲上限
+    :param failure_rate: 回傳 failure_status 的機率
+    :param error_rate: 直接拋出連線錯誤的機率
+    :param synthesize: 沒有 fixture 時以模擬伺服器格式合成內容（每天 items_per_day 則，上限 100），否則回傳 404
+    """
+
+    def __init__(self, fixtures=None, latency=0.0, jitter=0.0, failure_rate=0.0, failure_status=503,
+                 error_rate=0.0, synthesize=False, items_per_day=15, seed=0):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.error_rate = error_rate
+        self.synthesize = synthesize or fixtures is None
+        self.items_per_day = items_per_day
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self.misses = 0
+        self._semaphore = None
+
+    def __call__(self, max_concurrency, timeout):
+        self._max_concurrency = max_concurrency
+        return self
+
+    async def __aenter__(self):
+        # 模擬連線池上限：同時進行的請求數與實際抓取相同
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore = None
+
+    async def get(self, url, headers=None):
+        async with self._semaphore:
+            self.requests += 1
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            if delay:
+                await asyncio.sleep(delay)
+            roll = self.rng.random()
+            if roll < self.error_rate:
+                self.failures += 1
+                raise ConnectionResetError("injected connection failure")
+            if roll < self.error_rate + self.failure_rate:
+                self.failures += 1
+                return Response(self.failure_status, {}, b"")
+            loaded = self.fixtures.load(url) if self.fixtures else None
+            if loaded:
+                body, age_days = loaded
+                return Response(200, {}, shift_pubdates(body, age_days))
+            self.misses += 1
+            if not self.synthesize:
+                return Response(404, {}, b"")
+            return Response(200, {}, self._synthesize(url))
+
+    def _synthesize(self, url):
+        parts = urlsplit(url)
+        # 保留原始編碼：query_window 自行解碼，且需要 after:…+before:… 之間的「+」（unquote_plus 會轉成空白）
+        path = f"{parts.path}?{parts.query}"
+        window = query_window(path)
+        items = 20
+        if window:
+            items = min(FEED_ITEM_CAP, self.items_per_day * (window[1] - window[0]).days)
+        return make_rss(path, items, window)
+
+
+def record(fixtures_path, days_list, companies=None, keywords=()):
+    """實際連網執行所有模式並錄製回應"""
+    from bench.bench_pipeline import build_cases
+    from thainews.fetcher import use_transport
+    from thainews.pipeline import run_scan
+    from thainews.prefetch import days_label
+
+    transport = RecordingTransport(FixtureStore(fixtures_path))
+    with use_transport(transport):
+        for mode, keyword, days in build_cases(days_list, companies, keywords):
+            run_scan(days_label(days), days, mode, keyword)
+            print(f"[record] {mode} {keyword or ''} {days}天: 累計 {transport.recorded} 個 fixture", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="錄製 Google News RSS 回應作為重播 fixture")
+    parser.add_argument("--fixtures", required=True, help="fixture 目錄")
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 3, 7, 30])
+    parser.add_argument("--company", nargs="*", help="要錄製的台商（預設第一家）")
+    parser.add_argument("--keyword", nargs="*", default=None, help="自訂關鍵字模式的關鍵字")
+    args = parser.parse_args()
+    record(args.fixtures, args.days, args.company, args.keyword)
+
+
+if __name__ == "__main__":
+    main()
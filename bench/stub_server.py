@@ -0,0 +1,245 @@
+"""
+本地 Google News RSS 模擬伺服器，供抓取引擎測試與效能比較使用。
+
+任何路徑皆回傳依 URL 產生的固定 RSS（HTTP/1.1 keep-alive，支援 gzip），
+附帶 ETag / Last-Modified 並支援條件式請求，可設定每個請求的模擬延遲。
+設定 items_per_day 時回傳數量依查詢的 after:/before: 區間天數而定（上限 100 則）。
+設定 rate_limit 時以 token bucket 模擬限流：超出速率回傳 429（附 Retry-After）；
+短時間內被限流超過 block_after 次則封鎖 block_seconds 秒，期間所有請求回傳 503。
+/rss/articles/<id> 模擬轉址連結：redirect_mode 為 "302" 時回傳轉址，"page" 時回傳帶 data-n-au 的頁面，
+"consent" 時轉往 consent.google.com（模擬未帶同意 cookie 的請求）；
+id 中第一個 "_" 之後視為版本（同一篇報導經不同 feed 取得的 id），轉址目標相同。
+"""
+import base64
+import gzip
+import hashlib
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from xml.sax.saxutils import escape
+
+
+TITLE_WORDS = [
+    "泰國", "台商", "電子", "投資", "擴產", "央行", "利率", "出口", "曼谷", "工業區", "電動車", "伺服器",
+    "Thailand", "PCB", "factory", "investment", "baht", "exports", "EV", "data", "center", "BOI",
+    "election", "tourism", "Bangkok", "supply", "chain", "tariff", "growth", "plant",
+]
+
+FEED_ITEM_CAP = 100
+_TERM_RE = re.compile(r'"([^"]+)"')
+_WINDOW_RE = re.compile(r'after:(\d{4}-\d{2}-\d{2})\+before:(\d{4}-\d{2}-\d{2})')
+
+
+def encode_article_id(url):
+    """產生舊版格式的 Google News 文章 id：base64 編碼的 protobuf，第 4 欄為原始網址"""
+    data = url.encode("utf-8")
+    length = bytearray()
+    n = len(data)
+    while True:
+        length.append((n & 0x7F) | (0x80 if n > 0x7F else 0))
+        n >>= 7
+        if not n:
+            break
+    return base64.urlsafe_b64encode(b"\x08\x13\x22" + bytes(length) + data + b"\xd2\x01\x00").decode().rstrip("=")
+
+
+def article_target(token):
+    """轉址連結 id 對應的原始網址（忽略版本部分）"""
+    story = token.split("_", 1)[0]
+    return f"https://stub{int(hashlib.md5(story.encode()).hexdigest(), 16) % 5}.example.com/story/{story}"
+
+
+def make_title(digest, i, terms=()):
+    """依 digest 與序號產生固定但彼此不同的標題；提供 terms 時標題會提到其中一個查詢詞"""
+    rng = random.Random(f"{digest}-{i}")
+    words = rng.sample(TITLE_WORDS, 7)
+    if terms:
+        words.insert(rng.randrange(len(words)), rng.choice(terms))
+    return f"泰國 {' '.join(words)} {digest}-{i}"
+
+
+def query_terms(path):
+    """取出查詢中以引號包住的詞（模擬 Google News 只回傳提到查詢詞的新聞）"""
+    return [t.replace("+", " ") for t in _TERM_RE.findall(unquote(path))]
+
+
+def query_window(path):
+    """取出查詢中的 after:/before: 日期區間，沒有則回傳 None"""
+    match = _WINDOW_RE.search(unquote(path))
+    if not match:
+        return None
+    start, end = (datetime.strptime(d, "%Y-%m-%d").replace(tzinfo=timezone.utc) for d in match.groups())
+    return start, end
+
+
+def make_rss(seed, items=20, window=None):
+    """
+    依 seed 產生固定內容的 Google News 格式 RSS。
+    提供 window 時發布時間平均分布在區間內（不晚於現在），否則從現在起每 37 分鐘一則。
+    """
+    digest = hashlib.md5(seed.encode("utf-8")).hexdigest()[:8]
+    terms = query_terms(seed)
+    now = datetime.now(timezone.utc)
+    if window:
+        start, end = window[0], min(window[1], now)
+        step = max(end - start, timedelta(minutes=1)) / max(items, 1)
+    else:
+        end, step = now, timedelta(minutes=37)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>',
+             f"<title>{escape(seed)} - Google News</title>"]
+    for i in range(items):
+        source = f"Stub Daily {i % 5}"
+        parts.append(
+            "<item>"
+            f"<title>{escape(make_title(digest, i, terms))} - {source}</title>"
+            f"<link>https://news.google.com/rss/articles/{digest}{i:04d}?oc=5</link>"
+            f'<guid isPermaLink="false">{digest}{i:04d}</guid>'
+            f"<pubDate>{format_datetime(end - step * (i + 0.5))}</pubDate>"
+            f"<description>&lt;a href=&quot;https://example.com/{digest}/{i}&quot;&gt;{digest}&lt;/a&gt;</description>"
+            f'<source url="https://stub{i % 5}.example.com">{source}</source>'
+            "</item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        status = server.admit()
+        if status != 200:
+            self.send_response(status)
+            self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        if self.path.startswith("/rss/articles/"):
+            self.send_article(self.path[len("/rss/articles/"):].split("?", 1)[0])
+            return
+        window = query_window(self.path)
+        items = server.items
+        if server.items_per_day and window:
+            # 依區間天數決定回傳數量，超過上限則截斷（模擬 Google News 的飽和 feed）
+            items = min(FEED_ITEM_CAP, server.items_per_day * (window[1] - window[0]).days)
+        body = make_rss(self.path, items, window)
+        etag = '"%s"' % hashlib.md5(self.path.encode("utf-8")).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            with server.lock:
+                server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_article(self, token):
+        target = article_target(token)
+        if self.server.redirect_mode == "consent":
+            target = f"https://consent.google.com/ml?continue=https://news.google.com/rss/articles/{token}&gl=TW"
+        if self.server.redirect_mode in ("302", "consent"):
+            self.send_response(302)
+            self.send_header("Location", target)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = (f'<html><body><c-wiz><div jscontroller="x" data-n-au="{target}"></div></c-wiz>'
+                f"</body></html>").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, items=20, port=0, items_per_day=0, rate_limit=0.0, burst=10, retry_after=1,
+                 block_after=0, block_seconds=10.0, redirect_mode="302"):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.items = items
+        self.items_per_day = items_per_day
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.retry_after = retry_after
+        self.block_after = block_after
+        self.block_seconds = block_seconds
+        self.redirect_mode = redirect_mode
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.throttled_count = 0
+        self.blocked_count = 0
+        self.last_modified = formatdate(usegmt=True)
+        self.lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._recent_throttles = []
+        self._blocked_until = 0.0
+
+    def admit(self):
+        """依限流設定決定回應狀態：200 正常、429 超出速率、503 封鎖中"""
+        if not self.rate_limit:
+            return 200
+        with self.lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                self.blocked_count += 1
+                return 503
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 200
+            self.throttled_count += 1
+            if self.block_after:
+                # 最近 block_seconds 內被限流的次數過多（不理會 429 持續送出）即封鎖
+                self._recent_throttles = [t for t in self._recent_throttles if now - t < self.block_seconds]
+                self._recent_throttles.append(now)
+                if len(self._recent_throttles) > self.block_after:
+                    self._blocked_until = now + self.block_seconds
+                    self._recent_throttles = []
+            return 429
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    with StubServer() as server:
+        print(f"Serving stub RSS on {server.base_url}")
+        threading.Event().wait()
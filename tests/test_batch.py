@@ -0,0 +1,52 @@
+from urllib.parse import unquote
+
+from bench.replay import ReplayTransport
+from thainews.batch import (
+    LANGS, MAX_QUERY_TERMS, build_batch_templates, company_category, company_terms, match_companies, pack_companies,
+)
+from thainews.config import COMPANY_MAP
+from thainews.fetcher import use_transport
+from thainews.pipeline import days_label, run_company_batch
+
+
+def test_pack_companies_respects_limits():
+    names = list(COMPANY_MAP)
+    batches = pack_companies(names, max_companies=3)
+    assert [name for batch in batches for name in batch] == names
+    for batch in batches:
+        assert len(batch) <= 3
+        assert sum(len(company_terms(name)) for name in batch) <= MAX_QUERY_TERMS or len(batch) == 1
+
+
+def test_batch_templates_cover_every_company_per_language():
+    templates = build_batch_templates()
+    for lang in LANGS:
+        covered = [name for tmpl in templates if tmpl["lang"] == lang["lang"] for name in tmpl["companies"]]
+        assert covered == list(COMPANY_MAP)
+    for tmpl in templates:
+        query = unquote(tmpl["query"])
+        assert all(unquote(term) in query for name in tmpl["companies"] for term in company_terms(name))
+
+
+def test_batch_results_routed_to_mentioned_companies():
+    transport = ReplayTransport(items_per_day=20)
+    stats = {}
+    with use_transport(transport):
+        results = run_company_batch(days_label(3), 3, stats=stats)
+    assert list(results) == list(COMPANY_MAP)
+    assert stats["requests"] < stats["fixed_plan_requests"]
+    assert any(news for _, news in results.values())
+    for name, (_, news) in results.items():
+        categories = {company_category(name, lang["lang"]) for lang in LANGS}
+        for item in news:
+            assert match_companies(item["title"].lower(), [name]) == [name]
+            assert item["category"] in categories
+    # 同一則新聞提到同批多家台商時分派給每一家
+    batch_of = {name: tmpl["companies"] for tmpl in build_batch_templates() for name in tmpl["companies"]}
+    by_title = {}
+    for name, (_, news) in results.items():
+        for item in news:
+            by_title.setdefault(item["title"], set()).add(name)
+    for title, names in by_title.items():
+        batch = batch_of[next(iter(names))]
+        assert set(match_companies(title.lower(), batch)) <= names
@@ -0,0 +1,62 @@
+import sqlite3
+import time
+from email.utils import formatdate
+
+from thainews.company_index import mention_day, tag_companies
+from thainews.news_item import NewsItem
+from thainews.news_store import NewsStore
+
+TITLES = ["泰達電 曼谷新廠量產", "泰鼎 與 泰達電 擴大投資", "欣興 泰國廠動工", "泰國央行維持利率", "台達電 泰國 EV 充電"]
+
+
+def make_store(tmp_path, count=20, now=None):
+    """count 則新聞，依序每則早一天發布，標題輪流使用 TITLES"""
+    now = now or time.time()
+    store = NewsStore(str(tmp_path / "news.db"), legacy_json=None)
+    store.upsert_many(
+        NewsItem(TITLES[i % len(TITLES)] + f" {i}", f"https://example.com/{i}", formatdate(now - i * 86400))
+        for i in reversed(range(count)))
+    return store
+
+
+def expected_counts(store):
+    """由 news 表重新標記，回傳 {台商: {日期: 篇數}}"""
+    counts = {}
+    with sqlite3.connect(store.path) as conn:
+        for title, published_ts, saved_at in conn.execute("SELECT title, published_ts, saved_at FROM news"):
+            for company in tag_companies(title):
+                day = mention_day(published_ts, saved_at)
+                counts.setdefault(company, {}).setdefault(day, 0)
+                counts[company][day] += 1
+    return counts
+
+
+def indexed_counts(store):
+    return {company: store.company_day_counts(company) for company in store.company_totals()}
+
+
+def test_counts_follow_ingest(tmp_path):
+    store = make_store(tmp_path)
+    assert indexed_counts(store) == expected_counts(store)
+    assert store.company_totals()["泰達電"] == 12
+
+
+def test_counts_follow_retention_by_items(tmp_path):
+    store = make_store(tmp_path)
+    assert store.apply_retention(max_items=7) == 13
+    assert indexed_counts(store) == expected_counts(store)
+    assert sum(store.company_totals().values()) == sum(len(tag_companies(TITLES[i % 5])) for i in range(7))
+
+
+def test_counts_follow_retention_by_age(tmp_path):
+    store = make_store(tmp_path)
+    store.apply_retention(max_age_days=4.5)
+    assert indexed_counts(store) == expected_counts(store)
+    assert all(len(days) <= 5 for days in indexed_counts(store).values())
+
+
+def test_retagged_on_title_update(tmp_path):
+    store = make_store(tmp_path, count=5)
+    store.upsert_many([NewsItem("泰國央行降息", "https://example.com/0", formatdate(time.time()))])
+    assert indexed_counts(store) == expected_counts(store)
+    assert [n["title"] for n in store.company_news("泰鼎")] == ["泰鼎 與 泰達電 擴大投資 1"]
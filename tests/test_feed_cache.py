@@ -0,0 +1,53 @@
+import sqlite3
+
+from bench.replay import ReplayTransport
+from thainews.feed_cache import FeedCache
+from thainews.fetcher import iter_fetch, use_transport
+
+URL = "https://news.google.com/rss/search?q=test+after:2025-01-01+before:2025-01-02"
+
+
+def stored_bytes(cache):
+    with sqlite3.connect(cache.path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM feed_cache").fetchone()[0]
+
+
+def test_total_bytes_tracks_writes(tmp_path):
+    cache = FeedCache(str(tmp_path / "cache.db"))
+    cache.put(URL, [{"title": "a"}])
+    cache.put(URL + "0", [{"title": "b" * 100}])
+    cache.put(URL, [{"title": "c" * 50}])
+    cache.revalidate(URL)
+    assert cache.total_bytes() == stored_bytes(cache) > 0
+    cache.clear()
+    assert cache.total_bytes() == 0
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = FeedCache(str(tmp_path / "cache.db"), max_bytes=500)
+    for i in range(10):
+        cache.put(f"{URL}{i}", [{"title": "x" * 80}])
+    assert cache.total_bytes() == stored_bytes(cache) <= 500
+    assert cache.get(f"{URL}9") is not None
+    assert cache.get(f"{URL}0") is None
+
+
+def test_existing_cache_file_seeds_total(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = FeedCache(path)
+    cache.put(URL, [{"title": "a"}])
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE feed_cache_stats")
+    assert FeedCache(path).total_bytes() == stored_bytes(cache)
+
+
+def test_fetch_reads_and_writes_cache(tmp_path):
+    cache = FeedCache(str(tmp_path / "cache.db"))
+    sources = [{"name": f"s{i}", "url": f"{URL}&n={i}"} for i in range(5)]
+    transport = ReplayTransport()
+    with use_transport(transport):
+        first = {index: entries for index, _, entries in iter_fetch(sources, cache=cache)}
+        second = {index: entries for index, _, entries in iter_fetch(sources, cache=cache)}
+    assert transport.requests == 5
+    assert first == second
+    assert all(first.values())
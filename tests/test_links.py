@@ -0,0 +1,49 @@
+import pytest
+
+from bench.stub_server import StubServer, article_target
+from thainews.fetcher import Response
+from thainews.links import LinkCache, LinkResolver, canonical_from_response
+from thainews.throttle import FetchScheduler
+
+LINK = "https://news.google.com/rss/articles/CBMiabc?oc=5"
+
+
+@pytest.mark.parametrize("location", [
+    "https://consent.google.com/ml?continue=https://news.google.com/rss/articles/CBMiabc",
+    "https://accounts.google.com/ServiceLogin",
+    "https://www.google.com/sorry/index?continue=x",
+    "https://www.google.co.th/url?q=x",
+])
+def test_google_redirect_is_not_a_publisher(location):
+    assert canonical_from_response(LINK, Response(302, {"Location": location}, b"")) is None
+
+
+def test_publisher_redirect_is_cleaned():
+    resp = Response(302, {"Location": "https://www.example.com/a?utm_source=x&id=1#top"}, b"")
+    assert canonical_from_response(LINK, resp) == "https://www.example.com/a?id=1"
+
+
+def make_resolver(path):
+    scheduler = FetchScheduler(rate=1000, burst=1000, min_rate=1000, max_rate=1000)
+    return LinkResolver(LinkCache(path), hosts={"127.0.0.1"}, scheduler=scheduler)
+
+
+def test_consent_redirect_cached_as_failure(tmp_path):
+    path = str(tmp_path / "links.db")
+    with StubServer(redirect_mode="consent") as server:
+        links = [f"{server.base_url}/rss/articles/story{i}?oc=5" for i in range(4)]
+        resolved, report = make_resolver(path).resolve(links)
+        assert resolved == {}
+        assert report["failed"] == 4
+        before = server.request_count
+        _, report = make_resolver(path).resolve(links)
+        assert report["failed"] == 4
+        assert server.request_count == before
+    assert LinkCache(path).lookup(links) == dict.fromkeys(links)
+
+
+def test_stub_redirect_resolves(tmp_path):
+    with StubServer() as server:
+        link = f"{server.base_url}/rss/articles/story1_2?oc=5"
+        resolved, _ = make_resolver(str(tmp_path / "links.db")).resolve([link])
+    assert resolved == {link: article_target("story1")}
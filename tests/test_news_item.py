@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+from thainews.news_item import UNKNOWN_DAY, NewsItem, link_hash, parse_published
+
+DATE = "Mon, 06 Jan 2025 08:00:00 GMT"
+
+
+def test_parse_published():
+    ts, day = parse_published(DATE)
+    assert ts == datetime(2025, 1, 6, 8, tzinfo=timezone.utc).timestamp()
+    assert day == "2025-01-06"
+    assert parse_published("Tue, 07 Jan 2025 01:30:00 +0700") == (
+        datetime(2025, 1, 6, 18, 30, tzinfo=timezone.utc).timestamp(), "2025-01-07")
+
+
+def test_unparsable_dates():
+    assert parse_published("") == (None, UNKNOWN_DAY)
+    assert parse_published(None) == (None, UNKNOWN_DAY)
+    assert parse_published("not a date") == (None, UNKNOWN_DAY)
+    item = NewsItem("標題", "https://example.com/a", "yesterday")
+    assert (item.published_ts, item.day) == (None, UNKNOWN_DAY)
+
+
+def test_fields_computed_once_at_ingest():
+    item = NewsItem.from_entry(
+        {"title": "Thailand PCB 擴產", "link": "https://example.com/a", "published": DATE, "source": "Stub"}, "總經")
+    assert item.title_lower == "thailand pcb 擴產"
+    assert item.day == "2025-01-06"
+    assert item.category == "總經"
+    assert item.link_hash == link_hash("https://example.com/a")
+
+
+def test_dict_round_trip_keeps_parsed_date():
+    item = NewsItem("標題", "https://example.com/a", DATE, "Stub", "總經")
+    copy = NewsItem.from_dict(item.to_dict())
+    assert (copy.published_ts, copy.day, copy.title, copy.category) == (item.published_ts, item.day, "標題", "總經")
+    # 舊版 dict 沒有 published_ts：由 date 字串解析
+    legacy = NewsItem.from_dict({"title": "標題", "link": "https://example.com/a", "date": DATE})
+    assert (legacy.published_ts, legacy.day) == (item.published_ts, item.day)
+
+
+def test_with_category_resets_cluster_fields():
+    item = NewsItem("標題", "https://example.com/a", DATE)
+    item.cluster_size, item.cluster_sources, item.duplicate_of = 3, ["A", "B"], 1
+    moved = item.with_category("🏭 台商 (中)")
+    assert moved.category == "🏭 台商 (中)" and item.category == ""
+    assert (moved.cluster_size, moved.cluster_sources, moved.duplicate_of) == (1, None, None)
+    assert moved.published_ts == item.published_ts
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import bench.stub_server
+from bench.replay import ReplayTransport
+from thainews.fetcher import use_transport
+from thainews.news_store import NewsStore
+from thainews.pipeline import build_query_templates, days_label, run_scan
+
+NOW = datetime.now(timezone.utc)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW if tz else NOW.astimezone().replace(tzinfo=None)
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """合成 feed 的重播傳輸層；固定模擬伺服器的「現在」，今天區間的發布時間在兩次搜尋間不變"""
+    monkeypatch.setattr(bench.stub_server, "datetime", FrozenDatetime)
+    transport = ReplayTransport(items_per_day=8)
+    with use_transport(transport):
+        yield transport
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+def test_rescan_matches_full_scan(tmp_path, transport, adaptive):
+    days = 7
+    store = NewsStore(str(tmp_path / "news.db"), legacy_json=None)
+    templates = len(build_query_templates("macro"))
+    # 先以逐日拆分存入歷史庫：之後的增量與完整搜尋都請求相同的逐日網址，合成內容一致
+    run_scan(days_label(days), days, "macro", store=store, adaptive=False)
+
+    before = transport.requests
+    stats = {}
+    rescan = run_scan(days_label(days), days, "macro", store=store, adaptive=adaptive, stats=stats)
+    assert stats["reused_days"] == days - 1
+    assert transport.requests - before == templates  # 只重抓今天
+
+    full = run_scan(days_label(days), days, "macro", adaptive=False)
+    assert rescan == full
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from bench.replay import ReplayTransport
+from thainews.fetcher import use_transport
+from thainews.planner import AdaptivePlanner, DailyPlanner
+
+TODAY = date(2025, 1, 10)
+TEMPLATES = [
+    {"name": "測試 (中)", "query": "測試", "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+    {"name": "Test (EN)", "query": "test", "hl": "en-US", "gl": "US", "ceid": "US:en"},
+]
+
+
+def run_planner(planner, items_per_day):
+    """以合成 feed（每天 items_per_day 則）跑完規劃，回傳 [(source, entries)]"""
+    with use_transport(ReplayTransport(items_per_day=items_per_day)):
+        return list(planner.run())
+
+
+def covered_days(results):
+    """{(模板, 日期): 涵蓋次數}"""
+    counts = {}
+    for source, _ in results:
+        start, end = source["window"]
+        for offset in range((end - start).days):
+            key = (source["category"], start + timedelta(days=offset))
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def test_quiet_query_uses_wide_windows():
+    planner = AdaptivePlanner(TEMPLATES, 7, today=TODAY)
+    results = run_planner(planner, items_per_day=3)
+    # 過去六天一個區間、今天一個區間
+    assert planner.requests == 4
+    assert planner.saved_requests == 7 * 2 - 4
+    assert planner.splits == 0
+    assert set(covered_days(results).values()) == {1}
+    assert len(covered_days(results)) == 7 * 2
+
+
+def test_saturated_windows_split_until_below_cap():
+    planner = AdaptivePlanner(TEMPLATES, 7, today=TODAY)
+    results = run_planner(planner, items_per_day=40)
+    days = covered_days(results)
+    assert len(days) == 7 * 2 and set(days.values()) == {1}
+    assert planner.splits > 0
+    for source, entries in results:
+        start, end = source["window"]
+        assert (end - start).days == 1 or len(entries) < planner.threshold
+
+
+def test_skip_days_split_past_range():
+    skip = {TODAY - timedelta(days=3)}
+    planner = AdaptivePlanner(TEMPLATES[:1], 7, today=TODAY, skip_days=skip)
+    windows = [source["window"] for source in planner.initial_sources()]
+    assert windows == [
+        (TODAY, TODAY + timedelta(days=1)),
+        (TODAY - timedelta(days=2), TODAY),
+        (TODAY - timedelta(days=6), TODAY - timedelta(days=3)),
+    ]
+
+
+def test_daily_planner_one_request_per_day():
+    planner = DailyPlanner(TEMPLATES, 3, today=TODAY)
+    results = run_planner(planner, items_per_day=3)
+    assert planner.requests == planner.fixed_plan_requests == 6
+    assert all((end - start).days == 1 for start, end in (source["window"] for source, _ in results))
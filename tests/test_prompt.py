@@ -0,0 +1,92 @@
+import re
+from collections import OrderedDict
+
+from bench.stub_server import make_title
+from thainews.dedupe import cluster_news
+from thainews.news_item import NewsItem
+from thainews.pipeline import DAILY_PROMPT_LIMIT, build_output
+from thainews.prompt import estimate_tokens, render_news
+
+def legacy_body(category_entries, limit_per_day=DAILY_PROMPT_LIMIT):
+    """導入 token 預算前 build_output 的組法（每天每類別最多 limit_per_day 篇），作為比對基準"""
+    output_text = ""
+    for category, entries in category_entries.items():
+        output_text += f"\n## 【{category}】\n"
+        if not entries:
+            output_text += "(無相關新聞)\n"
+            continue
+        representatives = [item for item in entries if item.duplicate_of is None]
+        if not representatives:
+            output_text += "(新聞皆與前述類別重複)\n"
+            continue
+        daily_count = {}
+        current_day = None
+        for item in representatives:
+            day = item.day
+            daily_count.setdefault(day, 0)
+            if daily_count[day] >= limit_per_day:
+                continue
+            daily_count[day] += 1
+            if day != current_day:
+                current_day = day
+                output_text += f"\n### {day}\n"
+            source_label = item.source
+            if len(item.cluster_sources) > 1:
+                source_label += f" 等 {len(item.cluster_sources)} 家"
+            output_text += f"- [{source_label}] {item.title}\n"
+    return output_text
+
+
+def make_item(i, day, category, title=None, source=None, hour=None):
+    title = title or make_title(f"story{i}", i)
+    hour = i % 24 if hour is None else hour
+    return NewsItem(title, f"https://example.com/{category}/{i}", f"{day} Jan 2025 {hour:02d}:00:00 GMT",
+                    source or f"Source {i % 4}", category)
+
+
+def make_entries():
+    """三個類別：單日超過上限且有轉載的類別、空類別、全部與前述類別重複的類別"""
+    busy = [make_item(i, 6 - i % 3, "總經 (中)") for i in range(40)]
+    busy += [make_item(100 + i, 6, "總經 (中)", f"{busy[0].title} 轉載{i}", f"Reprint {i}", 23) for i in range(3)]
+    repeated = [make_item(200 + i, 6, "產業 (中)", f"{item.title} 轉載", f"Other {i}") for i, item in enumerate(busy[:3])]
+    entries = OrderedDict([("總經 (中)", busy), ("台商 (中)", []), ("產業 (中)", repeated)])
+    flat = []
+    for items in entries.values():
+        items.sort(key=lambda item: item.published_ts or 0, reverse=True)
+        flat.extend(items)
+    cluster_news(flat)
+    return entries
+
+
+def test_no_budget_matches_legacy_output():
+    entries = make_entries()
+    text, report = render_news(entries, None, None, DAILY_PROMPT_LIMIT)
+    assert text == legacy_body(entries)
+    assert report["dropped"] == 40 - 3 * DAILY_PROMPT_LIMIT
+    assert re.search(r"- \[Reprint \d 等 \d 家\] ", text)
+    assert "(無相關新聞)" in text and "(新聞皆與前述類別重複)" in text
+
+
+def test_build_output_without_budget_is_byte_identical():
+    entries = make_entries()
+    for items in entries.values():
+        for item in items:
+            item.cluster_size, item.cluster_sources, item.duplicate_of = 1, None, None
+    sources = [({"name": category}, list(items)) for category, items in entries.items()]
+    output_text, _ = build_output("1週", 7, "macro", None, list(entries), sources, token_budget=None)
+    header, _, rest = output_text.partition("\n## 【")
+    body, _, footer = ("\n## 【" + rest).rpartition("\n========= 資料結束 =========")
+    assert footer == ""
+    assert body == legacy_body(make_entries())
+
+
+def test_budget_caps_estimated_tokens():
+    entries = make_entries()
+    full, _ = render_news(entries, None)
+    budget = estimate_tokens(full) // 2
+    text, report = render_news(entries, budget, reserved_tokens=100)
+    assert report["tokens"] == 100 + estimate_tokens(text) <= budget
+    assert report["dropped"] > 0
+    assert report["included"] + report["dropped"] == sum(
+        1 for items in entries.values() for item in items if item.duplicate_of is None)
+    assert "因篇幅省略" in text
@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+import pytest
+
+from bench.replay import ReplayTransport
+from thainews.planner import window_source
+from thainews.rss_parser import parse_google_news
+
+TEMPLATE = {"name": "🇹🇭 泰國整體 (中)", "query": "泰國", "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"}
+
+
+@pytest.mark.parametrize("items_per_day, days", [(3, 1), (5, 4), (15, 3)])
+def test_synthesized_window_scales_with_days(items_per_day, days):
+    transport = ReplayTransport(items_per_day=items_per_day)
+    end = date.today() - timedelta(days=1)
+    source = window_source(TEMPLATE, 0, end - timedelta(days=days), end)
+    assert len(parse_google_news(transport._synthesize(source["url"]))) == items_per_day * days
+
+
+def test_synthesized_window_capped():
+    transport = ReplayTransport(items_per_day=50)
+    end = date.today() - timedelta(days=1)
+    source = window_source(TEMPLATE, 0, end - timedelta(days=5), end)
+    assert len(parse_google_news(transport._synthesize(source["url"]))) == 100
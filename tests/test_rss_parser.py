@@ -0,0 +1,58 @@
+import os
+
+import feedparser
+import pytest
+
+from bench.stub_server import make_rss
+from thainews.fetcher import entry_to_dict, parse_feed
+from thainews.rss_parser import DEFAULT_SOURCE, GoogleNewsParser, UnsupportedFeed, parse_google_news
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "google_news.xml")
+
+
+def load_fixture():
+    with open(FIXTURE, "rb") as f:
+        return f.read()
+
+
+def feedparser_entries(body):
+    return [entry_to_dict(entry) for entry in feedparser.parse(body).entries]
+
+
+def test_fixture_matches_feedparser():
+    body = load_fixture()
+    entries = parse_google_news(body)
+    assert entries == feedparser_entries(body)
+    assert len(entries) == 4
+    assert entries[1]["title"].startswith('Delta Electronics (Thailand) & BOI: "EV <charger>"')
+    assert entries[3]["source"] == DEFAULT_SOURCE
+
+
+def test_synthesized_feed_matches_feedparser():
+    body = make_rss("/rss/search?q=%22%E6%B3%B0%E9%81%94%E9%9B%BB%22", 30)
+    assert parse_google_news(body) == feedparser_entries(body)
+
+
+def test_incremental_feed_matches_whole_document():
+    body = load_fixture()
+    parser = GoogleNewsParser()
+    for i in range(0, len(body), 97):
+        parser.feed(body[i:i + 97])
+    assert parser.close() == parse_google_news(body)
+
+
+@pytest.mark.parametrize("body", [
+    b'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><entry><title>x</title></entry></feed>',
+    b'<rss><channel><item><title>&nbsp;</title></item></channel></rss>',
+    b'<rss><channel><item><title>broken</item></channel></rss>',
+])
+def test_unexpected_documents_rejected(body):
+    with pytest.raises(UnsupportedFeed):
+        parse_google_news(body)
+
+
+def test_parse_feed_falls_back_to_feedparser():
+    body = (b'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><entry><title>Atom title</title>'
+            b'<link href="https://example.com/a"/><updated>2025-01-06T08:00:00Z</updated></entry></feed>')
+    assert parse_feed(body) == feedparser_entries(body)
+    assert parse_feed(body)[0]["title"] == "Atom title"
@@ -0,0 +1,51 @@
+import sqlite3
+
+from thainews.news_item import NewsItem
+from thainews.news_store import NewsStore
+from thainews.search_index import tokenize
+
+
+def make_store(tmp_path, titles):
+    store = NewsStore(str(tmp_path / "news.db"), legacy_json=None)
+    store.upsert_many(NewsItem(title, f"https://example.com/{i}", source="Stub") for i, title in enumerate(titles))
+    return store
+
+
+def titles_of(store, query):
+    news, total = store.search(query)
+    assert total == len(news)
+    return sorted(n["title"] for n in news)
+
+
+def test_single_character_query(tmp_path):
+    store = make_store(tmp_path, ["泰國央行升息", "台積電擴產", "ธนาคารแห่งประเทศไทย"])
+    assert titles_of(store, "泰") == ["泰國央行升息"]
+    assert titles_of(store, "電") == ["台積電擴產"]
+    assert titles_of(store, "ธ") == ["ธนาคารแห่งประเทศไทย"]
+
+
+def test_multi_character_query_still_uses_bigrams(tmp_path):
+    store = make_store(tmp_path, ["泰國央行升息", "國泰金控", "央行"])
+    assert titles_of(store, "泰國") == ["泰國央行升息"]
+    assert tokenize("泰國央行") == ["泰國", "國央", "央行"]
+    assert sorted(tokenize("泰國", unigrams=True)) == ["國", "泰", "泰國"]
+
+
+def test_doc_count_follows_upsert_and_retention(tmp_path):
+    store = make_store(tmp_path, [f"泰國新聞 {i}" for i in range(10)])
+    assert store.upsert_many([NewsItem("泰國新聞 0 更新", "https://example.com/0", source="Stub"),
+                              NewsItem("泰國新聞 10", "https://example.com/10", source="Stub")]) == 1
+    assert store.apply_retention(max_items=4) == 7
+    with sqlite3.connect(store.path) as conn:
+        assert store.index.doc_count(conn) == conn.execute("SELECT COUNT(*) FROM news").fetchone()[0] == 4
+    assert NewsStore(store.path, legacy_json=None).search("泰國")[1] == 4
+
+
+def test_candidates_capped_after_filters(tmp_path):
+    store = make_store(tmp_path, [f"泰國央行 {i}" for i in range(20)] + [f"泰國出口 {i}" for i in range(20)])
+    with sqlite3.connect(store.path) as conn:
+        rows, total = store.index.search(conn, "泰國", ("title",), max_candidates=5)
+        assert total == 5
+        assert sorted(row[0] for row in rows) == [f"泰國出口 {i}" for i in range(15, 20)]
+        rows, total = store.index.search(conn, "泰國", ("title",), "n.title LIKE ?", ["%央行%"], max_candidates=5)
+        assert sorted(row[0] for row in rows) == [f"泰國央行 {i}" for i in range(15, 20)]
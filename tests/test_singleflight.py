@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from thainews.singleflight import SingleFlight
+
+TIMEOUT = 5
+
+
+class Rerun(BaseException):
+    """模擬 Streamlit 的 RerunException（BaseException 子類別）"""
+
+
+def start_leader(flight, key, fn):
+    """在背景執行緒以 fn 成為執行者；回傳 (執行緒, 例外列表)，fn 開始執行後才返回"""
+    started = threading.Event()
+    errors = []
+
+    def run():
+        started.set()
+        return fn()
+
+    def leader():
+        try:
+            flight.run(key, run)
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    assert started.wait(TIMEOUT)
+    return thread, errors
+
+
+def start_waiters(flight, key, fn, count):
+    """啟動 count 個等待者；回傳 (執行緒, 結果, 例外)，全部加入進行中的執行後才返回"""
+    results, errors = [], []
+    joined = [threading.Event() for _ in range(count)]
+
+    def waiter(event):
+        try:
+            results.append(flight.run(key, fn, on_wait=event.set))
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=waiter, args=(event,)) for event in joined]
+    for thread in threads:
+        thread.start()
+    assert all(event.wait(TIMEOUT) for event in joined)
+    return threads, results, errors
+
+
+def join_all(threads):
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive()
+
+
+def test_waiters_take_over_when_leader_interrupted():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def interrupted():
+        release.wait(TIMEOUT)
+        raise Rerun("leader session rerun data")
+
+    def scan():
+        calls.append(1)
+        return "result"
+
+    leader_thread, leader_errors = start_leader(flight, "k", interrupted)
+    threads, results, errors = start_waiters(flight, "k", scan, 3)
+    release.set()
+    join_all([leader_thread, *threads])
+
+    assert isinstance(leader_errors[0], Rerun)
+    assert errors == []
+    assert [result for result, _ in results] == ["result"] * 3
+    assert len(calls) == 1  # 只有一個等待者接手執行，其餘共用其結果
+
+
+def test_exception_shared_with_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(TIMEOUT)
+        raise ValueError("boom")
+
+    leader_thread, leader_errors = start_leader(flight, "k", failing)
+    threads, results, errors = start_waiters(flight, "k", lambda: "unused", 2)
+    release.set()
+    join_all([leader_thread, *threads])
+    assert [type(e) for e in leader_errors] == [ValueError]
+    assert results == []
+    assert [type(e) for e in errors] == [ValueError, ValueError]
+
+
+def test_result_shared_and_cached():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def scan():
+        release.wait(TIMEOUT)
+        return "result"
+
+    leader_thread, _ = start_leader(flight, "k", scan)
+    threads, results, errors = start_waiters(flight, "k", lambda: pytest.fail("不應執行"), 2)
+    release.set()
+    join_all([leader_thread, *threads])
+    assert errors == []
+    assert results == [("result", True)] * 2
+    assert flight.run("k", lambda: pytest.fail("不應執行")) == ("result", True)
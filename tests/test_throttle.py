@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from thainews.fetcher import Response
+from thainews.throttle import CircuitOpen, FetchScheduler
+
+URL = "https://news.example.com/rss"
+
+
+class FakeFetcher:
+    """依序回傳 statuses 中的狀態碼；項目為例外類別時改為拋出"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+
+    async def get(self, url, headers=None, **kwargs):
+        status = self.statuses.pop(0)
+        if isinstance(status, type):
+            raise status()
+        return Response(status, {}, b"")
+
+
+def half_open_scheduler():
+    scheduler = FetchScheduler(max_attempts=1, rate=1000, burst=1000, min_rate=1000, max_rate=1000)
+    breaker = scheduler.host(URL).breaker
+    breaker.cooldown = 0.0
+    breaker._open()
+    return scheduler, breaker
+
+
+def test_throttled_probe_reopens_then_recovers():
+    scheduler, breaker = half_open_scheduler()
+    resp, _ = asyncio.run(scheduler.get(FakeFetcher(429), URL))
+    assert resp.status == 429
+    assert breaker.state == "open"
+    # 冷卻結束後可再次試探，成功即恢復
+    resp, _ = asyncio.run(scheduler.get(FakeFetcher(200), URL))
+    assert resp.status == 200
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize("error", [asyncio.CancelledError, ConnectionError])
+def test_probe_released_on_exception(error):
+    scheduler, breaker = half_open_scheduler()
+    with pytest.raises(error):
+        asyncio.run(scheduler.get(FakeFetcher(error), URL))
+    resp, _ = asyncio.run(scheduler.get(FakeFetcher(200), URL))
+    assert resp.status == 200
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_rejects():
+    scheduler, breaker = half_open_scheduler()
+    breaker.cooldown = 60.0
+    with pytest.raises(CircuitOpen):
+        asyncio.run(scheduler.get(FakeFetcher(200), URL))
+
+
+def test_shared_bucket_splits_rate():
+    full = FetchScheduler(rate=8, burst=8, min_rate=1, max_rate=40).host(URL).bucket
+    shared = FetchScheduler(rate=8, burst=8, min_rate=1, max_rate=40, share=4).host(URL).bucket
+    assert (shared.rate, shared.burst, shared.min_rate, shared.max_rate) == (2, 2, 0.25, 10)
+    # 四個程序各自的 burst 合計與單一程序相同
+    assert sum(not shared.try_acquire() for _ in range(8)) * 4 == sum(not full.try_acquire() for _ in range(8))
+    for _ in range(100):
+        shared.on_success()
+    assert shared.rate == 10
+
+
+def test_worker_scheduler_shared_across_processes(monkeypatch, tmp_path):
+    from thainews import work_queue
+
+    seen = {}
+
+    def fake_run_worker(*args, **kwargs):
+        seen["share"] = kwargs["scheduler"].host(URL).bucket.max_rate
+        seen["resolver"] = kwargs["resolver"].scheduler is kwargs["scheduler"]
+        return {"done": 0, "failed": 0}
+
+    monkeypatch.setattr(work_queue, "run_worker", fake_run_worker)
+    monkeypatch.chdir(tmp_path)
+    work_queue.main(["--queue", "queue.db", "worker", "--rate-share", "5", "--no-cache", "--store", "news.db"])
+    assert seen == {"share": 50.0 / 5, "resolver": True}
@@ -0,0 +1 @@
+"""ThaiNews.Ai 爬蟲核心模組（與 Streamlit 介面分離的共用元件）。"""
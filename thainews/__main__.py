@@ -0,0 +1,3 @@
+from thainews.cli import main
+
+main()
@@ -0,0 +1,268 @@
+"""
+歷史庫的欄式匯出與趨勢分析（pyarrow / pandas，兩者皆隨 Streamlit 安裝）。
+
+- 匯出：由歷史庫分批讀出（每批 EXPORT_CHUNK_ROWS 筆）並逐批寫入 Parquet 或欄位型別固定的 CSV，
+  不需一次載入整個歷史庫；read_history 依相同的 schema 讀回。
+- 分析：每日篇數依類別、來源或 COMPANY_MAP 台商彙總，附移動平均與異常激增偵測。
+  台商比對以 pyarrow 的向量化正規式對整欄標題一次處理，規則與個別台商模式的相關性規則相同
+  （\\b 單詞邊界在 pyarrow 中只以 ASCII 判斷，泰交所代碼緊鄰中文字時可能多算）。
+
+用法:
+    python -m thainews.analytics export -o history.parquet
+    python -m thainews.analytics export -o history.csv --format csv
+    python -m thainews.analytics spikes --by company --window 7
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from thainews.config import COMPANY_MAP, LEGACY_JSON_PATH, NEWS_DB_PATH
+from thainews.relevance import THAI_CONTEXT_PATTERN
+
+EXPORT_CHUNK_ROWS = 50000
+# 匯出欄位與型別（CSV 讀回時也依此轉型）
+EXPORT_COLUMNS = [
+    ("id", "int64"), ("link", "string"), ("title", "string"), ("date", "string"),
+    ("published_ts", "float64"), ("source", "string"), ("category", "string"), ("saved_at", "float64"),
+]
+GROUP_BY = {"category": "類別", "company": "台商", "source": "來源"}
+ROLLING_WINDOW = 7      # 移動平均與激增基準的天數
+SPIKE_THRESHOLD = 3.0   # 超出基準幾個標準差視為激增
+SPIKE_MIN_COUNT = 3     # 當日至少幾篇才列為激增（避免 0→2 篇被放大）
+TOP_SOURCES = 15        # 依來源彙總時保留篇數最多的來源，其餘併入 OTHER
+OTHER = "其他"
+
+_REGEX_SPECIAL = set(r"\.^$|?*+()[]{}")
+
+
+def export_schema():
+    import pyarrow as pa
+    return pa.schema([(name, getattr(pa, dtype)()) for name, dtype in EXPORT_COLUMNS])
+
+
+def iter_batches(store, chunk_size=EXPORT_CHUNK_ROWS):
+    """由歷史庫分批讀出，每批為一個 pyarrow RecordBatch（依存入順序）"""
+    import pyarrow as pa
+    schema = export_schema()
+    for rows in store.iter_rows([name for name, _ in EXPORT_COLUMNS], chunk_size):
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, field.type) for values, field in zip(columns, schema)], schema=schema)
+
+
+def export_history(store, out, fmt="parquet", chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    將歷史庫逐批寫入 out（路徑或二進位檔案物件），回傳匯出筆數。
+    :param fmt: "parquet"（zstd 壓縮）或 "csv"（含標題列，以 read_history 依固定型別讀回）
+    """
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(out, export_schema(), compression="zstd")
+    elif fmt == "csv":
+        import pyarrow.csv as pa_csv
+        writer = pa_csv.CSVWriter(out, export_schema())
+    else:
+        raise ValueError(f"不支援的匯出格式：{fmt}")
+    total = 0
+    try:
+        for batch in iter_batches(store, chunk_size):
+            writer.write_batch(batch)
+            total += batch.num_rows
+    finally:
+        writer.close()
+    return total
+
+
+def read_history(path):
+    """讀回 export_history 的檔案（依副檔名判斷格式），回傳 pyarrow Table"""
+    schema = export_schema()
+    if str(path).endswith(".csv"):
+        import pyarrow.csv as pa_csv
+        return pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(
+            column_types=schema, strings_can_be_null=False, quoted_strings_can_be_null=False))
+    import pyarrow.parquet as pq
+    return pq.read_table(path, schema=schema)
+
+
+def history_table(store, chunk_size=EXPORT_CHUNK_ROWS):
+    """整個歷史庫讀成 pyarrow Table"""
+    import pyarrow as pa
+    return pa.Table.from_batches(list(iter_batches(store, chunk_size)), schema=export_schema())
+
+
+def load_frame(table, utc_offset=None):
+    """
+    將歷史資料（pyarrow Table）轉為分析用的 DataFrame：
+    day（本地日期序號，1970-01-01 起算）、category、source（categorical）與 title_lower（Arrow 字串）。
+    發布時間缺少時以存入時間歸日。
+    """
+    import pandas as pd
+    import pyarrow.compute as pc
+
+    if utc_offset is None:
+        utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+    ts = pc.coalesce(table.column("published_ts"), table.column("saved_at")).to_numpy(zero_copy_only=False)
+    return pd.DataFrame({
+        "day": ((ts + utc_offset) // 86400).astype(np.int64),
+        "category": table.column("category").dictionary_encode().to_pandas(),
+        "source": table.column("source").dictionary_encode().to_pandas(),
+        "title_lower": pd.Series(pc.utf8_lower(table.column("title")).combine_chunks(), dtype="string[pyarrow]"),
+    })
+
+
+def _escape(text):
+    """pyarrow（RE2）可接受的跳脫：只處理正規式特殊字元"""
+    return "".join("\\" + ch if ch in _REGEX_SPECIAL else ch for ch in text)
+
+
+def _company_patterns(companies):
+    """{台商: (名稱的正規式, 泰交所代碼的正規式或 None)}"""
+    patterns = {}
+    for name in companies:
+        info = COMPANY_MAP.get(name, {})
+        names = {n.lower() for n in (info.get("thai_cn"), info.get("tw_cn"), info.get("en"), name) if n}
+        ticker = r"\b" + _escape(info["set"].lower()) + r"\b" if info.get("set") else None
+        patterns[name] = ("|".join(_escape(n) for n in sorted(names)), ticker)
+    return patterns
+
+
+def company_masks(frame, companies=None):
+    """
+    各台商的命中遮罩 {台商: bool ndarray}：名稱子字串命中，或泰交所代碼命中且含泰國脈絡詞。
+    先以所有台商合併的正規式掃過整欄找出候選列，各台商只在候選列上比對（多數新聞不提到任何台商）。
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    patterns = _company_patterns(companies or COMPANY_MAP)
+    titles = pa.array(frame["title_lower"].array)  # Arrow 字串欄，不複製資料
+    combined = "|".join(p for pair in patterns.values() for p in pair if p)
+    candidates = np.flatnonzero(pc.match_substring_regex(titles, combined).to_numpy(zero_copy_only=False))
+    subset = titles.take(pa.array(candidates))
+    context = None
+    masks = {}
+    for name, (names_re, ticker_re) in patterns.items():
+        hit = pc.match_substring_regex(subset, names_re)
+        if ticker_re:
+            if context is None:
+                context = pc.match_substring_regex(subset, THAI_CONTEXT_PATTERN)
+            hit = pc.or_(hit, pc.and_(pc.match_substring_regex(subset, ticker_re), context))
+        mask = np.zeros(len(titles), dtype=bool)
+        mask[candidates] = hit.to_numpy(zero_copy_only=False)
+        masks[name] = mask
+    return masks
+
+
+def _day_index(frame, days=None):
+    """連續的日期序號範圍（最近 days 天，或整個歷史）"""
+    last = int(frame["day"].max())
+    first = last - days + 1 if days else int(frame["day"].min())
+    return np.arange(first, last + 1)
+
+
+def _as_dates(counts):
+    import pandas as pd
+    counts.index = pd.to_datetime(counts.index, unit="D")
+    counts.index.name = "day"
+    return counts
+
+
+def daily_counts(frame, by="category", days=None, companies=None, top=TOP_SOURCES):
+    """
+    每日篇數：index 為日期（含 0 篇的日期），欄位為類別／台商／來源。
+    :param by: "category"、"company" 或 "source"（只保留篇數最多的 top 個來源，其餘併入 OTHER）
+    :param days: 只統計最近幾天（以歷史中最新的日期為準）
+    """
+    import pandas as pd
+
+    if frame.empty:
+        return pd.DataFrame()
+    day_index = _day_index(frame, days)
+    in_range = (frame["day"] >= day_index[0]).to_numpy()
+    offsets = frame["day"].to_numpy() - day_index[0]
+    if by == "company":
+        masks = company_masks(frame, companies)
+        counts = pd.DataFrame(
+            {name: np.bincount(offsets[mask & in_range], minlength=len(day_index)) for name, mask in masks.items()},
+            index=day_index,
+        )
+        return _as_dates(counts)
+    counts = (frame.loc[in_range].groupby(["day", by], observed=True).size()
+              .unstack(fill_value=0).reindex(day_index, fill_value=0))
+    counts = counts[counts.sum().sort_values(ascending=False).index]
+    if by == "source" and top and counts.shape[1] > top:
+        rest = counts.iloc[:, top:].sum(axis=1)
+        counts = counts.iloc[:, :top].copy()
+        counts[OTHER] = rest
+    counts.columns = counts.columns.astype(str)
+    counts.columns.name = None
+    return _as_dates(counts)
+
+
+def rolling_average(counts, window=ROLLING_WINDOW):
+    """移動平均（前幾天不足 window 天時以現有天數平均）"""
+    return counts.rolling(window, min_periods=1).mean()
+
+
+def detect_spikes(counts, window=ROLLING_WINDOW, threshold=SPIKE_THRESHOLD, min_count=SPIKE_MIN_COUNT):
+    """
+    異常激增：當日篇數超出前 window 天平均 threshold 個標準差且至少 min_count 篇。
+    標準差至少取 √平均 與 1（篇數少時波動本來就大，避免偶發的幾篇被判為激增）。
+    回傳 DataFrame(day, group, count, baseline, z)，依 z 由高到低排序。
+    """
+    import pandas as pd
+
+    if counts.empty:
+        return pd.DataFrame(columns=["day", "group", "count", "baseline", "z"])
+    history = counts.shift(1).rolling(window, min_periods=window)
+    baseline = history.mean()
+    spread = np.maximum(history.std(), np.sqrt(baseline)).clip(lower=1.0)
+    z = (counts - baseline) / spread
+    flagged = ((z >= threshold) & (counts >= min_count)).stack()
+    keys = flagged[flagged].index
+    spikes = pd.DataFrame({
+        "count": counts.stack()[keys].astype(int), "baseline": baseline.stack()[keys], "z": z.stack()[keys],
+    })
+    spikes.index.names = ["day", "group"]
+    return spikes.reset_index().sort_values("z", ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m thainews.analytics", description="歷史庫匯出與趨勢分析")
+    parser.add_argument("--store", default=NEWS_DB_PATH, help="歷史庫路徑")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="匯出歷史庫")
+    export.add_argument("-o", "--output", required=True, help="輸出檔案")
+    export.add_argument("--format", choices=["parquet", "csv"], help="輸出格式（預設依副檔名，否則 parquet）")
+    export.add_argument("--chunk", type=int, default=EXPORT_CHUNK_ROWS, help="每批讀出與寫入的筆數")
+
+    spikes = commands.add_parser("spikes", help="列出每日篇數的異常激增")
+    spikes.add_argument("--by", choices=list(GROUP_BY), default="category", help="彙總方式")
+    spikes.add_argument("--days", type=int, help="只分析最近幾天")
+    spikes.add_argument("--window", type=int, default=ROLLING_WINDOW, help="基準天數")
+    spikes.add_argument("--threshold", type=float, default=SPIKE_THRESHOLD, help="超出基準的標準差倍數")
+    spikes.add_argument("--input", help="改讀 export 匯出的檔案（Parquet 或 CSV）")
+    args = parser.parse_args(argv)
+
+    from thainews.news_store import NewsStore
+
+    start = time.perf_counter()
+    if args.command == "export":
+        fmt = args.format or ("csv" if args.output.endswith(".csv") else "parquet")
+        total = export_history(NewsStore(args.store, legacy_json=LEGACY_JSON_PATH), args.output, fmt, args.chunk)
+        print(f"已匯出 {total} 則至 {args.output} ({time.perf_counter() - start:.1f}s)")
+        return
+    table = read_history(args.input) if args.input else history_table(NewsStore(args.store, legacy_json=LEGACY_JSON_PATH))
+    counts = daily_counts(load_frame(table), args.by, args.days)
+    found = detect_spikes(counts, args.window, args.threshold)
+    print(f"{table.num_rows} 則、{len(counts)} 天、{counts.shape[1]} 個{GROUP_BY[args.by]} "
+          f"({time.perf_counter() - start:.2f}s)")
+    for row in found.itertuples():
+        print(f"{row.day:%Y-%m-%d}  {row.group}  {row.count} 篇（基準 {row.baseline:.1f}，z={row.z:.1f}）")
+
+
+if __name__ == "__main__":
+    main()
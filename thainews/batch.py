@@ -0,0 +1,83 @@
+"""
+多台商批次查詢。
+
+逐一掃描每家台商時每家需要 2 個查詢模板；批次模式將數家台商的名稱變體合併成
+共用的 OR 查詢（受網址長度、查詢詞數與單一 feed 回傳上限限制），
+回傳的新聞再以與個別台商模式相同的相關性規則分派給提到的台商。
+"""
+from urllib.parse import quote
+
+from thainews.config import COMPANY_MAP
+from thainews.relevance import get_matcher
+
+MAX_QUERY_CHARS = 1500     # 查詢字串編碼後的長度上限（Google 網址總長約 2000 字元）
+MAX_QUERY_TERMS = 24       # 單一查詢的 OR 詞數上限
+BATCH_MAX_COMPANIES = 6    # 每批台商數上限，避免共用 feed 過快達到回傳上限
+
+LANGS = [
+    {"lang": "中", "prefix": "泰國", "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+    {"lang": "EN", "prefix": "Thailand", "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
+]
+
+
+def company_terms(name):
+    """台商的查詢詞（已加引號並編碼空白）：泰國當地名、母公司名、英文名、泰交所代碼"""
+    info = COMPANY_MAP.get(name, {})
+    names = [info.get("thai_cn", name), info.get("tw_cn", name), info.get("en", name)]
+    if info.get("set"):
+        names.append(info["set"])
+    return [f"%22{n.replace(' ', '+')}%22" for n in dict.fromkeys(names)]
+
+
+def company_category(name, lang):
+    """個別台商模式的類別名稱（批次結果分派後沿用，兩種模式的輸出一致）"""
+    return f"🏭 {name} ({lang})"
+
+
+def _query(prefix, terms):
+    return f"{prefix}+" + "+OR+".join(terms)
+
+
+def _encoded_len(query):
+    return len(quote(query, safe="+%:"))
+
+
+def pack_companies(names, max_chars=MAX_QUERY_CHARS, max_terms=MAX_QUERY_TERMS,
+                   max_companies=BATCH_MAX_COMPANIES):
+    """依序將台商裝入批次，每批的查詢長度、詞數與台商數皆不超過上限"""
+    longest_prefix = max((lang["prefix"] for lang in LANGS), key=_encoded_len)
+    batches = []
+    current, terms = [], []
+    for name in names:
+        extra = company_terms(name)
+        candidate = terms + extra
+        if current and (len(current) >= max_companies or len(candidate) > max_terms
+                        or _encoded_len(_query(longest_prefix, candidate)) > max_chars):
+            batches.append(current)
+            current, candidate = [], extra
+        current.append(name)
+        terms = candidate
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_templates(names=None):
+    """產生批次查詢模板；每個模板帶有 companies（本批台商）與 lang"""
+    names = list(names or COMPANY_MAP)
+    templates = []
+    for i, batch in enumerate(pack_companies(names), 1):
+        terms = [t for name in batch for t in company_terms(name)]
+        for lang in LANGS:
+            templates.append({
+                "name": f"🏭 台商批次 {i} ({lang['lang']})",
+                "query": _query(lang["prefix"], terms),
+                "hl": lang["hl"], "gl": lang["gl"], "ceid": lang["ceid"],
+                "companies": batch, "lang": lang["lang"],
+            })
+    return templates
+
+
+def match_companies(title_lower, companies):
+    """回傳標題（已轉小寫）提到的台商（規則與個別台商模式的 is_relevant 相同）"""
+    return [name for name in companies if get_matcher("company", name).is_relevant_lower(title_lower)]
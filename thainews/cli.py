@@ -0,0 +1,135 @@
+"""
+命令列介面：不啟動 Streamlit，直接執行一次搜尋並輸出 prompt 或 JSON。
+
+用法:
+    python -m thainews --mode macro --days 7
+    python -m thainews --mode company --keyword 泰達電 --days 3 --format json
+    python -m thainews --mode custom --keyword "Siam AI" --format json -o result.json
+    python -m thainews --mode company_batch --days 1 --no-save
+    python -m thainews --mode macro --days 3 --resolve-links fetch
+
+進度訊息寫入 stderr，結果寫入 stdout（或 --output 指定的檔案），方便串接其他程式。
+爬蟲相關模組在參數解析後才載入，--help 與參數錯誤可立即回應。
+"""
+import argparse
+import json
+import sys
+
+from thainews.config import (
+    FEED_CACHE_PATH, LEGACY_JSON_PATH, LINK_CACHE_PATH, NEWS_DB_PATH, PROMPT_TOKEN_BUDGET, TOPIC_MAP,
+)
+
+BATCH_MODE = "company_batch"
+MODES = list(TOPIC_MAP.values()) + ["company", "custom", BATCH_MODE]
+
+
+def progress_printer(quiet=False, stream=sys.stderr):
+    """產生 (on_status, on_progress) 回呼：狀態文字附上最近一次的完成比例寫入 stream"""
+    state = {"fraction": 0.0}
+
+    def on_status(text):
+        if not quiet:
+            print(f"[{state['fraction']:4.0%}] {text}", file=stream, flush=True)
+
+    def on_progress(fraction):
+        state["fraction"] = fraction
+
+    return on_status, on_progress
+
+
+def scan(mode, keyword, days, cache=None, store=None, on_status=None, on_progress=None, metrics=None,
+         token_budget=PROMPT_TOKEN_BUDGET, resolver=None):
+    """
+    執行一次搜尋，回傳可直接輸出為 JSON 的 dict。
+    company_batch 模式的結果依台商分組於 companies 欄位，prompt 為各台商 prompt 串接。
+    resolver 為 thainews.links.LinkResolver，將轉址連結還原為原始網址。
+    """
+    from thainews.pipeline import days_label, run_company_batch, run_scan
+
+    stats = {}
+    label = days_label(days)
+    result = {"mode": mode, "keyword": keyword, "days": days}
+    if mode == BATCH_MODE:
+        results = run_company_batch(label, days, cache=cache, store=store, on_status=on_status,
+                                    on_progress=on_progress, stats=stats, metrics=metrics,
+                                    token_budget=token_budget, resolver=resolver)
+        result["prompt"] = "\n\n".join(output_text for output_text, _ in results.values())
+        result["companies"] = {name: news for name, (_, news) in results.items()}
+    else:
+        result["prompt"], result["news"] = run_scan(
+            label, days, mode, keyword, cache=cache, store=store,
+            on_status=on_status, on_progress=on_progress, stats=stats, metrics=metrics, token_budget=token_budget,
+            resolver=resolver,
+        )
+    result["stats"] = stats
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m thainews", description="執行一次泰國新聞搜尋並輸出 prompt 或 JSON")
+    parser.add_argument("--mode", choices=MODES, default="macro", help="搜尋模式")
+    parser.add_argument("--keyword", help="company 模式的台商名稱，或 custom 模式的關鍵字")
+    parser.add_argument("--days", type=int, default=1, help="搜尋天數範圍")
+    parser.add_argument("--format", choices=["prompt", "json"], default="prompt", help="輸出格式")
+    parser.add_argument("--budget", type=int, default=PROMPT_TOKEN_BUDGET,
+                        help="prompt 的 token 預算；0 表示不限總量，改為每天每類別固定篇數")
+    parser.add_argument("-o", "--output", help="輸出檔案（預設 stdout）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用 RSS 條件式請求快取")
+    parser.add_argument("--no-save", action="store_true", help="不寫入歷史庫")
+    parser.add_argument("--resolve-links", choices=["off", "cached", "fetch"], default="cached",
+                        help="轉址連結還原：off 保留原樣、cached 只用就地解碼與快取、fetch 另外連網還原")
+    parser.add_argument("--metrics", metavar="PATH", help="將量測資料以 JSON lines 附加寫入此檔")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不輸出進度訊息")
+    args = parser.parse_args(argv)
+    if args.mode in ("company", "custom") and not args.keyword:
+        parser.error(f"--mode {args.mode} 需要 --keyword")
+    if args.mode == "company":
+        from thainews.config import COMPANY_MAP
+        if args.keyword not in COMPANY_MAP:
+            parser.error(f"未知的台商：{args.keyword}（可用：{'、'.join(COMPANY_MAP)}）")
+    if args.days < 1:
+        parser.error("--days 必須大於 0")
+    keyword = args.keyword if args.mode in ("company", "custom") else None
+
+    from thainews.metrics import ScanMetrics
+
+    cache = store = None
+    if not args.no_cache:
+        from thainews.feed_cache import FeedCache
+        cache = FeedCache(FEED_CACHE_PATH)
+    if not args.no_save:
+        from thainews.news_store import NewsStore
+        store = NewsStore(NEWS_DB_PATH, legacy_json=LEGACY_JSON_PATH)
+    resolver = None
+    if args.resolve_links != "off":
+        from thainews.links import LinkCache, LinkResolver
+        resolver = LinkResolver(LinkCache(LINK_CACHE_PATH), fetch=args.resolve_links == "fetch")
+
+    on_status, on_progress = progress_printer(args.quiet)
+    metrics = ScanMetrics(args.mode, keyword, args.days)
+    result = scan(args.mode, keyword, args.days, cache, store, on_status, on_progress, metrics,
+                  args.budget or None, resolver)
+    stats = result["stats"]
+    on_status(f"✅ 完成：{stats['requests']}/{stats['fixed_plan_requests']} 個請求，{metrics.wall_seconds:.1f}s")
+    if stats.get("failed_sources"):
+        on_status(f"⚠️ {len(stats['failed_sources'])} 個來源重試後仍失敗，結果不完整：{'、'.join(stats['failed_sources'])}")
+    prompt_stats = stats.get("prompt")
+    if prompt_stats and prompt_stats["dropped"]:
+        on_status(f"📝 prompt 約 {prompt_stats['tokens']} tokens，省略 {prompt_stats['dropped']} 則")
+
+    if args.metrics:
+        with open(args.metrics, "a", encoding="utf-8") as f:
+            f.write(metrics.to_jsonl())
+    if args.format == "json":
+        text = json.dumps(result, ensure_ascii=False, indent=2) + "\n"
+    else:
+        text = result["prompt"] + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
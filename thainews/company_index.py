@@ -0,0 +1,112 @@
+"""
+歷史新聞的台商索引（存放於歷史庫同一個 SQLite 檔）。
+
+新聞寫入時以個別台商模式的相關性規則（batch.match_companies）標記標題提到的台商，
+維護 台商 → 新聞 id 的對照與每日篇數；刪除新聞（保留上限裁切）時由觸發程序同步扣除。
+日期以發布時間的本地日期為準（與增量搜尋的逐日結果一致），無發布時間者以寫入時間計。
+台商清單或比對規則變更時索引版本不同，開啟歷史庫會整批重建。
+"""
+import hashlib
+import json
+from datetime import datetime
+
+from thainews.batch import match_companies
+from thainews.config import COMPANY_MAP
+from thainews.relevance import RelevanceMatcher
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS company_mentions (
+    company TEXT NOT NULL,
+    news_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    PRIMARY KEY (company, news_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_mentions_news ON company_mentions(news_id);
+CREATE INDEX IF NOT EXISTS idx_mentions_day ON company_mentions(company, day);
+CREATE TABLE IF NOT EXISTS company_days (
+    company TEXT NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (company, day)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS trg_mentions_insert AFTER INSERT ON company_mentions BEGIN
+    INSERT OR IGNORE INTO company_days VALUES (new.company, new.day, 0);
+    UPDATE company_days SET count = count + 1 WHERE company = new.company AND day = new.day;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_mentions_delete AFTER DELETE ON company_mentions BEGIN
+    UPDATE company_days SET count = count - 1 WHERE company = old.company AND day = old.day;
+    DELETE FROM company_days WHERE company = old.company AND day = old.day AND count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_news_delete_mentions AFTER DELETE ON news BEGIN
+    DELETE FROM company_mentions WHERE news_id = old.id;
+END;
+"""
+
+# 規則版本加上台商清單的雜湊：任一變更都會觸發重建
+INDEX_VERSION = "1-" + hashlib.md5(json.dumps(COMPANY_MAP, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+
+
+# 所有台商名稱與代碼合併的子字串比對：多數新聞不提到任何台商，先排除再逐家比對
+_ANY_COMPANY = RelevanceMatcher(keywords=[
+    n for name, info in COMPANY_MAP.items() for n in (name, info["thai_cn"], info["tw_cn"], info["en"], info["set"])
+])
+
+
+def mention_day(published_ts, saved_at):
+    """索引使用的日期（YYYY-MM-DD）：發布時間的本地日期，無發布時間則用寫入時間"""
+    return datetime.fromtimestamp(published_ts if published_ts is not None else saved_at).date().isoformat()
+
+
+def tag_companies(title):
+    """標題提到的台商（規則與個別台商模式相同）"""
+    title_lower = title.lower()
+    if not _ANY_COMPANY.is_relevant_lower(title_lower):
+        return []
+    return match_companies(title_lower, COMPANY_MAP)
+
+
+class CompanyIndex:
+    """在既有連線上維護與查詢台商索引"""
+
+    def ensure_schema(self, conn):
+        conn.executescript(SCHEMA)
+
+    def tag_rows(self, conn, rows):
+        """(news_id, title, published_ts, saved_at) 逐筆重新標記"""
+        self.tag(conn, [(news_id, mention_day(published_ts, saved_at), tag_companies(title))
+                        for news_id, title, published_ts, saved_at in rows])
+
+    def tag(self, conn, rows):
+        """(news_id, 日期, [台商]) 逐筆重建標記；比對可在開啟寫入交易前先做完，縮短持有寫入鎖的時間"""
+        rows = list(rows)
+        conn.executemany("DELETE FROM company_mentions WHERE news_id = ?", [(row[0],) for row in rows])
+        conn.executemany(
+            "INSERT INTO company_mentions (company, news_id, day) VALUES (?, ?, ?)",
+            [(company, news_id, day) for news_id, day, companies in rows for company in companies],
+        )
+
+    def rebuild(self, conn):
+        conn.execute("DELETE FROM company_mentions")
+        conn.execute("DELETE FROM company_days")
+        self.tag_rows(conn, conn.execute("SELECT id, title, published_ts, saved_at FROM news").fetchall())
+
+    def day_counts(self, conn, company, since_day=""):
+        """{日期: 篇數}（依日期排序）"""
+        return dict(conn.execute(
+            "SELECT day, count FROM company_days WHERE company = ? AND day >= ? ORDER BY day",
+            (company, since_day),
+        ).fetchall())
+
+    def totals(self, conn, since_day=""):
+        """{台商: 篇數}"""
+        return dict(conn.execute(
+            "SELECT company, SUM(count) FROM company_days WHERE day >= ? GROUP BY company", (since_day,),
+        ).fetchall())
+
+    def news(self, conn, company, columns, since_day=""):
+        """提到該台商的新聞欄位（新→舊）"""
+        return conn.execute(
+            f"SELECT {', '.join('n.' + c for c in columns)} FROM company_mentions m JOIN news n ON n.id = m.news_id "
+            f"WHERE m.company = ? AND m.day >= ? ORDER BY n.published_ts DESC, n.id DESC",
+            (company, since_day),
+        ).fetchall()
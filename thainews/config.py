@@ -0,0 +1,90 @@
+"""搜尋設定：資料檔路徑、選項映射、追蹤的台商清單與各模式的相關性關鍵字。"""
+
+# 資料檔路徑（相對於執行目錄）
+FEED_CACHE_PATH = "feed_cache.db"
+NEWS_DB_PATH = "news_data.db"
+LINK_CACHE_PATH = "link_cache.db"
+LEGACY_JSON_PATH = "news_data.json"
+
+# 背景預抓：每輪間隔（秒）、同一輪內各任務間的隨機錯開上限（秒），以及介面直接沿用結果的最長時間
+PREFETCH_INTERVAL = 30 * 60
+PREFETCH_JITTER = 20
+PREFETCH_DAYS = [1, 7]
+RESULT_MAX_AGE = 60 * 60
+
+# 分散式抓取的工作佇列：資料庫路徑、租約秒數（逾時未完成即可由其他 worker 接手）與每個工作的最多嘗試次數
+WORK_QUEUE_PATH = "work_queue.db"
+QUEUE_LEASE_SECONDS = 120
+QUEUE_MAX_ATTEMPTS = 5
+
+# 同一程序內相同搜尋（模式、關鍵字、天數、日期）的結果共用秒數；期間內重複點選不再重新爬取
+SCAN_SHARE_TTL = 120
+
+# prompt 的 token 預算（估計值）；新聞依重要性挑選放入，超出的篇數會附註省略
+PROMPT_TOKEN_BUDGET = 16000
+
+# 選項映射
+DATE_MAP = {
+    "1天": 1, "3天": 3, "1週": 7, "1月": 30
+}
+
+TOPIC_MAP = {
+    "泰國政經": "macro",
+    "電子產業": "industry",
+    "重點台商": "vip"
+}
+
+# VIP 公司清單：顯示名 → {泰國中文名, 台灣母公司名, 英文名, 泰交所代碼}
+# 搜尋時以泰國當地名稱為主，同時涵蓋母公司名與英文名
+COMPANY_MAP = {
+    # --- PCB ---
+    "泰達電": {"thai_cn": "泰達電", "tw_cn": "台達電", "en": "Delta Electronics Thailand", "set": "DELTA"},
+    "泰鼎":   {"thai_cn": "泰鼎",   "tw_cn": "臻鼎",   "en": "Zhen Ding Technology",      "set": ""},
+    "欣興":   {"thai_cn": "欣興",   "tw_cn": "欣興",   "en": "Unimicron",                  "set": ""},
+    "華通":   {"thai_cn": "華通",   "tw_cn": "華通",   "en": "Compeq Manufacturing",        "set": ""},
+    "金像電": {"thai_cn": "金像電", "tw_cn": "金像電", "en": "Gold Circuit Electronics",     "set": ""},
+    "定穎":   {"thai_cn": "定穎",   "tw_cn": "定穎",   "en": "Dynamic Electronics",         "set": ""},
+    "健鼎":   {"thai_cn": "健鼎",   "tw_cn": "健鼎",   "en": "Tripod Technology",            "set": ""},
+    "燿華":   {"thai_cn": "燿華",   "tw_cn": "燿華",   "en": "Unitech PCB",                  "set": "UPCB"},
+    "敬鵬":   {"thai_cn": "敬鵬",   "tw_cn": "敬鵬",   "en": "Chin-Poon Industrial",         "set": ""},
+    "競國":   {"thai_cn": "競國",   "tw_cn": "競國",   "en": "Chin-Gou Electronic",           "set": ""},
+    "高技":   {"thai_cn": "高技",   "tw_cn": "高技",   "en": "Kao Chi Enterprises",            "set": ""},
+    # --- 伺服器/電子代工 ---
+    "鴻海":   {"thai_cn": "鴻海",   "tw_cn": "鴻海",   "en": "Foxconn",                      "set": ""},
+    "英業達": {"thai_cn": "英業達", "tw_cn": "英業達", "en": "Inventec",                      "set": ""},
+    "廣達":   {"thai_cn": "廣達",   "tw_cn": "廣達",   "en": "Quanta Computer",               "set": ""},
+    "群光":   {"thai_cn": "群光",   "tw_cn": "群光",   "en": "Chicony Electronics",            "set": ""},
+    # --- 散熱 ---
+    "雙鴻":   {"thai_cn": "泰鴻",   "tw_cn": "雙鴻",   "en": "Auras Technology",              "set": ""},
+    "泰碩":   {"thai_cn": "泰碩",   "tw_cn": "泰碩",   "en": "Taisol Electronics",             "set": ""},
+    # --- PCB 上游材料 ---
+    "台虹":   {"thai_cn": "台虹",   "tw_cn": "台虹",   "en": "Taiflex Scientific",             "set": ""},
+    "聯茂":   {"thai_cn": "聯茂",   "tw_cn": "聯茂",   "en": "Elite Material",                 "set": ""},
+    "台燿":   {"thai_cn": "台燿",   "tw_cn": "台燿",   "en": "Taiwan Union Technology",        "set": ""},
+}
+
+# 向下相容：產生 VIP 查詢字串
+VIP_COMPANIES_EN = [f'"{info["en"]}"' for info in COMPANY_MAP.values()]
+VIP_COMPANIES_CN = [f'"{info["tw_cn"]}"' for info in COMPANY_MAP.values()]
+
+# 預先計算好查詢字串 (避免在函式內重複計算)
+VIP_QUERY_EN = "+OR+".join([c.replace(" ", "+") for c in VIP_COMPANIES_EN])
+VIP_QUERY_CN = "+OR+".join([c.replace(" ", "+") for c in VIP_COMPANIES_CN])
+
+# 各模式的相關性關鍵字（標題必須包含至少一個才保留）
+RELEVANCE_KEYWORDS = {
+    "macro": [
+        "泰國", "泰", "thailand", "thai", "bangkok", "曼谷",
+        "台泰", "台商", "東南亞", "asean", "southeast asia",
+    ],
+    "industry": [
+        "泰國", "泰", "thailand", "thai", "bangkok", "曼谷",
+        "pcb", "印刷電路板", "電路板", "circuit board",
+        "電子製造", "electronics manufacturing",
+    ],
+    "vip": [
+        "泰國", "泰", "thailand", "thai", "bangkok", "曼谷",
+        "pcb", "印刷電路板", "台商",
+    ] + [name for info in COMPANY_MAP.values()
+         for name in [info["thai_cn"], info["tw_cn"], info["en"]]],
+}
@@ -0,0 +1,130 @@
+"""
+近似重複標題分群（MinHash + LSH）。
+
+同一則新聞常被多家媒體轉載，標題只差「 - 來源」後綴或少數用字。
+標題正規化後切成檢索詞（英文單字、中泰文字元 bigram），以 MinHash 簽章分段
+放入 LSH 桶；每則標題只與同桶內各群的代表計算實際 Jaccard 相似度，整體約為線性時間。
+"""
+import hashlib
+import random
+import re
+
+from thainews.search_index import tokenize
+
+NUM_PERM = 48            # MinHash 簽章長度
+BANDS = 16               # LSH 分段數（每段 NUM_PERM // BANDS 列）
+SIMILARITY_THRESHOLD = 0.6
+COMMON_FEATURE_RATIO = 0.2  # 出現在超過此比例標題中的詞（如查詢詞本身）不參與分桶
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_rng = random.Random(20240601)  # 固定種子：每次執行得到相同的雜湊函式
+_SEEDS = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+
+_SUFFIX_RE = re.compile(r'\s+[-–—|]\s+[^-–—|]{1,60}$')
+
+
+def normalize_title(title, source=None):
+    """去除結尾的「 - 來源」後綴並轉小寫（已知來源名稱時只去除該後綴）"""
+    title = title.strip()
+    if source:
+        for sep in (" - ", " | ", " – "):
+            if title.endswith(sep + source):
+                return title[:-len(sep + source)].lower()
+        return title.lower()
+    return _SUFFIX_RE.sub("", title).lower()
+
+
+def title_features(title, source=None):
+    return frozenset(tokenize(normalize_title(title, source)))
+
+
+def minhash(features):
+    """每個特徵先取 64 位元雜湊，再以各組種子做 xor-multiply 混合後取最小值"""
+    hashes = [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+              for f in features]
+    signature = []
+    for seed in _SEEDS:
+        best = _MASK
+        for h in hashes:
+            x = ((h ^ seed) * _GOLDEN) & _MASK
+            x ^= x >> 29
+            if x < best:
+                best = x
+        signature.append(best)
+    return signature
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def cluster_titles(titles, sources=None, threshold=SIMILARITY_THRESHOLD):
+    """
+    將標題分群，回傳每群的索引列表（群內與群間皆依輸入順序，第一個為代表）。
+    sources 為各標題的來源名稱（用於去除後綴）；無法取得任何特徵的標題各自成群。
+    """
+    sources = sources or [None] * len(titles)
+    features = [title_features(t, s) for t, s in zip(titles, sources)]
+    # 幾乎每則都有的詞（例如「泰國」）會讓 MinHash 在某些分段總是取到同一個值，
+    # 導致大量不相干的標題落入同一桶；分桶時排除，相似度仍以完整特徵計算
+    common = set()
+    if len(features) >= 20:
+        df = {}
+        for feats in features:
+            for f in feats:
+                df[f] = df.get(f, 0) + 1
+        limit = COMMON_FEATURE_RATIO * len(features)
+        common = {f for f, count in df.items() if count > limit}
+
+    rows = NUM_PERM // BANDS
+    groups = []
+    group_of = {}          # 代表索引 → groups 中的位置
+    bucket_leaders = {}    # LSH 桶 → 桶內各群代表（只與代表比較，避免大桶退化成兩兩比對）
+    for i, feats in enumerate(features):
+        if not feats:
+            groups.append([i])
+            continue
+        signature = minhash((feats - common) or feats)
+        keys = [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(BANDS)]
+        leader = None
+        compared = set()
+        for key in keys:
+            for candidate in bucket_leaders.get(key, ()):
+                if candidate in compared:
+                    continue
+                compared.add(candidate)
+                if jaccard(feats, features[candidate]) >= threshold:
+                    leader = candidate
+                    break
+            if leader is not None:
+                break
+        if leader is None:
+            group_of[i] = len(groups)
+            groups.append([i])
+            for key in keys:
+                bucket_leaders.setdefault(key, []).append(i)
+        else:
+            groups[group_of[leader]].append(i)
+    return groups
+
+
+def cluster_news(items, threshold=SIMILARITY_THRESHOLD):
+    """
+    對 NewsItem 分群並標註：代表新聞填入 cluster_size（群內篇數）與
+    cluster_sources（群內不重複來源），其餘新聞填入 duplicate_of（代表的 link）。
+    回傳代表新聞列表（依輸入順序）。
+    """
+    representatives = []
+    titles = [item.title for item in items]
+    sources = [item.source for item in items]
+    for group in cluster_titles(titles, sources, threshold):
+        rep = items[group[0]]
+        rep.cluster_size = len(group)
+        rep.cluster_sources = list(dict.fromkeys(items[i].source for i in group))
+        for i in group[1:]:
+            items[i].duplicate_of = rep.link
+        representatives.append(rep)
+    return representatives
@@ -0,0 +1,165 @@
+"""
+RSS 來源的本地快取。
+
+以正規化後的來源 URL 為鍵，儲存解析後的新聞條目。
+Google News 查詢皆以 `before:` 日期切分：已結束的日期幾乎不再變動，
+可長時間保留；含今天的查詢仍持續更新，需快速過期。
+過期的條目會連同 ETag / Last-Modified 再保留一段時間，供條件式請求重新驗證。
+快取總大小由觸發程序維護在 feed_cache_stats，寫入時不必每次加總整個表。
+"""
+import json
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime, date
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote_plus
+
+PAST_DAY_TTL = 7 * 24 * 3600        # 過去日期：保留 7 天
+TODAY_TTL = 10 * 60                 # 含今天：10 分鐘過期
+STALE_GRACE = 2 * 24 * 3600         # 過期後仍保留供 304 重新驗證的時間
+MAX_CACHE_BYTES = 50 * 1024 * 1024  # 超過此大小即依最久未使用淘汰
+
+CacheRecord = namedtuple("CacheRecord", ["entries", "etag", "last_modified", "fresh"])
+
+_BEFORE_RE = re.compile(r'before:(\d{4}-\d{2}-\d{2})')
+
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total_bytes INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS trg_feed_cache_insert AFTER INSERT ON feed_cache BEGIN
+    UPDATE feed_cache_stats SET total_bytes = total_bytes + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_feed_cache_update AFTER UPDATE OF size ON feed_cache BEGIN
+    UPDATE feed_cache_stats SET total_bytes = total_bytes + new.size - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_feed_cache_delete AFTER DELETE ON feed_cache BEGIN
+    UPDATE feed_cache_stats SET total_bytes = total_bytes - old.size WHERE id = 0;
+END;
+"""
+
+
+def normalize_url(url):
+    """正規化 URL（小寫主機、排序參數、去除片段），讓等價查詢共用同一筆快取"""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+def ttl_for_url(url, today=None):
+    """依查詢的 before: 日期決定存活時間；無日期資訊則視為即時查詢"""
+    today = today or datetime.now().date()
+    match = _BEFORE_RE.search(unquote_plus(url))
+    if not match:
+        return TODAY_TTL
+    before = date.fromisoformat(match.group(1))
+    return PAST_DAY_TTL if before <= today else TODAY_TTL
+
+
+class FeedCache:
+    """SQLite 儲存的條目快取（每次操作各自連線，可跨執行緒使用）"""
+
+    def __init__(self, path="feed_cache.db", max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feed_cache (
+                    key TEXT PRIMARY KEY,
+                    entries TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT
+                )
+            """)
+            # 舊版快取檔沒有驗證欄位，補上即可沿用
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(feed_cache)")}
+            for column in ("etag", "last_modified"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE feed_cache ADD COLUMN {column} TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feed_cache_access ON feed_cache(last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feed_cache_expires ON feed_cache(expires_at)")
+            conn.executescript(STATS_SCHEMA)
+            # 舊版快取檔沒有大小統計，以目前內容初始化（之後由觸發程序維護）
+            conn.execute("INSERT OR IGNORE INTO feed_cache_stats SELECT 0, COALESCE(SUM(size), 0) FROM feed_cache")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, url):
+        """取得未過期的快取條目；不存在或已過期回傳 None"""
+        record = self.lookup(url)
+        return record.entries if record and record.fresh else None
+
+    def lookup(self, url):
+        """取得快取紀錄（含已過期者與驗證欄位），不存在回傳 None"""
+        key = normalize_url(url)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT entries, expires_at, etag, last_modified FROM feed_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE feed_cache SET last_access = ? WHERE key = ?", (now, key))
+        return CacheRecord(json.loads(row[0]), row[2], row[3], row[1] >= now)
+
+    def put(self, url, entries, ttl=None, etag=None, last_modified=None):
+        """寫入條目（與伺服器回傳的驗證欄位）並視需要淘汰舊資料"""
+        key = normalize_url(url)
+        payload = json.dumps(entries, ensure_ascii=False)
+        now = time.time()
+        ttl = ttl_for_url(url) if ttl is None else ttl
+        with self._connect() as conn:
+            # 以 upsert 取代 INSERT OR REPLACE：REPLACE 刪除舊列時不會觸發 DELETE 觸發程序，大小統計會失準
+            conn.execute("""
+                INSERT INTO feed_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    entries = excluded.entries,
+                    size = excluded.size,
+                    fetched_at = excluded.fetched_at,
+                    expires_at = excluded.expires_at,
+                    last_access = excluded.last_access,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified
+            """, (key, payload, len(payload.encode("utf-8")), now, now + ttl, now, etag, last_modified))
+            self._evict(conn, now)
+
+    def revalidate(self, url, ttl=None):
+        """伺服器回應 304：沿用既有條目並重新計算到期時間"""
+        now = time.time()
+        ttl = ttl_for_url(url) if ttl is None else ttl
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE feed_cache SET fetched_at = ?, expires_at = ?, last_access = ? WHERE key = ?",
+                (now, now + ttl, now, normalize_url(url)),
+            )
+
+    def _evict(self, conn, now):
+        """先清除過期已久的資料，再依最久未使用淘汰至大小上限以內"""
+        conn.execute("DELETE FROM feed_cache WHERE expires_at < ?", (now - STALE_GRACE,))
+        total = conn.execute("SELECT total_bytes FROM feed_cache_stats WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM feed_cache ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM feed_cache WHERE key = ?", stale)
+
+    def total_bytes(self):
+        """快取條目的總大小（位元組）"""
+        with self._connect() as conn:
+            return conn.execute("SELECT total_bytes FROM feed_cache_stats WHERE id = 0").fetchone()[0]
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM feed_cache")
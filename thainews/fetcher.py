@@ -0,0 +1,190 @@
+"""
+非同步 RSS 抓取引擎。
+
+所有請求共用同一個 aiohttp 連線池（keep-alive、gzip、逐請求逾時），
+並以 ETag / Last-Modified 發出條件式請求，下載後的位元組交給 Google News 專用解析器
+（結構不符時改用 feedparser）；呼叫端以一般的同步 generator
+依完成順序取得結果，不需要自行管理 event loop。
+請求經 thainews.throttle 的排程器送出（每主機速率限制、退避重試、斷路器）。
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from thainews.rss_parser import UnsupportedFeed, parse_google_news
+from thainews.throttle import DEFAULT_SCHEDULER
+
+DEFAULT_CONCURRENCY = 20   # 同時進行的請求上限
+DEFAULT_TIMEOUT = 15       # 單一請求逾時（秒）
+USER_AGENT = "Mozilla/5.0 (compatible; ThaiNewsBot/1.0)"
+
+Response = namedtuple("Response", ["status", "headers", "body"])
+
+_DONE = object()
+_transport_factory = None  # 取代 AsyncFeedFetcher 的傳輸層（錄製/重播用），None 表示實際連網
+
+
+@contextmanager
+def use_transport(factory):
+    """
+    暫時改用其他傳輸層：factory(max_concurrency, timeout) 須回傳提供 get(url, headers)
+    的 async context manager（介面同 AsyncFeedFetcher）。
+    """
+    global _transport_factory
+    previous, _transport_factory = _transport_factory, factory
+    try:
+        yield
+    finally:
+        _transport_factory = previous
+
+
+def entry_to_dict(entry):
+    """只保留後續流程需要的欄位，便於快取序列化"""
+    return {
+        "title": entry.get("title", ""),
+        "link": entry.get("link", ""),
+        "published": entry.get("published", ""),
+        "source": entry.source.get("title", "Google News") if "source" in entry else "Google News",
+    }
+
+
+def parse_feed(body):
+    """將 RSS 原始位元組解析為條目列表：先走 Google News 快速路徑，結構不符時改用 feedparser"""
+    try:
+        return parse_google_news(body)
+    except UnsupportedFeed:
+        pass
+    import feedparser  # 延遲載入：僅在快速路徑無法處理時才需要
+    return [entry_to_dict(entry) for entry in feedparser.parse(body).entries]
+
+
+class AsyncFeedFetcher:
+    """共用連線池的非同步 HTTP 客戶端（需以 async with 使用）"""
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._session = None
+
+    async def __aenter__(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.max_concurrency,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    async def get(self, url, headers=None, allow_redirects=True):
+        """送出 GET 請求並讀完內容（自動解壓 gzip）；allow_redirects=False 時直接回傳 3xx 回應"""
+        async with self._session.get(url, headers=headers, allow_redirects=allow_redirects) as resp:
+            body = await resp.read()
+            return Response(resp.status, resp.headers.copy(), body)
+
+
+async def _fetch_source(fetcher, source, cache, metrics=None, scheduler=DEFAULT_SCHEDULER):
+    """
+    抓取單一來源：快取未過期直接使用；已過期則帶驗證欄位發出條件式請求，
+    伺服器回應 304 時沿用舊條目。重試後仍失敗回傳 None。提供 metrics 時記錄抓取與解析的量測。
+    """
+    import asyncio
+    url = source["url"]
+    # 快取是同步的 SQLite 操作，交給執行緒池執行，避免在 event loop 上等待磁碟 I/O 與寫入鎖
+    record = await asyncio.to_thread(cache.lookup, url) if cache is not None else None
+    if record and record.fresh:
+        if metrics:
+            metrics.update_source(source, cache="hit", entries=len(record.entries))
+        return record.entries
+
+    headers = {}
+    if record and record.etag:
+        headers["If-None-Match"] = record.etag
+    if record and record.last_modified:
+        headers["If-Modified-Since"] = record.last_modified
+    start = time.perf_counter()
+    try:
+        resp, retries = await scheduler.get(fetcher, url, headers=headers or None)
+    except Exception as e:
+        if metrics:
+            metrics.add_stage("fetch", time.perf_counter() - start)
+            metrics.update_source(source, cache="miss", status=type(e).__name__,
+                                  fetch_seconds=time.perf_counter() - start)
+        return None
+    fetch_seconds = time.perf_counter() - start
+    if metrics:
+        metrics.add_stage("fetch", fetch_seconds)
+        metrics.update_source(source, status=resp.status, bytes=len(resp.body), fetch_seconds=fetch_seconds,
+                              cache="revalidated" if resp.status == 304 and record else "miss", retries=retries)
+    if resp.status == 304 and record:
+        await asyncio.to_thread(cache.revalidate, url)
+        if metrics:
+            metrics.update_source(source, entries=len(record.entries))
+        return record.entries
+    if resp.status != 200:
+        return None
+    start = time.perf_counter()
+    entries = parse_feed(resp.body)
+    if metrics:
+        parse_seconds = time.perf_counter() - start
+        metrics.add_stage("parse", parse_seconds)
+        metrics.update_source(source, entries=len(entries), parse_seconds=parse_seconds)
+    if cache is not None:
+        await asyncio.to_thread(cache.put, url, entries, etag=resp.headers.get("ETag"),
+                                last_modified=resp.headers.get("Last-Modified"))
+    return entries
+
+
+async def fetch_all(sources, emit, cache=None, max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                    metrics=None, scheduler=None):
+    """平行抓取所有來源，每完成一個即呼叫 emit((index, source, entries))"""
+    import asyncio
+    factory = _transport_factory or AsyncFeedFetcher
+    scheduler = scheduler or DEFAULT_SCHEDULER
+    async with factory(max_concurrency, timeout) as fetcher:
+        async def run(index, source):
+            emit((index, source, await _fetch_source(fetcher, source, cache, metrics, scheduler)))
+
+        await asyncio.gather(*(run(i, source) for i, source in enumerate(sources)))
+
+
+def iter_fetch(sources, cache=None, max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, metrics=None,
+               scheduler=None):
+    """
+    同步介面：在背景執行緒跑 event loop，依完成順序逐一產出 (index, source, entries)。
+    entries 為 None 表示該來源重試後仍抓取失敗；metrics 為 ScanMetrics 時記錄各來源的抓取量測。
+    scheduler 為 None 時使用整個程序共用的 DEFAULT_SCHEDULER。
+    """
+    if not sources:
+        return
+    import asyncio  # 延遲載入：只在實際抓取時才需要 event loop
+    results = queue.Queue()
+
+    def runner():
+        try:
+            asyncio.run(fetch_all(sources, results.put, cache, max_concurrency, timeout, metrics, scheduler))
+        except BaseException as e:  # 交由呼叫端執行緒重新拋出
+            results.put(e)
+        finally:
+            results.put(_DONE)
+
+    thread = threading.Thread(target=runner, name="feed-fetcher", daemon=True)
+    thread.start()
+    while True:
+        item = results.get()
+        if item is _DONE:
+            break
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+    thread.join()
+
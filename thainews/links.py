@@ -0,0 +1,268 @@
+"""
+Google News 轉址連結還原為媒體原始網址。
+
+RSS 中的 link 是 news.google.com/rss/articles/<id> 的轉址連結，同一篇報導經不同查詢或語言的
+feed 取得時 id 不同，以 link 去重會漏掉。還原順序：
+
+1. 就地解碼：舊版 id 是 base64 編碼的 protobuf，原始網址直接包含在內，不需連網。
+2. 快取：先前連網還原的結果存於 SQLite（依最近使用時間淘汰；失敗的結果短期保留，避免反覆重試）。
+3. 連網：以有限的同時請求數取得轉址連結，讀取 3xx 的 Location，或頁面中的 data-n-au、
+   canonical 連結與 meta refresh。請求經 thainews.throttle 的排程器送出（與 RSS 抓取共用主機限速）。
+   轉往 Google 自家主機（同意頁、登入頁、/sorry 驗證頁）視為還原失敗，只短期保留。
+
+新版加簽的 id 需另外呼叫 Google 的內部 API 才能還原，此處不處理：連網仍無法還原的連結保留原樣。
+還原後的網址去除片段與 utm_* 追蹤參數。
+"""
+import base64
+import html
+import re
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from thainews.fetcher import DEFAULT_TIMEOUT, AsyncFeedFetcher
+from thainews.news_item import link_hash
+
+GOOGLE_NEWS_HOSTS = frozenset({"news.google.com"})
+RESOLVE_CONCURRENCY = 8           # 連網還原時同時進行的請求上限
+MAX_LINKS = 200000                # 快取筆數上限，超過即依最久未使用淘汰
+FAILURE_TTL = 6 * 3600            # 還原失敗的結果保留秒數，期間內不再重試
+
+_ARTICLE_RE = re.compile(r"/(?:rss/)?articles/([A-Za-z0-9_-]+)")
+_PAGE_PATTERNS = [
+    re.compile(rb'data-n-au="([^"]+)"'),
+    re.compile(rb'<link[^>]+rel="canonical"[^>]+href="([^"]+)"', re.I),
+    re.compile(rb'<meta[^>]+http-equiv="refresh"[^>]+content="\d+;\s*url=([^"]+)"', re.I),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    link TEXT PRIMARY KEY,
+    canonical TEXT,
+    checked_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_links_used ON links(used_at);
+"""
+
+_SQL_CHUNK = 500
+
+
+def article_id(link, hosts=GOOGLE_NEWS_HOSTS):
+    """Google News 轉址連結中的文章 id；不是轉址連結回傳 None"""
+    parts = urlsplit(link)
+    if parts.hostname not in hosts:
+        return None
+    match = _ARTICLE_RE.match(parts.path)
+    return match.group(1) if match else None
+
+
+def _varint(data, pos):
+    value = shift = 0
+    while pos < len(data):
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+    raise ValueError("varint 不完整")
+
+
+def decode_article_id(token):
+    """就地解碼舊版 id：base64 解出 protobuf，取第一個內容為 http(s) 網址的字串欄位；無法解碼回傳 None"""
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except ValueError:
+        return None
+    pos = 0
+    try:
+        while pos < len(data):
+            key, pos = _varint(data, pos)
+            wire_type = key & 7
+            if wire_type == 0:
+                _, pos = _varint(data, pos)
+            elif wire_type == 2:
+                length, pos = _varint(data, pos)
+                value = data[pos:pos + length]
+                pos += length
+                if value.startswith((b"http://", b"https://")):
+                    return value.decode("utf-8")
+            elif wire_type == 5:
+                pos += 4
+            elif wire_type == 1:
+                pos += 8
+            else:
+                return None
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return None
+
+
+def clean_url(url):
+    """去除片段與 utm_* 追蹤參數，讓同一篇報導的不同分享網址一致"""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.lower().startswith("utm_")]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+def is_google_host(hostname):
+    """Google 自家主機（*.google.com、google.co.th 等）：同意頁、登入頁、流量驗證頁都不是報導原始網址"""
+    return "google" in hostname.split(".")
+
+
+def _publisher_url(url, base, hosts):
+    """轉址目標若是 http(s) 且不在 Google News 或其他 Google 主機上，回傳清理後的網址"""
+    url = urljoin(base, html.unescape(url.strip()))
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname or parts.hostname in hosts \
+            or is_google_host(parts.hostname):
+        return None
+    return clean_url(url)
+
+
+def canonical_from_response(link, resp, hosts=GOOGLE_NEWS_HOSTS):
+    """由轉址連結的回應取出原始網址：3xx 的 Location，或頁面中的 data-n-au／canonical／meta refresh"""
+    if 300 <= resp.status < 400:
+        location = resp.headers.get("Location")
+        return _publisher_url(location, link, hosts) if location else None
+    if resp.status != 200:
+        return None
+    for pattern in _PAGE_PATTERNS:
+        for match in pattern.finditer(resp.body):
+            url = _publisher_url(match.group(1).decode("utf-8", "replace"), link, hosts)
+            if url:
+                return url
+    return None
+
+
+class LinkCache:
+    """連網還原結果的快取（SQLite，WAL 模式；每次操作各自連線，可跨執行緒／程序使用）"""
+
+    def __init__(self, path, max_links=MAX_LINKS, failure_ttl=FAILURE_TTL):
+        self.path = path
+        self.max_links = max_links
+        self.failure_ttl = failure_ttl
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, links):
+        """
+        回傳 {link: 原始網址或 None}：None 表示近期還原失敗（不需重試）；不在結果中的連結需要還原。
+        命中的連結一併更新最近使用時間。
+        """
+        now = time.time()
+        links = list(links)
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(links), _SQL_CHUNK):
+                chunk = links[i:i + _SQL_CHUNK]
+                for link, canonical, checked_at in conn.execute(
+                        f"SELECT link, canonical, checked_at FROM links WHERE link IN ({', '.join('?' * len(chunk))})",
+                        chunk):
+                    if canonical is not None or now - checked_at < self.failure_ttl:
+                        found[link] = canonical
+            conn.executemany("UPDATE links SET used_at = ? WHERE link = ?", [(now, link) for link in found])
+        return found
+
+    def put(self, results):
+        """保存 {link: 原始網址或 None（失敗）}；超過筆數上限時淘汰最久未使用者"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?)",
+                             [(link, canonical, now, now) for link, canonical in results.items()])
+            excess = conn.execute("SELECT COUNT(*) FROM links").fetchone()[0] - self.max_links
+            if excess > 0:
+                conn.execute("DELETE FROM links WHERE link IN (SELECT link FROM links ORDER BY used_at LIMIT ?)",
+                             (excess,))
+
+
+class LinkResolver:
+    """
+    還原轉址連結。
+    :param cache: LinkCache，None 則不保存連網還原的結果
+    :param fetch: 解碼與快取都無法還原時是否連網（互動搜尋可關閉，交由背景預抓補齊快取）
+    :param hosts: 視為 Google News 轉址連結的主機（離線測試時可改為模擬伺服器）
+    """
+
+    def __init__(self, cache=None, fetch=True, max_concurrency=RESOLVE_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                 hosts=GOOGLE_NEWS_HOSTS, scheduler=None):
+        self.cache = cache
+        self.fetch = fetch
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.hosts = frozenset(hosts)
+        self.scheduler = scheduler
+
+    def resolve(self, links):
+        """
+        回傳 ({轉址連結: 原始網址}, report)；無法還原的連結不在結果中。
+        report 含 links（轉址連結數）、decoded、cached、fetched（連網還原成功）、failed。
+        """
+        pending = {link: article_id(link, self.hosts) for link in dict.fromkeys(links)}
+        pending = {link: token for link, token in pending.items() if token}
+        report = {"links": len(pending), "decoded": 0, "cached": 0, "fetched": 0, "failed": 0}
+        resolved = {}
+        for link, token in list(pending.items()):
+            url = decode_article_id(token)
+            if url:
+                resolved[link] = clean_url(url)
+                del pending[link]
+        report["decoded"] = len(resolved)
+        if pending and self.cache is not None:
+            for link, canonical in self.cache.lookup(pending).items():
+                del pending[link]
+                if canonical:
+                    resolved[link] = canonical
+                    report["cached"] += 1
+                else:
+                    report["failed"] += 1
+        if pending and self.fetch:
+            fetched = self._fetch_all(list(pending))
+            if self.cache is not None:
+                self.cache.put(fetched)
+            for link, canonical in fetched.items():
+                if canonical:
+                    resolved[link] = canonical
+                    report["fetched"] += 1
+                else:
+                    report["failed"] += 1
+        return resolved, report
+
+    def canonicalize(self, items):
+        """將 NewsItem 的 link 換成原始網址（就地修改），回傳 resolve 的 report"""
+        resolved, report = self.resolve(item.link for item in items)
+        for item in items:
+            canonical = resolved.get(item.link)
+            if canonical:
+                item.link = canonical
+                item.link_hash = link_hash(canonical)
+        return report
+
+    def _fetch_all(self, links):
+        import asyncio  # 延遲載入，與 fetcher 相同（只有需要連網還原時才建立 event loop）
+        from thainews.throttle import DEFAULT_SCHEDULER
+
+        scheduler = self.scheduler or DEFAULT_SCHEDULER
+
+        async def run():
+            results = {}
+            limit = asyncio.Semaphore(self.max_concurrency)
+            async with AsyncFeedFetcher(self.max_concurrency, self.timeout) as fetcher:
+                async def one(link):
+                    async with limit:
+                        try:
+                            resp, _ = await scheduler.get(fetcher, link, allow_redirects=False)
+                        except Exception:
+                            results[link] = None
+                            return
+                    results[link] = canonical_from_response(link, resp, self.hosts)
+
+                await asyncio.gather(*(one(link) for link in links))
+            return results
+
+        return asyncio.run(run())
@@ -0,0 +1,149 @@
+"""
+搜尋流程的量測紀錄。
+
+記錄每個階段（產生網址、抓取、解析、日期過濾、相關性過濾、還原轉址連結、去重、排序、組 prompt、
+寫入歷史庫）的累計耗時，以及每個來源的下載位元組、快取狀態、條目數與被排除的原因，
+可依來源或類別彙總，並匯出為 JSON lines 或 Prometheus 文字格式。
+抓取在背景執行緒進行，所有寫入都以鎖保護。
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+STAGES = [
+    "url_build", "fetch", "parse", "date_filter", "relevance_filter", "link_resolve",
+    "dedupe", "sort", "prompt_build", "history_save",
+]
+
+# 條目被排除的原因
+REJECT_DATE = "out_of_range"
+REJECT_RELEVANCE = "irrelevant"
+REJECT_DUPLICATE = "duplicate_title"
+REJECT_DUPLICATE_LINK = "duplicate_link"  # 原始網址與前面的新聞相同（不同 feed 的轉址連結指向同一篇）
+REJECT_NEAR_DUPLICATE = "near_duplicate"
+REJECT_DAILY_LIMIT = "daily_limit"
+REJECT_TOKEN_BUDGET = "token_budget"   # 超出 prompt 的 token 預算
+REJECT_WINDOW_SPLIT = "window_split"   # 區間飽和，改以切分後的較小區間重查
+
+# 來源的快取狀態：沿用歷史庫中已完整抓取的日期（沒有實際請求）
+CACHE_STORED = "stored"
+
+
+class ScanMetrics:
+    """單次搜尋的量測結果"""
+
+    def __init__(self, mode="", keyword=None, days=0):
+        self.mode = mode
+        self.keyword = keyword
+        self.days = days
+        self.started_at = time.time()
+        self.wall_seconds = 0.0
+        self.stages = OrderedDict((name, {"seconds": 0.0, "calls": 0}) for name in STAGES)
+        self.sources = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds, calls=1):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += calls
+
+    def _source(self, source):
+        record = self.sources.get(source["name"])
+        if record is None:
+            record = self.sources[source["name"]] = {
+                "source": source["name"], "category": source.get("category", source["name"]),
+                "cache": "", "status": None, "bytes": 0, "fetch_seconds": 0.0, "parse_seconds": 0.0,
+                "retries": 0, "entries": 0, "kept": 0, "rejected": {},
+            }
+        return record
+
+    def update_source(self, source, **fields):
+        with self._lock:
+            self._source(source).update(fields)
+
+    def count(self, source, kept=0, **rejected):
+        """累加來源保留的條目數與各排除原因的數量"""
+        with self._lock:
+            record = self._source(source)
+            record["kept"] += kept
+            for reason, n in rejected.items():
+                if n:
+                    record["rejected"][reason] = record["rejected"].get(reason, 0) + n
+
+    def by_category(self):
+        """依類別彙總來源紀錄"""
+        totals = OrderedDict()
+        for record in self.sources.values():
+            total = totals.setdefault(record["category"], {
+                "category": record["category"], "requests": 0, "bytes": 0,
+                "entries": 0, "kept": 0, "rejected": {},
+            })
+            total["requests"] += int(record["cache"] != CACHE_STORED)
+            total["bytes"] += record["bytes"]
+            total["entries"] += record["entries"]
+            total["kept"] += record["kept"]
+            for reason, n in record["rejected"].items():
+                total["rejected"][reason] = total["rejected"].get(reason, 0) + n
+        return list(totals.values())
+
+    def summary(self):
+        return {
+            "mode": self.mode, "keyword": self.keyword, "days": self.days,
+            "started_at": self.started_at, "wall_seconds": self.wall_seconds,
+            "requests": sum(r["cache"] != CACHE_STORED for r in self.sources.values()),
+            "bytes": sum(r["bytes"] for r in self.sources.values()),
+            "entries": sum(r["entries"] for r in self.sources.values()),
+            "kept": sum(r["kept"] for r in self.sources.values()),
+        }
+
+    def to_jsonl(self):
+        """每行一筆：scan 摘要、各階段、各來源、各類別"""
+        lines = [{"type": "scan", **self.summary()}]
+        lines += [{"type": "stage", "stage": name, **stage} for name, stage in self.stages.items()]
+        lines += [{"type": "source", **record} for record in self.sources.values()]
+        lines += [{"type": "category", **total} for total in self.by_category()]
+        return "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+
+    def to_prometheus(self, prefix="thainews"):
+        """Prometheus 文字格式（exposition format 0.0.4）"""
+        scan = {"mode": self.mode, "keyword": self.keyword or "", "days": str(self.days)}
+        out = []
+
+        def metric(name, kind, help_text, samples):
+            out.append(f"# HELP {prefix}_{name} {help_text}")
+            out.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                out.append(f"{prefix}_{name}{{{_labels({**scan, **labels})}}} {value}")
+
+        metric("scan_wall_seconds", "gauge", "Wall-clock time of the scan.", [({}, self.wall_seconds)])
+        metric("stage_seconds", "gauge", "Accumulated time per pipeline stage.",
+               [({"stage": name}, round(stage["seconds"], 6)) for name, stage in self.stages.items()])
+        categories = self.by_category()
+        metric("requests", "gauge", "Feed requests per category.",
+               [({"category": c["category"]}, c["requests"]) for c in categories])
+        metric("bytes", "gauge", "Downloaded bytes per category.",
+               [({"category": c["category"]}, c["bytes"]) for c in categories])
+        metric("entries", "gauge", "Feed entries per category and outcome.",
+               [({"category": c["category"], "outcome": "fetched"}, c["entries"]) for c in categories]
+               + [({"category": c["category"], "outcome": "kept"}, c["kept"]) for c in categories])
+        metric("rejected", "gauge", "Rejected entries per category and reason.",
+               [({"category": c["category"], "reason": reason}, n)
+                for c in categories for reason, n in c["rejected"].items()])
+        return "\n".join(out) + "\n"
+
+
+def _labels(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
@@ -0,0 +1,98 @@
+"""
+精簡的新聞紀錄。
+
+每則 RSS 條目在匯入時只建立一次 NewsItem：RFC-822 日期只解析一次，同時算好
+時間戳、逐日分組用的日期鍵、小寫標題與連結雜湊；之後的過濾、排序、分組與存檔
+都直接使用這些欄位，不再重複解析字串。使用 __slots__ 以減少每則的記憶體。
+"""
+import copy
+import hashlib
+import sys
+from email.utils import parsedate_to_datetime
+
+UNKNOWN_DAY = "unknown"
+
+
+def parse_published(date_str):
+    """解析 RFC-822 日期，回傳 (epoch 秒, YYYY-MM-DD)；無法解析回傳 (None, UNKNOWN_DAY)"""
+    if not date_str:
+        return None, UNKNOWN_DAY
+    try:
+        dt = parsedate_to_datetime(date_str)
+        # 日期鍵只有數十種，intern 後同一天的新聞共用同一個字串
+        return dt.timestamp(), sys.intern(dt.strftime('%Y-%m-%d'))
+    except Exception:
+        return None, UNKNOWN_DAY
+
+
+def link_hash(link):
+    """連結的 64 位元雜湊（用於集合去重，比保存完整字串比對更省）"""
+    return int.from_bytes(hashlib.blake2b(link.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class NewsItem:
+    """單則新聞；分群結果（cluster_size、cluster_sources、duplicate_of）由 dedupe.cluster_news 填入"""
+
+    __slots__ = (
+        "title", "link", "date", "source", "category",
+        "published_ts", "day", "title_lower", "link_hash",
+        "cluster_size", "cluster_sources", "duplicate_of",
+    )
+
+    def __init__(self, title, link, date="", source="", category="", published_ts=None, day=None):
+        self.title = title
+        self.link = link
+        self.date = date or ""
+        self.source = source or ""
+        self.category = category or ""
+        if day is None:
+            published_ts, day = parse_published(self.date)
+        self.published_ts = published_ts
+        self.day = day
+        title_lower = title.lower()
+        self.title_lower = title if title_lower == title else title_lower
+        self.link_hash = link_hash(link)
+        self.cluster_size = 1
+        self.cluster_sources = None
+        self.duplicate_of = None
+
+    @classmethod
+    def from_entry(cls, entry, category=""):
+        """由抓取結果（title, link, published, source）建立"""
+        return cls(entry['title'], entry['link'], entry['published'], entry['source'], category)
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict 的輸出或舊版新聞 dict 建立"""
+        ts = data.get("published_ts")
+        item = cls(data.get("title", ""), data.get("link", ""), data.get("date", ""),
+                   data.get("source", ""), data.get("category", ""),
+                   published_ts=ts, day=data.get("day") if ts is not None else None)
+        item.cluster_size = data.get("cluster_size", 1)
+        item.cluster_sources = data.get("cluster_sources")
+        item.duplicate_of = data.get("duplicate_of")
+        return item
+
+    def with_category(self, category):
+        """複製一份並改為指定類別（不重新解析日期，分群結果不複製）"""
+        item = copy.copy(self)
+        item.category = category
+        item.cluster_size, item.cluster_sources, item.duplicate_of = 1, None, None
+        return item
+
+    def to_dict(self):
+        """輸出給介面與 JSON 的 dict（僅包含已填入的分群欄位）"""
+        data = {
+            "title": self.title, "link": self.link, "date": self.date,
+            "source": self.source, "category": self.category,
+            "published_ts": self.published_ts, "day": self.day,
+        }
+        if self.cluster_sources is not None:
+            data["cluster_size"] = self.cluster_size
+            data["cluster_sources"] = self.cluster_sources
+        if self.duplicate_of is not None:
+            data["duplicate_of"] = self.duplicate_of
+        return data
+
+    def __repr__(self):
+        return f"NewsItem({self.title!r}, {self.link!r}, {self.date!r})"
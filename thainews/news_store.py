@@ -0,0 +1,349 @@
+"""
+歷史新聞儲存庫（SQLite，WAL 模式）。
+
+取代原本整檔讀寫的 news_data.json：以 link 建立唯一索引做批次 upsert，
+日期與類別另建索引，多個 Streamlit 工作階段可同時讀寫而不必互相等待整檔鎖。
+標題與來源的全文檢索索引（search_index）與台商索引（company_index）於寫入時同步更新。
+首次開啟時會自動匯入舊版 news_data.json。
+增量搜尋用的逐日結果與各模式的水位（上次成功掃描時間）存於 scan_days / watermarks。
+"""
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from thainews.company_index import INDEX_VERSION as COMPANY_INDEX_VERSION
+from thainews.company_index import CompanyIndex, mention_day, tag_companies
+from thainews.news_item import NewsItem
+from thainews.search_index import INDEX_VERSION, SearchIndex, term_frequencies
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    date TEXT NOT NULL DEFAULT '',
+    published_ts REAL,
+    source TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    saved_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_news_link ON news(link);
+CREATE INDEX IF NOT EXISTS idx_news_published ON news(published_ts);
+CREATE INDEX IF NOT EXISTS idx_news_category ON news(category);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scan_results (
+    mode TEXT NOT NULL,
+    keyword TEXT NOT NULL DEFAULT '',
+    days INTEGER NOT NULL,
+    output_text TEXT NOT NULL,
+    news_json TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    PRIMARY KEY (mode, keyword, days)
+);
+CREATE TABLE IF NOT EXISTS scan_days (
+    mode TEXT NOT NULL,
+    keyword TEXT NOT NULL DEFAULT '',
+    day TEXT NOT NULL,
+    template TEXT NOT NULL,
+    complete INTEGER NOT NULL,
+    items_json TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (mode, keyword, day, template)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    mode TEXT NOT NULL,
+    keyword TEXT NOT NULL DEFAULT '',
+    last_scan_at REAL NOT NULL,
+    PRIMARY KEY (mode, keyword)
+);
+"""
+
+NEWS_COLUMNS = ("title", "link", "date", "source", "category")
+
+_SQL_CHUNK = 500  # 單一 IN (...) 查詢的參數上限
+SCAN_DAYS_KEEP = 31  # 增量搜尋保留的逐日結果天數（涵蓋最長的 1月 範圍）
+
+# list_news 可用的排序方式
+ORDER_BY = {
+    "saved": "n.id DESC",                                # 最新存入
+    "newest": "n.published_ts DESC, n.id DESC",          # 最新發布
+    "oldest": "n.published_ts IS NULL, n.published_ts ASC, n.id ASC",  # 最早發布
+    "source": "n.source COLLATE NOCASE, n.published_ts DESC",
+}
+
+
+def parse_timestamp(date_str):
+    """RFC-822 日期字串轉 epoch 秒數；無法解析回傳 None"""
+    if not date_str:
+        return None
+    try:
+        return parsedate_to_datetime(date_str).timestamp()
+    except Exception:
+        return None
+
+
+class NewsStore:
+    """歷史新聞的存取介面（每次操作各自連線，可跨執行緒／程序使用）"""
+
+    def __init__(self, path="news_data.db", legacy_json="news_data.json"):
+        self.path = path
+        self.index = SearchIndex()
+        self.companies = CompanyIndex()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # 舊版資料庫尚無索引（或索引格式、台商清單已變更）時整批重建
+            for index, key, current in ((self.index, "search_index_version", INDEX_VERSION),
+                                        (self.companies, "company_index_version", COMPANY_INDEX_VERSION)):
+                index.ensure_schema(conn)
+                version = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+                if not version or version[0] != current:
+                    index.rebuild(conn)
+                    self._set_meta(conn, key, current)
+        if legacy_json:
+            self.migrate_legacy_json(legacy_json)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def upsert_many(self, items):
+        """
+        批次寫入新聞（NewsItem）；link 已存在者僅更新標題、來源與日期（保留原類別與存檔順序）。
+        回傳新增的筆數。
+        """
+        now = time.time()
+        rows = [
+            (item.link, item.title, item.date, item.published_ts, item.source, item.category, now)
+            for item in items if item.link
+        ]
+        # 索引詞與提到的台商在寫入交易外先算好（同 link 以最後一筆為準，與 upsert 結果一致）
+        terms = {row[0]: term_frequencies(row[1], row[4]) for row in rows}
+        mentions = {row[0]: (mention_day(row[3], now), tag_companies(row[1])) for row in rows}
+        with self._connect() as conn:
+            before = self.index.doc_count(conn)
+            conn.executemany("""
+                INSERT INTO news (link, title, date, published_ts, source, category, saved_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET
+                    title = excluded.title,
+                    date = excluded.date,
+                    published_ts = excluded.published_ts,
+                    source = excluded.source
+            """, rows)
+            after = self.index.doc_count(conn)
+            links = [row[0] for row in rows]
+            for i in range(0, len(links), _SQL_CHUNK):
+                chunk = links[i:i + _SQL_CHUNK]
+                ids = conn.execute(
+                    f"SELECT id, link FROM news WHERE link IN ({', '.join('?' * len(chunk))})", chunk,
+                ).fetchall()
+                self.index.index_terms(conn, [(news_id, terms[link]) for news_id, link in ids])
+                self.companies.tag(conn, [(news_id, *mentions[link]) for news_id, link in ids])
+            self._set_meta(conn, "timestamp", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        return after - before
+
+    def apply_retention(self, max_items=None, max_age_days=None):
+        """依筆數上限（保留最新存入者）或發布天數裁切舊資料，回傳刪除筆數"""
+        deleted = 0
+        with self._connect() as conn:
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                deleted += conn.execute(
+                    "DELETE FROM news WHERE COALESCE(published_ts, saved_at) < ?", (cutoff,)
+                ).rowcount
+            if max_items is not None:
+                deleted += conn.execute("""
+                    DELETE FROM news WHERE id <= (
+                        SELECT id FROM news ORDER BY id DESC LIMIT 1 OFFSET ?
+                    )
+                """, (max_items,)).rowcount
+        return deleted
+
+    @staticmethod
+    def _filters(categories=None, since_ts=None, until_ts=None):
+        """組出作用於 news 別名 n 的過濾條件"""
+        clauses, params = [], []
+        if categories:
+            clauses.append(f"n.category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        if since_ts is not None:
+            clauses.append("n.published_ts >= ?")
+            params.append(since_ts)
+        if until_ts is not None:
+            clauses.append("n.published_ts < ?")
+            params.append(until_ts)
+        return " AND ".join(clauses), params
+
+    def list_news(self, limit=None, offset=0, categories=None, since_ts=None, until_ts=None, order="saved"):
+        """列出新聞 dict（預設依存入順序新→舊），可依類別與發布時間過濾並分頁"""
+        where, params = self._filters(categories, since_ts, until_ts)
+        sql = f"SELECT {', '.join(NEWS_COLUMNS)} FROM news n"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {ORDER_BY[order]}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(zip(NEWS_COLUMNS, row)) for row in rows]
+
+    def search(self, query, limit=50, offset=0, categories=None, since_ts=None, until_ts=None):
+        """全文檢索標題與來源，依相關度排序；回傳 (新聞 dict 列表, 符合總數)"""
+        where, params = self._filters(categories, since_ts, until_ts)
+        with self._connect() as conn:
+            rows, total = self.index.search(conn, query, NEWS_COLUMNS, where, params, limit, offset)
+        return [dict(zip(NEWS_COLUMNS, row)) for row in rows], total
+
+    def iter_rows(self, columns=NEWS_COLUMNS, chunk_size=10000):
+        """依存入順序分批讀出新聞欄位，每批為最多 chunk_size 筆 tuple 的列表（供匯出時不必一次載入全部）"""
+        with self._connect() as conn:
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM news ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    def company_news(self, company, since_day=None):
+        """歷史庫中提到該台商的新聞 dict（含 published_ts，新→舊）；since_day（YYYY-MM-DD）限制最早日期"""
+        columns = NEWS_COLUMNS + ("published_ts",)
+        with self._connect() as conn:
+            rows = self.companies.news(conn, company, columns, since_day or "")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def company_day_counts(self, company, since_day=None):
+        """歷史庫中提到該台商的每日篇數 {YYYY-MM-DD: 篇數}"""
+        with self._connect() as conn:
+            return self.companies.day_counts(conn, company, since_day or "")
+
+    def company_totals(self, since_day=None):
+        """各台商在歷史庫中被提到的篇數 {台商: 篇數}（沒有提到的台商不在結果中）"""
+        with self._connect() as conn:
+            return self.companies.totals(conn, since_day or "")
+
+    def categories(self):
+        """目前歷史庫中出現過的類別（依筆數多→少）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT category FROM news GROUP BY category ORDER BY COUNT(*) DESC"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, categories=None, since_ts=None, until_ts=None):
+        """符合過濾條件的新聞筆數"""
+        where, params = self._filters(categories, since_ts, until_ts)
+        sql = "SELECT COUNT(*) FROM news n" + (f" WHERE {where}" if where else "")
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def last_updated(self):
+        """上次寫入時間字串；從未寫入回傳 None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'timestamp'").fetchone()
+        return row[0] if row else None
+
+    def save_scan_result(self, mode, keyword, days, output_text, news_items):
+        """保存一次完整搜尋的 prompt 與新聞列表（同條件只保留最新一次）"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scan_results VALUES (?, ?, ?, ?, ?, ?)",
+                (mode, keyword or "", days, output_text,
+                 json.dumps(news_items, ensure_ascii=False), time.time()),
+            )
+
+    def load_scan_result(self, mode, keyword, days):
+        """讀取最近一次的搜尋結果 dict(output_text, news_list, refreshed_at)；沒有則回傳 None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT output_text, news_json, refreshed_at FROM scan_results "
+                "WHERE mode = ? AND keyword = ? AND days = ?",
+                (mode, keyword or "", days),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"output_text": row[0], "news_list": json.loads(row[1]), "refreshed_at": row[2]}
+
+    def load_watermark(self, mode, keyword, since_day=None):
+        """
+        增量搜尋的水位：dict(last_scan_at, complete_days)，complete_days 為 {日期: 已完整抓取的模板名稱集合}；
+        從未掃描回傳 None。since_day（YYYY-MM-DD）限制只讀取該日之後的日期。
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT last_scan_at FROM watermarks WHERE mode = ? AND keyword = ?",
+                               (mode, keyword or "")).fetchone()
+            if row is None:
+                return None
+            rows = conn.execute(
+                "SELECT day, template FROM scan_days WHERE mode = ? AND keyword = ? AND complete = 1 AND day >= ?",
+                (mode, keyword or "", since_day or ""),
+            ).fetchall()
+        complete_days = {}
+        for day, template in rows:
+            complete_days.setdefault(day, set()).add(template)
+        return {"last_scan_at": row[0], "complete_days": complete_days}
+
+    def load_scan_days(self, mode, keyword, days):
+        """讀取指定日期（YYYY-MM-DD 列表）各模板已過濾的新聞：{(日期, 模板名稱): [新聞 dict]}"""
+        result = {}
+        days = list(days)
+        with self._connect() as conn:
+            for i in range(0, len(days), _SQL_CHUNK):
+                chunk = days[i:i + _SQL_CHUNK]
+                rows = conn.execute(
+                    f"SELECT day, template, items_json FROM scan_days WHERE mode = ? AND keyword = ? "
+                    f"AND day IN ({', '.join('?' * len(chunk))})",
+                    [mode, keyword or ""] + chunk,
+                ).fetchall()
+                for day, template, items_json in rows:
+                    result[(day, template)] = json.loads(items_json)
+        return result
+
+    def save_scan_days(self, mode, keyword, slots, scanned_at=None, keep_days=SCAN_DAYS_KEEP):
+        """
+        保存一次搜尋實際抓取的各日各模板結果並更新水位；超過 keep_days 的舊日期一併刪除。
+        :param slots: [(日期, 模板名稱, 是否完整, [新聞 dict])]
+        """
+        scanned_at = scanned_at or time.time()
+        oldest = datetime.fromtimestamp(scanned_at - keep_days * 86400).strftime('%Y-%m-%d')
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scan_days VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(mode, keyword or "", day, template, int(complete),
+                  json.dumps(items, ensure_ascii=False), scanned_at)
+                 for day, template, complete, items in slots],
+            )
+            conn.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)", (mode, keyword or "", scanned_at))
+            conn.execute("DELETE FROM scan_days WHERE mode = ? AND keyword = ? AND day < ?",
+                         (mode, keyword or "", oldest))
+
+    def migrate_legacy_json(self, json_path):
+        """一次性匯入舊版 news_data.json（已匯入或檔案不存在則略過）"""
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone():
+                return 0
+        imported = 0
+        if os.path.exists(json_path):
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+            # 舊檔最新的在最前面，反向寫入以保持相同的新→舊順序
+            imported = self.upsert_many(NewsItem.from_dict(d) for d in reversed(data.get("news_list", [])))
+            if data.get("timestamp"):
+                with self._connect() as conn:
+                    self._set_meta(conn, "timestamp", data["timestamp"])
+        with self._connect() as conn:
+            self._set_meta(conn, "legacy_migrated", json_path)
+        return imported
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
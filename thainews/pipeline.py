@@ -0,0 +1,624 @@
+"""
+搜尋流程核心（不依賴 Streamlit）：產生來源、抓取、過濾、去重、組出 prompt 並存入歷史庫。
+
+進度透過回呼函式回報，Streamlit 介面與背景預抓程式共用同一套流程。
+"""
+import time
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta
+
+from thainews.batch import LANGS, build_batch_templates, company_category, match_companies
+from thainews.config import COMPANY_MAP, DATE_MAP, PROMPT_TOKEN_BUDGET, SCAN_SHARE_TTL, VIP_QUERY_CN, VIP_QUERY_EN
+from thainews.dedupe import cluster_news
+from thainews.metrics import (
+    CACHE_STORED, REJECT_DATE, REJECT_DUPLICATE, REJECT_DUPLICATE_LINK, REJECT_NEAR_DUPLICATE, REJECT_RELEVANCE,
+    ScanMetrics,
+)
+from thainews.news_item import NewsItem
+from thainews.planner import FEED_ITEM_CAP, SATURATION_RATIO, DailyPlanner, make_planner, window_source
+from thainews.prompt import estimate_tokens, render_news
+from thainews.relevance import get_matcher
+from thainews.singleflight import SingleFlight
+
+DAILY_PROMPT_LIMIT = 10  # 不設 token 預算時，每天每類別最多放入 prompt 的篇數
+MAX_NEWS_ITEMS = 5000    # 歷史上限，避免無限增長
+
+# 共用搜尋的結果：result 為 run_scan / run_company_batch 的回傳值，shared 表示結果來自其他呼叫
+ScanResult = namedtuple("ScanResult", "result stats metrics shared")
+
+# 整個程序共用（Streamlit 各工作階段都在同一程序內）
+SCANS = SingleFlight(ttl=SCAN_SHARE_TTL)
+
+
+def days_label(days):
+    """天數轉回介面使用的標籤（如 7 → 1週）"""
+    return next((label for label, value in DATE_MAP.items() if value == days), f"{days}天")
+
+
+def is_relevant(title, mode, custom_keyword=None):
+    """檢查標題是否與搜尋模式相關（比對器依模式與關鍵字預先編譯並快取）"""
+    return get_matcher(mode, custom_keyword).is_relevant(title)
+
+
+def build_query_templates(mode, custom_keyword=None):
+    """
+    依搜尋模式產生查詢模板列表。
+    每個模板包含 name、query、hl/gl/ceid 參數，日期過濾由呼叫端填入。
+    """
+    templates = []
+
+    if mode == "company" and custom_keyword:
+        # 個別台商模式：泰國當地名 + 母公司名 + 英文名
+        info = COMPANY_MAP.get(custom_keyword, {})
+        thai_cn = info.get("thai_cn", custom_keyword)
+        tw_cn = info.get("tw_cn", custom_keyword)
+        en_name = info.get("en", custom_keyword)
+        set_ticker = info.get("set", "")
+
+        # 組合所有名稱變體（去重）
+        cn_names = list(dict.fromkeys([thai_cn, tw_cn]))  # 保序去重
+        cn_or = "+OR+".join(f"%22{n}%22" for n in cn_names)
+        en_encoded = en_name.replace(" ", "+")
+
+        # 中文查詢：泰國 + (泰達電 OR 台達電 OR "Delta Electronics Thailand")
+        cn_query = f"泰國+{cn_or}+OR+%22{en_encoded}%22"
+        # 英文查詢：Thailand + "Delta Electronics Thailand" OR 泰達電 OR 台達電
+        en_query = f"Thailand+%22{en_encoded}%22+OR+{cn_or}"
+
+        # 若有泰交所代碼，額外加入
+        if set_ticker:
+            cn_query += f"+OR+%22{set_ticker}%22"
+            en_query += f"+OR+%22{set_ticker}%22"
+
+        templates.extend([
+            {"name": f"🏭 {custom_keyword} (中)", "query": cn_query,
+             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+            {"name": f"🏭 {custom_keyword} (EN)", "query": en_query,
+             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
+        ])
+    elif mode == "custom" and custom_keyword:
+        kw_stripped = custom_keyword.strip()
+        # 多詞關鍵字用引號包裹，確保搜尋完整片語（如 "Siam AI"）
+        if " " in kw_stripped:
+            clean_keyword = f"%22{kw_stripped.replace(' ', '+')}%22"
+        else:
+            clean_keyword = kw_stripped.replace(" ", "+")
+        templates.extend([
+            {"name": f"🔍 深度追蹤: {custom_keyword} (中)", "query": clean_keyword,
+             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+            {"name": f"🔍 深度追蹤: {custom_keyword} (EN)", "query": clean_keyword,
+             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
+        ])
+    elif mode == "macro":
+        templates.extend([
+            {"name": "🇹🇭 泰國整體 (中)", "query": "泰國",
+             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+            {"name": "🇹🇭 泰國整體 (EN)", "query": "Thailand",
+             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
+            {"name": "🇹🇼 台泰關係 (中)", "query": "泰國+台灣+OR+%22台商%22",
+             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+            {"name": "🇹🇼 台泰關係 (EN)", "query": "Thailand+Taiwan+OR+%22Taiwanese+investment%22",
+             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
+        ])
+    elif mode == "industry":
+        templates.extend([
+            {"name": "🔌 PCB製造 (中)", "query": "泰國+%22PCB%22+OR+%22印刷電路板%22+OR+%22電子製造%22",
+             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+            {"name": "🔌 PCB製造 (EN)", "query": "Thailand+%22printed+circuit+board%22+OR+%22PCB+manufacturing%22+OR+%22electronics+manufacturing%22",
+             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
+        ])
+    elif mode == "vip":
+        templates.extend([
+            {"name": "🏢 台商動態 (中)", "query": f"泰國+OR+{VIP_QUERY_CN}",
+             "hl": "zh-TW", "gl": "TW", "ceid": "TW:zh-Hant"},
+            {"name": "🏢 台商動態 (EN)", "query": f"Thailand+PCB+OR+{VIP_QUERY_EN}",
+             "hl": "en-TH", "gl": "TH", "ceid": "TH:en"},
+        ])
+
+    return templates
+
+
+def get_rss_sources(days, mode="all", custom_keyword=None):
+    """
+    產生 RSS 來源列表，逐日拆分請求以確保每天都能獨立抓取。
+    :param days: 天數 (int)
+    """
+    return DailyPlanner(build_query_templates(mode, custom_keyword), days).initial_sources()
+
+
+def filter_entries(entries, source, days_int, search_mode, custom_keyword=None, metrics=None):
+    """對單一來源的條目建立 NewsItem 並套用日期與相關性過濾（不含跨來源的標題去重）"""
+    matcher = get_matcher(search_mode, custom_keyword)
+    # 相關性過濾：標題須包含至少一個模式關鍵字
+    return _filter_source(entries, source, days_int, lambda item: matcher.is_relevant_lower(item.title_lower),
+                          metrics)
+
+
+def _filter_source(entries, source, days_int, accept, metrics=None):
+    """先建立 NewsItem 並過濾日期，再以 accept(item) 過濾相關性；兩階段分別計時並記錄排除數"""
+    category = source.get('category', source['name'])
+    cutoff = date_cutoff(days_int)
+    entries = entries or []
+    start = time.perf_counter()
+    dated = []
+    for entry in entries:
+        item = NewsItem.from_entry(entry, category)
+        if is_within_date_range(item.published_ts, cutoff):
+            dated.append(item)
+    mid = time.perf_counter()
+    items = [item for item in dated if accept(item)]
+    if metrics:
+        metrics.add_stage("date_filter", mid - start)
+        metrics.add_stage("relevance_filter", time.perf_counter() - mid)
+        metrics.count(source, **{REJECT_DATE: len(entries) - len(dated), REJECT_RELEVANCE: len(dated) - len(items)})
+    return items
+
+
+def date_cutoff(days):
+    """日期範圍的起點（epoch 秒）"""
+    return time.time() - days * 86400
+
+
+def is_within_date_range(published_ts, cutoff):
+    """檢查新聞發布時間是否在範圍內（無日期資訊或解析失敗則保留）"""
+    return published_ts is None or published_ts >= cutoff
+
+
+def build_topic_desc(days_label, days_int, search_mode, custom_keyword=None):
+    """組出 prompt 開頭的分析主題描述"""
+    # 計算實際日期範圍，避免「1月」被誤解為「一月份」
+    date_end = datetime.now().strftime('%Y-%m-%d')
+    date_start = (datetime.now() - timedelta(days=days_int)).strftime('%Y-%m-%d')
+    date_range_str = f"近 {days_label}（{date_start} ~ {date_end}）"
+
+    if search_mode == "company":
+        info = COMPANY_MAP.get(custom_keyword, {})
+        en_name = info.get("en", custom_keyword)
+        tw_cn = info.get("tw_cn", "")
+        label_parts = [custom_keyword]
+        if tw_cn and tw_cn != custom_keyword:
+            label_parts.append(tw_cn)
+        label_parts.append(en_name)
+        return f"{date_range_str} {'／'.join(label_parts)} 泰國動態"
+    if search_mode == "custom":
+        return f"關鍵字【{custom_keyword}】{date_range_str}"
+    if search_mode == "macro":
+        return f"{date_range_str} 泰國整體與台泰關係"
+    if search_mode == "industry":
+        return f"{date_range_str} 泰國 PCB 與電子製造"
+    if search_mode == "vip":
+        return f"{date_range_str} 泰國重點台商"
+    return date_range_str
+
+
+def _collect(planner, cache, filter_source, on_status, on_progress, on_items=None, metrics=None):
+    """
+    依規劃抓取並逐來源過濾，回傳 [(source, items)]。
+    各來源結果先暫存，最後依來源順序（新日期在前、模板順序）排列，確保結果與完成順序無關。
+    """
+    live_seen = set()
+    live_count = 0
+    filtered_by_source = []
+
+    def _on_fetched(done, planned):
+        on_progress(done / planned)
+
+    for source, entries in planner.run(cache=cache, on_fetched=_on_fetched, metrics=metrics):
+        items = filter_source(entries, source)
+        filtered_by_source.append((source, items))
+
+        fresh = [item for item in items if item.title not in live_seen]
+        live_seen.update(item.title for item in fresh)
+        live_count += len(fresh)
+        on_status(f"📡 已完成 {planner.requests} 個請求，取得 {live_count} 則新聞...")
+        if fresh and on_items:
+            on_items([item.to_dict() for item in fresh])
+
+    filtered_by_source.sort(key=lambda pair: pair[0]["order"])
+    return filtered_by_source
+
+
+def _resolve_links(resolver, filtered_by_source, stats, metrics):
+    """將各來源新聞的 Google News 轉址連結換成原始網址（見 thainews.links），去重與存檔都以原始網址為準"""
+    if resolver is None:
+        return
+    with metrics.stage("link_resolve"):
+        report = resolver.canonicalize([item for _, items in filtered_by_source for item in items])
+    if stats is not None:
+        stats["links"] = report
+
+
+def _fill_stats(stats, planner):
+    if stats is not None:
+        stats.update(requests=planner.requests, fixed_plan_requests=planner.fixed_plan_requests,
+                     saved_requests=planner.saved_requests, splits=planner.splits,
+                     failed_sources=[source["name"] for source in planner.failed])
+
+
+def build_output(days_label, days_int, search_mode, custom_keyword, categories, filtered_by_source, metrics=None,
+                 token_budget=PROMPT_TOKEN_BUDGET, stats=None):
+    """
+    由各來源過濾後的 NewsItem 組出 (output_text, news_items)，news_items 為排序並分群後的 NewsItem。
+    :param categories: 類別名稱（決定 prompt 中的類別順序）
+    :param filtered_by_source: 依來源順序排列的 [(source, items)]
+    :param metrics: ScanMetrics，記錄去重、排序、組 prompt 的耗時，以及各來源保留與排除的條目數
+    :param token_budget: prompt 的 token 預算（見 thainews.prompt）；None 則改為每天每類別 DAILY_PROMPT_LIMIT 篇
+    :param stats: 提供 dict 時填入 prompt（估計 token 數、放入與省略的篇數）
+    """
+    metrics = metrics or ScanMetrics()
+    news_items_for_json = []
+    source_of = {}  # id(NewsItem) → 來源，用於把 prompt 階段的排除數記回來源
+
+    topic_desc = build_topic_desc(days_label, days_int, search_mode, custom_keyword)
+    header = f"""請扮演一位資深的「產業分析師」，分析【{topic_desc}】。
+
+## 任務
+1. 從以下新聞標題中，挑出 **10-15 則最重要的新聞**，說明為何重要
+2. 歸納本期 **3-5 大關鍵趨勢**
+3. 提出 **機會與風險** 評估
+4. 如有特別重要的新聞需要深入了解，請自行上網搜尋該新聞的詳細內容
+
+請用**繁體中文**，以 **Markdown** 條列式輸出，風格需專業且易讀。
+
+========= 以下是新聞標題庫 ({datetime.now().strftime('%Y-%m-%d')}) =========
+"""
+
+    # 按類別收集結果（去除日期後歸類），類別順序依模板順序，標題與連結去重依來源順序
+    seen_titles = set()
+    seen_links = set()
+    category_entries = OrderedDict((name, []) for name in categories)
+    with metrics.stage("dedupe"):
+        for source, items in filtered_by_source:
+            kept = same_link = 0
+            for item in items:
+                if item.title in seen_titles:
+                    continue
+                if item.link and item.link_hash in seen_links:
+                    same_link += 1
+                    continue
+                seen_titles.add(item.title)
+                seen_links.add(item.link_hash)
+                category_entries.setdefault(item.category, []).append(item)
+                source_of[id(item)] = source
+                kept += 1
+            metrics.count(source, kept=kept, **{REJECT_DUPLICATE: len(items) - kept - same_link,
+                                                REJECT_DUPLICATE_LINK: same_link})
+
+    with metrics.stage("sort"):
+        for entries in category_entries.values():
+            # 依日期排序（新→舊），全部納入顯示與儲存
+            entries.sort(key=lambda item: item.published_ts or 0, reverse=True)
+            news_items_for_json.extend(entries)
+
+    # 近似重複分群：同一則新聞被多家轉載時只保留最先出現的代表放入 prompt
+    with metrics.stage("dedupe"):
+        cluster_news(news_items_for_json)
+    for item in news_items_for_json:
+        if item.duplicate_of is not None:
+            metrics.count(source_of[id(item)], **{REJECT_NEAR_DUPLICATE: 1})
+
+    prompt_start = time.perf_counter()
+    footer = "\n========= 資料結束 ========="
+    body, report = render_news(
+        category_entries, token_budget, get_matcher(search_mode, custom_keyword), DAILY_PROMPT_LIMIT,
+        reserved_tokens=estimate_tokens(header) + estimate_tokens(footer),
+        on_drop=lambda item, reason: metrics.count(source_of[id(item)], **{reason: 1}),
+    )
+    output_text = "".join([header, body, footer])
+    if stats is not None:
+        stats["prompt"] = report
+    metrics.add_stage("prompt_build", time.perf_counter() - prompt_start)
+    return output_text, news_items_for_json
+
+
+def _save(store, search_mode, custom_keyword, days_int, output_text, news_items, news_dicts, metrics, slots=None,
+          partial=False):
+    """
+    累積歷史資料：批次 upsert 進 SQLite，超過上限則裁切最舊的資料；同時保存本次結果供其他使用者直接讀取。
+    slots 為本次實際抓取的逐日結果（見 fetched_slots），供之後的增量搜尋沿用。
+    partial（有來源抓取失敗）時不保存本次結果，下次點選會重新掃描（增量搜尋只補抓失敗的部分）。
+    """
+    if store is None:
+        return
+    try:
+        with metrics.stage("history_save"):
+            store.upsert_many(news_items)
+            store.apply_retention(max_items=MAX_NEWS_ITEMS)
+            if not partial:
+                store.save_scan_result(search_mode, custom_keyword, days_int, output_text, news_dicts)
+            if slots:
+                store.save_scan_days(search_mode, custom_keyword, slots)
+    except Exception as e:
+        print(f"存檔失敗: {e}")
+
+
+def _day_of(item, start, end):
+    """新聞歸屬的查詢日期：發布時間的本地日期，落在區間外（時區差）或無日期者歸到區間內最近的一天"""
+    last_day = end - timedelta(days=1)
+    if item.published_ts is None:
+        return last_day
+    return min(max(datetime.fromtimestamp(item.published_ts).date(), start), last_day)
+
+
+def fetched_slots(filtered_by_source, failed, today):
+    """
+    將實際抓取成功的區間拆成逐日逐模板的結果：[(日期, 模板名稱, 是否完整, [新聞 dict])]。
+    抓取時已經結束的日期（今天以前）視為完整，之後的增量搜尋不再重抓。
+    """
+    slots = []
+    for source, items in filtered_by_source:
+        if source["name"] in failed:
+            continue
+        start, end = source["window"]
+        by_day = OrderedDict((start + timedelta(days=i), []) for i in range((end - start).days))
+        for item in items:
+            by_day[_day_of(item, start, end)].append(item.to_dict())
+        slots += [(day.isoformat(), source["category"], day < today, day_items) for day, day_items in by_day.items()]
+    return slots
+
+
+def _stored_sources(store, search_mode, custom_keyword, templates, days_int, today, metrics):
+    """
+    讀取歷史庫中範圍內已完整抓取的日期（所有模板都完整才算），回傳 (日期集合, [(source, items)])；
+    每個日期與模板還原為一個逐日來源，並以本次的日期範圍重新過濾。
+    """
+    first_day = today - timedelta(days=days_int - 1)
+    watermark = store.load_watermark(search_mode, custom_keyword, first_day.isoformat())
+    if not watermark:
+        return set(), []
+    names = {tmpl["name"] for tmpl in templates}
+    days = [first_day + timedelta(days=i) for i in range(days_int)]
+    days = [day for day in days if names <= watermark["complete_days"].get(day.isoformat(), set())]
+    stored = store.load_scan_days(search_mode, custom_keyword, [day.isoformat() for day in days])
+    cutoff = date_cutoff(days_int)
+    sources = []
+    for day in days:
+        for i, tmpl in enumerate(templates):
+            source = window_source(tmpl, i, day, day + timedelta(days=1))
+            items = [NewsItem.from_dict(d) for d in stored.get((day.isoformat(), tmpl["name"]), [])]
+            items = [item for item in items if is_within_date_range(item.published_ts, cutoff)]
+            metrics.update_source(source, cache=CACHE_STORED, entries=len(items))
+            sources.append((source, items))
+    return set(days), sources
+
+
+def _indexed_sources(store, company, templates, days_int, today, metrics):
+    """
+    台商索引中範圍內提到該台商的新聞（多半由其他模式的搜尋存入），依日期與語言還原為逐日來源 [(source, items)]。
+    類別改為個別台商模式的名稱；來源名稱標註歷史庫，與實際抓取的同日來源分開計數。
+    """
+    first_day = today - timedelta(days=days_int - 1)
+    end = today + timedelta(days=1)
+    cutoff = date_cutoff(days_int)
+    tmpl_of = {tmpl["name"]: (i, tmpl) for i, tmpl in enumerate(templates)}
+    by_slot = OrderedDict()
+    for data in store.company_news(company, first_day.isoformat()):
+        item = NewsItem.from_dict(data)
+        if not is_within_date_range(item.published_ts, cutoff):
+            continue
+        lang = "EN" if item.category.endswith("(EN)") else LANGS[0]["lang"]
+        item.category = company_category(company, lang)
+        by_slot.setdefault((_day_of(item, first_day, end), item.category), []).append(item)
+    sources = []
+    for (day, category), items in by_slot.items():
+        i, tmpl = tmpl_of[category]
+        source = window_source(tmpl, i, day, day + timedelta(days=1))
+        source["name"] += "（歷史庫）"
+        metrics.update_source(source, cache=CACHE_STORED, entries=len(items))
+        sources.append((source, items))
+    return sources
+
+
+def run_company_history(days_label, days_int, company, store, token_budget=PROMPT_TOKEN_BUDGET, stats=None,
+                        metrics=None):
+    """
+    只讀歷史庫（不連網）組出個別台商的結果：已完整抓取的逐日結果，加上台商索引中其他搜尋存入的新聞。
+    回傳格式同 run_scan；stats 填入 reused_days、indexed（索引補入的篇數）與 missing_days（尚未完整、需補抓的日期）。
+    """
+    metrics = metrics or ScanMetrics("company", company, days_int)
+    templates = build_query_templates("company", company)
+    today = datetime.now().date()
+    reused_days, stored_sources = _stored_sources(store, "company", company, templates, days_int, today, metrics)
+    indexed_sources = _indexed_sources(store, company, templates, days_int, today, metrics)
+    sources = sorted(stored_sources + indexed_sources, key=lambda pair: pair[0]["order"])
+    output_text, news_items = build_output(days_label, days_int, "company", company,
+                                           [tmpl["name"] for tmpl in templates], sources, metrics, token_budget, stats)
+    if stats is not None:
+        days = [today - timedelta(days=i) for i in range(days_int)]
+        stats.update(reused_days=len(reused_days), indexed=sum(len(items) for _, items in indexed_sources),
+                     missing_days=[day.isoformat() for day in days if day not in reused_days])
+    return output_text, [item.to_dict() for item in news_items]
+
+
+def run_scan(days_label, days_int, search_mode, custom_keyword=None, cache=None, store=None,
+             on_status=None, on_progress=None, on_items=None, adaptive=True, stats=None, metrics=None,
+             incremental=True, token_budget=PROMPT_TOKEN_BUDGET, resolver=None):
+    """
+    執行一次完整搜尋，回傳 (output_text, news_items)。
+    :param cache: FeedCache，None 則每次皆連網
+    :param store: NewsStore，提供時會寫入歷史庫與本次的搜尋結果
+    :param incremental: 有 store 時沿用歷史庫中已完整抓取的日期，只抓取未完整或更新的日期；
+                        個別台商模式另外併入台商索引中其他搜尋存入的新聞
+    :param token_budget: prompt 的 token 預算，None 則每天每類別固定篇數（見 build_output）
+    :param resolver: thainews.links.LinkResolver，提供時將轉址連結換成原始網址後再去重與存檔
+    :param on_status: on_status(text) 狀態文字
+    :param on_progress: on_progress(fraction) 完成比例 0~1
+    :param on_items: on_items(items) 每個來源完成時新增（未重複）的新聞，供即時預覽
+    :param adaptive: True 使用自適應日期區間，False 固定逐日拆分
+    :param stats: 提供 dict 時填入 requests（實際請求數）、fixed_plan_requests、saved_requests、splits、
+                  failed_sources（重試後仍失敗的來源名稱）、reused_days（沿用歷史庫的天數）、
+                  indexed（台商索引併入的篇數）、prompt（估計 token 數與省略篇數）、
+                  links（轉址連結還原數，提供 resolver 時）
+    :param metrics: ScanMetrics，記錄各階段耗時與各來源的條目數（見 thainews.metrics）
+    """
+    on_status = on_status or (lambda text: None)
+    on_progress = on_progress or (lambda fraction: None)
+    metrics = metrics or ScanMetrics(search_mode, custom_keyword, days_int)
+    scan_start = time.perf_counter()
+
+    templates = build_query_templates(search_mode, custom_keyword)
+    today = datetime.now().date()
+    reused_days, stored_sources, indexed_sources = set(), [], []
+    if store is not None and incremental:
+        reused_days, stored_sources = _stored_sources(store, search_mode, custom_keyword, templates, days_int,
+                                                      today, metrics)
+        if search_mode == "company":
+            indexed_sources = _indexed_sources(store, custom_keyword, templates, days_int, today, metrics)
+    planner = make_planner(templates, days_int, adaptive, today, reused_days)
+    plan_desc = "自適應區間" if adaptive else "逐日拆分"
+    if reused_days:
+        plan_desc += f"，沿用已完整的 {len(reused_days)} 天"
+    on_status(f"📡 正在平行掃描 {len(templates)} 組查詢（{plan_desc}）...")
+
+    filtered_by_source = _collect(
+        planner, cache,
+        lambda entries, source: filter_entries(entries, source, days_int, search_mode, custom_keyword, metrics),
+        on_status, on_progress, on_items, metrics,
+    )
+    # 歷史庫沿用的新聞也一併還原（先前未還原者多半已在快取中）
+    _resolve_links(resolver, filtered_by_source + stored_sources + indexed_sources, stats, metrics)
+    failed = {source["name"] for source in planner.failed}
+    slots = fetched_slots(filtered_by_source, failed, today) if store is not None else None
+    if stored_sources or indexed_sources:
+        # 同一天實際抓取的來源排在歷史庫之前，標題與連結去重時優先保留
+        filtered_by_source = sorted(filtered_by_source + stored_sources + indexed_sources,
+                                    key=lambda pair: pair[0]["order"])
+    _fill_stats(stats, planner)
+    if stats is not None:
+        stats["reused_days"] = len(reused_days)
+        stats["indexed"] = sum(len(items) for _, items in indexed_sources)
+
+    output_text, news_items = build_output(
+        days_label, days_int, search_mode, custom_keyword,
+        [tmpl["name"] for tmpl in templates], filtered_by_source, metrics, token_budget, stats,
+    )
+    news_items_for_json = [item.to_dict() for item in news_items]
+    _save(store, search_mode, custom_keyword, days_int, output_text, news_items, news_items_for_json, metrics,
+          slots, partial=bool(failed))
+    metrics.wall_seconds = time.perf_counter() - scan_start
+    return output_text, news_items_for_json
+
+
+def run_company_batch(days_label, days_int, companies=None, cache=None, store=None,
+                      on_status=None, on_progress=None, adaptive=True, stats=None, metrics=None,
+                      token_budget=PROMPT_TOKEN_BUDGET, resolver=None):
+    """
+    批次掃描多家台商：數家共用一組 OR 查詢，回傳的新聞依個別台商模式的相關性規則分派。
+    回傳 OrderedDict {台商: (output_text, news_items)}，內容與逐一執行 run_scan("company") 相同格式；
+    提供 store 時每家台商的結果都會存為個別台商模式的搜尋結果與逐日結果（之後點選個別台商只需補抓未完整的日期）；
+    回傳達上限（可能被截斷）的批次區間不記入逐日結果，這些日期仍由個別台商查詢補抓。
+    metrics 中同一則新聞分派給多家台商時，保留與排除數會分別計入。resolver 同 run_scan。
+    """
+    on_status = on_status or (lambda text: None)
+    on_progress = on_progress or (lambda fraction: None)
+    metrics = metrics or ScanMetrics("company_batch", None, days_int)
+    scan_start = time.perf_counter()
+
+    companies = list(companies or COMPANY_MAP)
+    templates = build_batch_templates(companies)
+    today = datetime.now().date()
+    planner = make_planner(templates, days_int, adaptive, today)
+    on_status(f"📡 正在以 {len(templates)} 組批次查詢掃描 {len(companies)} 家台商...")
+
+    mentioned = {}  # id(NewsItem) → 標題提到的台商
+    saturated = set()  # 回傳達上限的來源名稱（單日區間無法再切分，可能有新聞被截斷）
+
+    def _filter(entries, source):
+        tmpl = templates[source["order"][1]]
+        if entries and len(entries) >= int(FEED_ITEM_CAP * SATURATION_RATIO):
+            saturated.add(source["name"])
+
+        def accept(item):
+            matched = match_companies(item.title_lower, tmpl["companies"])
+            if matched:
+                mentioned[id(item)] = matched
+            return bool(matched)
+
+        return _filter_source(entries, source, days_int, accept, metrics)
+
+    filtered_by_source = _collect(planner, cache, _filter, on_status, on_progress, metrics=metrics)
+    _fill_stats(stats, planner)
+    _resolve_links(resolver, filtered_by_source, stats, metrics)
+    if stats is not None:
+        # 比較基準改為逐一掃描每家台商（每家 2 個模板）的逐日請求數
+        stats["fixed_plan_requests"] = days_int * 2 * len(companies)
+        stats["saved_requests"] = stats["fixed_plan_requests"] - planner.requests
+
+    results = OrderedDict()
+    all_items = {}
+    company_slots = {}
+    failed = {source["name"] for source in planner.failed}
+    for name in companies:
+        # 依台商拆出各自的條目，類別改為個別台商模式的名稱（與個別台商模式的模板名稱相同）
+        per_company = []
+        for source, items in filtered_by_source:
+            category = company_category(name, templates[source["order"][1]]["lang"])
+            per_company.append((dict(source, category=category),
+                                [item.with_category(category) for item in items if name in mentioned[id(item)]]))
+        if store is not None:
+            # 只有本批包含該台商的模板才算該台商的逐日結果。飽和的區間由同批最多 BATCH_MAX_COMPANIES 家共用上限，
+            # 單一台商的新聞可能被截斷，不記為完整（與抓取失敗相同），之後點選個別台商會以個別查詢重抓這幾天
+            company_slots[name] = fetched_slots(
+                [pair for pair in per_company if name in templates[pair[0]["order"][1]]["companies"]],
+                failed | saturated, today)
+        categories = [company_category(name, lang["lang"]) for lang in LANGS]
+        output_text, news_items = build_output(days_label, days_int, "company", name, categories, per_company,
+                                               metrics, token_budget)
+        results[name] = (output_text, [item.to_dict() for item in news_items])
+        for item in news_items:
+            all_items.setdefault(item.link_hash, item)
+
+    if store is not None:
+        try:
+            with metrics.stage("history_save"):
+                store.upsert_many(all_items.values())
+                store.apply_retention(max_items=MAX_NEWS_ITEMS)
+                for name, (output_text, news_dicts) in results.items():
+                    if not planner.failed:
+                        store.save_scan_result("company", name, days_int, output_text, news_dicts)
+                    store.save_scan_days("company", name, company_slots[name])
+        except Exception as e:
+            print(f"存檔失敗: {e}")
+    metrics.wall_seconds = time.perf_counter() - scan_start
+    return results
+
+
+def scan_key(search_mode, custom_keyword, days_int, today=None):
+    """共用搜尋的鍵：(模式, 關鍵字, 天數, 日期)；跨日後自動視為不同的搜尋"""
+    return search_mode, custom_keyword, days_int, (today or date.today()).isoformat()
+
+
+def _shared(key, runner, force, on_status):
+    def scan():
+        stats = {}
+        metrics = ScanMetrics(key[0], key[1], key[2])
+        return runner(stats, metrics), stats, metrics
+
+    def on_wait():
+        if on_status:
+            on_status("⏳ 已有相同的搜尋正在進行，等待結果...")
+
+    (result, stats, metrics), shared = SCANS.run(key, scan, force=force, on_wait=on_wait)
+    return ScanResult(result, stats, metrics, shared)
+
+
+def shared_scan(days_label, days_int, search_mode, custom_keyword=None, force=False, on_status=None, **kwargs):
+    """
+    程序內共用的 run_scan：相同 (模式, 關鍵字, 天數, 日期) 同時只實際執行一次，其餘呼叫等待同一份結果；
+    完成的結果保留 SCAN_SHARE_TTL 秒，歷史庫也只由實際執行的一次寫入。
+    其餘參數同 run_scan，回呼只對實際執行的呼叫生效。回傳 ScanResult，result 為 (output_text, news_items)。
+    :param force: 忽略共用快取的結果重新掃描
+    """
+    def runner(stats, metrics):
+        return run_scan(days_label, days_int, search_mode, custom_keyword, on_status=on_status,
+                        stats=stats, metrics=metrics, **kwargs)
+
+    return _shared(scan_key(search_mode, custom_keyword, days_int), runner, force, on_status)
+
+
+def shared_company_batch(days_label, days_int, force=False, on_status=None, **kwargs):
+    """程序內共用的 run_company_batch（掃描全部台商），行為同 shared_scan"""
+    def runner(stats, metrics):
+        return run_company_batch(days_label, days_int, on_status=on_status, stats=stats, metrics=metrics, **kwargs)
+
+    return _shared(scan_key("company_batch", None, days_int), runner, force, on_status)
@@ -0,0 +1,153 @@
+"""
+查詢日期區間規劃。
+
+Google News RSS 每個 feed 最多只回傳約 100 則。固定逐日拆分（DailyPlanner）
+在冷門關鍵字上會浪費大量請求；AdaptivePlanner 先以整段期間查詢，只有回傳數量
+接近上限（可能被截斷）時才將區間對半切分重查，請求數隨實際新聞量而定。
+"""
+import time
+from datetime import datetime, timedelta
+
+from thainews.fetcher import iter_fetch
+from thainews.metrics import REJECT_WINDOW_SPLIT
+
+FEED_ITEM_CAP = 100       # Google News 單一 feed 的回傳上限
+SATURATION_RATIO = 0.9    # 回傳數量達上限的此比例即視為飽和（可能有新聞被截斷）
+EXCLUDE_SITES = "-site:msn.com+-site:aol.com"
+RSS_SEARCH_URL = "https://news.google.com/rss/search"
+
+
+def window_source(tmpl, tmpl_index, start, end):
+    """以 [start, end) 日期區間產生單一 RSS 來源"""
+    date_filter = (
+        f"after:{start.strftime('%Y-%m-%d')}"
+        f"+before:{end.strftime('%Y-%m-%d')}"
+        f"+{EXCLUDE_SITES}"
+    )
+    last_day = end - timedelta(days=1)
+    date_label = start.strftime('%m/%d')
+    if last_day != start:
+        date_label += f"-{last_day.strftime('%m/%d')}"
+    return {
+        "name": f"{tmpl['name']} {date_label}",
+        "url": (
+            f"{RSS_SEARCH_URL}?"
+            f"q={tmpl['query']}+{date_filter}"
+            f"&hl={tmpl['hl']}&gl={tmpl['gl']}&ceid={tmpl['ceid']}"
+        ),
+        "category": tmpl["name"],  # 用於顯示時歸類（不含日期）
+        "window": (start, end),
+        # 合併結果時的排序：新日期在前，同區間依模板順序（與逐日拆分的提交順序一致）
+        "order": (-start.toordinal(), tmpl_index),
+    }
+
+
+class DailyPlanner:
+    """固定逐日拆分：每天每個模板一個請求"""
+
+    def __init__(self, templates, days, today=None, skip_days=None):
+        self.templates = templates
+        self.days = days
+        self.today = today or datetime.now().date()
+        self.skip_days = skip_days or set()  # 歷史庫已完整抓取、不需重抓的日期
+        self.requests = 0
+        self.splits = 0
+        self.failed = []  # 重試後仍抓取失敗的來源
+
+    @property
+    def fixed_plan_requests(self):
+        """逐日拆分所需的請求數（作為比較基準）"""
+        return self.days * len(self.templates)
+
+    @property
+    def saved_requests(self):
+        return self.fixed_plan_requests - self.requests
+
+    def missing_days(self):
+        """範圍內需要抓取的日期（新→舊）"""
+        days = (self.today - timedelta(days=offset) for offset in range(self.days))
+        return [day for day in days if day not in self.skip_days]
+
+    def initial_sources(self):
+        sources = []
+        for day_start in self.missing_days():
+            for i, tmpl in enumerate(self.templates):
+                sources.append(window_source(tmpl, i, day_start, day_start + timedelta(days=1)))
+        return sources
+
+    def split(self, source, entries):
+        """回傳需要改以較小區間重查的來源；空列表表示採用此結果"""
+        return []
+
+    def run(self, cache=None, on_fetched=None, metrics=None):
+        """
+        逐輪抓取，依完成順序 yield (source, entries)；飽和的區間不 yield，改為下一輪切分重查。
+        :param on_fetched: on_fetched(done, planned) 每完成一個請求時呼叫（planned 含已排入的重查）
+        :param metrics: ScanMetrics，記錄產生網址與抓取的量測
+        """
+        start = time.perf_counter()
+        pending = self.initial_sources()
+        if metrics:
+            metrics.add_stage("url_build", time.perf_counter() - start)
+        planned = len(pending)
+        while pending:
+            next_round = []
+            for _, source, entries in iter_fetch(pending, cache=cache, metrics=metrics):
+                self.requests += 1
+                if entries is None:
+                    self.failed.append(source)
+                start = time.perf_counter()
+                children = self.split(source, entries)
+                if metrics:
+                    metrics.add_stage("url_build", time.perf_counter() - start)
+                    if children:
+                        # 飽和區間的條目改由切分後的區間取得，整批記為排除
+                        metrics.count(source, **{REJECT_WINDOW_SPLIT: len(entries)})
+                if children:
+                    self.splits += 1
+                    next_round.extend(children)
+                    planned += len(children)
+                if on_fetched:
+                    on_fetched(self.requests, planned)
+                if not children:
+                    yield source, entries
+            pending = next_round
+
+
+class AdaptivePlanner(DailyPlanner):
+    """
+    自適應區間：過去的日期合併為一個區間、今天獨立一個區間（今天的 feed 快取較短，
+    分開後過去區間仍可長期快取）；回傳飽和的區間對半切分重查，單日區間不再切分。
+    skip_days 中的日期不抓取，其餘過去日期依連續段落各自合併為一個區間。
+    """
+
+    def __init__(self, templates, days, today=None, skip_days=None, cap=FEED_ITEM_CAP):
+        super().__init__(templates, days, today, skip_days)
+        self.threshold = int(cap * SATURATION_RATIO)
+
+    def initial_sources(self):
+        # 需要抓取的過去日期合併為連續區間（被已完整的日期隔開時分成多段）
+        windows = []
+        for day in self.missing_days():
+            end = day + timedelta(days=1)
+            if windows and windows[-1][0] == end and end != self.today:
+                windows[-1] = (day, windows[-1][1])
+            else:
+                windows.append((day, end))
+        return [window_source(tmpl, i, start, end)
+                for start, end in windows
+                for i, tmpl in enumerate(self.templates)]
+
+    def split(self, source, entries):
+        start, end = source["window"]
+        span = (end - start).days
+        if entries is None or span <= 1 or len(entries) < self.threshold:
+            return []
+        tmpl_index = source["order"][1]
+        tmpl = self.templates[tmpl_index]
+        mid = start + timedelta(days=span // 2)
+        return [window_source(tmpl, tmpl_index, mid, end), window_source(tmpl, tmpl_index, start, mid)]
+
+
+def make_planner(templates, days, adaptive=True, today=None, skip_days=None):
+    return (AdaptivePlanner if adaptive else DailyPlanner)(templates, days, today, skip_days)
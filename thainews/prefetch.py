@@ -0,0 +1,96 @@
+"""
+背景預抓程式：定期重跑所有主題與個別台商的搜尋，將結果寫入共用的歷史庫，
+讓 Streamlit 介面點選時直接讀取現成結果，不必在使用者請求中同步爬取。
+
+用法:
+    python -m thainews.prefetch                 # 常駐，每 30 分鐘一輪
+    python -m thainews.prefetch --once          # 只跑一輪
+    python -m thainews.prefetch --interval 900 --days 1 3 7 --no-companies
+    python -m thainews.prefetch --once --metrics prefetch_metrics.jsonl
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+from thainews.config import (
+    FEED_CACHE_PATH, LEGACY_JSON_PATH, LINK_CACHE_PATH, NEWS_DB_PATH,
+    PREFETCH_DAYS, PREFETCH_INTERVAL, PREFETCH_JITTER, TOPIC_MAP,
+)
+from thainews.feed_cache import FeedCache
+from thainews.links import LinkCache, LinkResolver
+from thainews.metrics import ScanMetrics
+from thainews.news_store import NewsStore
+from thainews.pipeline import days_label, run_company_batch, run_scan
+
+BATCH_MODE = "company_batch"
+
+
+def build_jobs(days_list, include_companies=True):
+    """產生一輪的任務：(mode, keyword, days)；所有台商合併為一個批次任務（mode 為 BATCH_MODE）"""
+    jobs = [(mode, None, days) for days in days_list for mode in TOPIC_MAP.values()]
+    if include_companies:
+        jobs += [(BATCH_MODE, None, days) for days in days_list]
+    return jobs
+
+
+def run_cycle(jobs, cache, store, jitter=PREFETCH_JITTER, metrics_path=None, resolver=None):
+    """
+    依序執行一輪任務；任務之間隨機錯開，避免同時對 Google News 發出大量請求。
+    提供 metrics_path 時每個任務的量測資料以 JSON lines 附加寫入該檔。
+    resolver 為 thainews.links.LinkResolver；背景預抓可連網還原，順便補齊互動搜尋使用的快取。
+    """
+    for i, (mode, keyword, days) in enumerate(jobs):
+        if i and jitter:
+            time.sleep(random.uniform(0, jitter))
+        start = time.perf_counter()
+        stats = {}
+        metrics = ScanMetrics(mode, keyword, days)
+        try:
+            if mode == BATCH_MODE:
+                results = run_company_batch(days_label(days), days, cache=cache, store=store, stats=stats,
+                                            metrics=metrics, resolver=resolver)
+                news = [item for _, items in results.values() for item in items]
+            else:
+                _, news = run_scan(days_label(days), days, mode, keyword, cache=cache, store=store, stats=stats,
+                                   metrics=metrics, resolver=resolver)
+        except Exception as e:
+            print(f"[prefetch] {mode} {keyword or ''} {days}天 失敗: {e}", flush=True)
+            continue
+        failed = len(stats["failed_sources"])
+        print(f"[prefetch] {mode} {keyword or ''} {days}天: {len(news)} 則，"
+              f"{stats['requests']}/{stats['fixed_plan_requests']} 個請求"
+              + (f"，{failed} 個失敗（結果不完整）" if failed else "")
+              + f" ({time.perf_counter() - start:.1f}s)", flush=True)
+        if metrics_path:
+            with open(metrics_path, "a", encoding="utf-8") as f:
+                f.write(metrics.to_jsonl())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="定期預抓所有主題與台商的搜尋結果")
+    parser.add_argument("--once", action="store_true", help="只執行一輪後結束")
+    parser.add_argument("--interval", type=float, default=PREFETCH_INTERVAL, help="每輪間隔秒數")
+    parser.add_argument("--jitter", type=float, default=PREFETCH_JITTER, help="任務間隨機錯開的最大秒數")
+    parser.add_argument("--days", type=int, nargs="+", default=PREFETCH_DAYS, help="要預抓的天數範圍")
+    parser.add_argument("--no-companies", action="store_true", help="不預抓個別台商")
+    parser.add_argument("--metrics", metavar="PATH", help="將每個任務的量測資料以 JSON lines 附加寫入此檔")
+    parser.add_argument("--no-resolve", action="store_true", help="不還原 Google News 轉址連結")
+    args = parser.parse_args(argv)
+
+    cache = FeedCache(FEED_CACHE_PATH)
+    store = NewsStore(NEWS_DB_PATH, legacy_json=LEGACY_JSON_PATH)
+    jobs = build_jobs(args.days, include_companies=not args.no_companies)
+    resolver = None if args.no_resolve else LinkResolver(LinkCache(LINK_CACHE_PATH))
+
+    while True:
+        print(f"[prefetch] {datetime.now():%Y-%m-%d %H:%M:%S} 開始一輪，共 {len(jobs)} 項任務", flush=True)
+        run_cycle(jobs, cache, store, args.jitter, args.metrics, resolver)
+        if args.once:
+            break
+        # 下一輪時間也加入隨機偏移，多個程序同時啟動時不會對齊
+        time.sleep(max(0.0, args.interval + random.uniform(-args.jitter, args.jitter)))
+
+
+if __name__ == "__main__":
+    main()
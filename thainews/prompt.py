@@ -0,0 +1,168 @@
+"""
+依 token 預算組出 prompt 的新聞標題庫。
+
+每則標題以字元數粗估 token，依分數（命中關鍵字數、轉載來源數、新近程度）排序，
+在各類別、各日期之間輪流挑選最高分者放入，直到用完預算；未放入的篇數附註在類別末尾並回報。
+不設預算時沿用每天每類別固定篇數的上限。片段收集在列表中最後一次 join。
+"""
+import math
+import time
+from collections import OrderedDict
+
+from thainews.metrics import REJECT_DAILY_LIMIT, REJECT_TOKEN_BUDGET
+
+KEYWORD_WEIGHT = 1.0      # 每個命中的關鍵字（最多計 MAX_KEYWORD_HITS 個）
+MAX_KEYWORD_HITS = 3
+SOURCE_WEIGHT = 1.0       # 轉載來源數取 log2：1 家 0 分、2 家 1 分、4 家 2 分
+RECENCY_WEIGHT = 1.0      # 新近程度：當下 1 分，每 RECENCY_HALF_LIFE 天減半；無日期 0 分
+RECENCY_HALF_LIFE = 3.0
+
+EMPTY_NOTE = "(無相關新聞)\n"
+ALL_DUPLICATE_NOTE = "(新聞皆與前述類別重複)\n"
+
+
+def estimate_tokens(text):
+    """
+    粗估 token 數：中日韓與泰文等多位元組字元約 1 字 1 token，ASCII 約 4 字元 1 token。
+    以 UTF-8 長度推算多位元組字元數，不逐字判斷。
+    """
+    wide = (len(text.encode("utf-8")) - len(text)) // 2
+    return wide + (len(text) - wide + 3) // 4
+
+
+def news_line(item):
+    """單則新聞在 prompt 中的一行；近似重複分群的代表附上轉載家數"""
+    source_label = item.source
+    if item.cluster_sources and len(item.cluster_sources) > 1:
+        source_label += f" 等 {len(item.cluster_sources)} 家"
+    return f"- [{source_label}] {item.title}\n"
+
+
+def day_heading(day):
+    return f"\n### {day}\n"
+
+
+def category_heading(category):
+    return f"\n## 【{category}】\n"
+
+
+def dropped_note(n):
+    return f"- （另有 {n} 則較次要的新聞因篇幅省略）\n"
+
+
+def score_item(item, matcher=None, now=None):
+    """排序分數：命中關鍵字數 + 轉載來源數（log2）+ 新近程度"""
+    now = now or time.time()
+    hits = min(len(matcher.match(item.title)), MAX_KEYWORD_HITS) if matcher else 0
+    outlets = len(item.cluster_sources) if item.cluster_sources else 1
+    recency = 0.0
+    if item.published_ts is not None:
+        age_days = max(0.0, (now - item.published_ts) / 86400)
+        recency = 0.5 ** (age_days / RECENCY_HALF_LIFE)
+    return KEYWORD_WEIGHT * hits + SOURCE_WEIGHT * math.log2(outlets) + RECENCY_WEIGHT * recency
+
+
+def _select_by_budget(representatives, remaining, matcher, now):
+    """
+    在各 (類別, 日期) 之間輪流挑選：每一輪各組取出分數最高的一則，依分數高→低嘗試放入，
+    放不下的略過（之後較短的標題仍有機會放入）。日期標題在該日第一則放入時才計入成本。
+    回傳被選入的 id 集合與剩餘預算。
+    """
+    buckets = OrderedDict()
+    for category, items in representatives.items():
+        for item in items:
+            buckets.setdefault((category, item.day), []).append(
+                (score_item(item, matcher, now), estimate_tokens(news_line(item)), item))
+    for bucket in buckets.values():
+        bucket.sort(key=lambda candidate: candidate[0])  # 由尾端取出最高分
+
+    selected = set()
+    opened_days = set()
+    while buckets and remaining > 0:
+        round_candidates = sorted(((bucket.pop(), key) for key, bucket in buckets.items()),
+                                  key=lambda pair: pair[0][0], reverse=True)
+        for (_, cost, item), key in round_candidates:
+            if key not in opened_days:
+                cost += estimate_tokens(day_heading(key[1]))
+            if cost <= remaining:
+                remaining -= cost
+                selected.add(id(item))
+                opened_days.add(key)
+        buckets = OrderedDict((key, bucket) for key, bucket in buckets.items() if bucket)
+    return selected, remaining
+
+
+def _select_by_day_limit(representatives, per_day_limit):
+    selected = set()
+    for items in representatives.values():
+        daily_count = {}
+        for item in items:
+            if daily_count.get(item.day, 0) < per_day_limit:
+                daily_count[item.day] = daily_count.get(item.day, 0) + 1
+                selected.add(id(item))
+    return selected
+
+
+def render_news(category_entries, budget=None, matcher=None, per_day_limit=None, reserved_tokens=0,
+                on_drop=None, now=None):
+    """
+    組出各類別的標題段落，回傳 (文字, report)。
+    :param category_entries: OrderedDict {類別: [NewsItem]}，已依日期新→舊排序並完成近似重複分群
+    :param budget: 整份 prompt 的 token 上限；None 則不限總量，改以 per_day_limit 限制每天每類別篇數
+    :param matcher: RelevanceMatcher，用於計算命中的關鍵字數
+    :param reserved_tokens: 標題庫以外（開頭說明與結尾）已使用的 token 數
+    :param on_drop: on_drop(item, reason) 每則未放入的新聞呼叫一次
+    report 含 tokens（估計總數，含 reserved_tokens）、budget、included、dropped、dropped_by_category
+    """
+    representatives = OrderedDict(
+        (category, [item for item in entries if item.duplicate_of is None])
+        for category, entries in category_entries.items()
+    )
+    # 固定成本：類別標題、空類別的說明，以及每個有新聞的類別預留一行省略附註
+    fixed = reserved_tokens
+    for category, items in representatives.items():
+        fixed += estimate_tokens(category_heading(category))
+        if not items:
+            fixed += estimate_tokens(EMPTY_NOTE if not category_entries[category] else ALL_DUPLICATE_NOTE)
+        else:
+            fixed += estimate_tokens(dropped_note(len(items)))
+
+    if budget is None:
+        selected = _select_by_day_limit(representatives, per_day_limit) if per_day_limit else {
+            id(item) for items in representatives.values() for item in items}
+        reason = REJECT_DAILY_LIMIT
+    else:
+        selected, _ = _select_by_budget(representatives, budget - fixed, matcher, now)
+        reason = REJECT_TOKEN_BUDGET
+
+    parts = []
+    dropped_by_category = OrderedDict()
+    for category, items in representatives.items():
+        parts.append(category_heading(category))
+        if not items:
+            parts.append(EMPTY_NOTE if not category_entries[category] else ALL_DUPLICATE_NOTE)
+            continue
+        current_day = None
+        dropped = 0
+        for item in items:
+            if id(item) not in selected:
+                dropped += 1
+                if on_drop:
+                    on_drop(item, reason)
+                continue
+            if item.day != current_day:
+                current_day = item.day
+                parts.append(day_heading(item.day))
+            parts.append(news_line(item))
+        if dropped:
+            dropped_by_category[category] = dropped
+            if budget is not None:
+                parts.append(dropped_note(dropped))
+
+    text = "".join(parts)
+    included = sum(len(items) for items in representatives.values()) - sum(dropped_by_category.values())
+    report = {
+        "tokens": reserved_tokens + estimate_tokens(text), "budget": budget, "included": included,
+        "dropped": sum(dropped_by_category.values()), "dropped_by_category": dict(dropped_by_category),
+    }
+    return text, report
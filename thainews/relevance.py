@@ -0,0 +1,130 @@
+"""
+標題相關性比對器。
+
+每個 (模式, 關鍵字) 組合只建立一次比對器：所有關鍵字合併成單一預先編譯的
+正規表示式，泰交所代碼與泰國脈絡詞也各自預先編譯，逐則比對時不再重建清單或正規式。
+比對結果會回傳命中的關鍵字，而不只是布林值。
+"""
+import functools
+import re
+
+from thainews.config import COMPANY_MAP, RELEVANCE_KEYWORDS
+
+# 泰交所代碼命中時，標題還須含泰國/PCB 相關詞，排除純美股/其他國家新聞
+THAI_CONTEXT_PATTERN = (
+    r'\bthai(?:land)?\b|\bbangkok\b|\bset[:\s]'  # 英文泰國詞
+    r'|\bpcb\b|電路板'                             # PCB 產業
+    r'|泰|曼谷|泰銖'                               # 中文泰國詞
+)
+
+
+def _trie_pattern(node):
+    """將字首樹展開為正規式：共用字首只比對一次，且同一位置優先取最長的詞"""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if "" in node else body
+
+
+def _alternation(keywords):
+    """關鍵字合併為單一字首樹正規式（讓「泰國」不被「泰」截斷，並避免逐一嘗試每個關鍵字）"""
+    trie = {}
+    for kw in {kw.lower() for kw in keywords if kw}:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return re.compile(_trie_pattern(trie)) if trie else None
+
+
+class RelevanceMatcher:
+    """
+    預先編譯的相關性規則。
+    :param keywords: 任一子字串命中即相關
+    :param ticker: 泰交所代碼（完整單詞比對，且須同時命中泰國脈絡詞）
+    :param phrase_words: 自訂關鍵字的多詞片語（詞間允許少量分隔字元）
+    :param cjk_chars: 自訂關鍵字的中文逐字比對字元
+    :param label: 非子字串規則命中時回報的關鍵字名稱
+    :param accept_all: 無任何規則時全部視為相關
+    """
+
+    def __init__(self, keywords=(), ticker="", phrase_words=(), cjk_chars=(), label="", accept_all=False):
+        self.label = label
+        self.accept_all = accept_all
+        self._keywords_re = _alternation(keywords)
+        self._ticker = ticker
+        self._ticker_re = re.compile(r'\b' + re.escape(ticker.lower()) + r'\b') if ticker else None
+        self._context_re = re.compile(THAI_CONTEXT_PATTERN) if ticker else None
+        self._phrase_re = None
+        if len(phrase_words) >= 2:
+            # 允許詞間有少量非字母字元（如 "Siam-AI" 或 "Siam's AI"）
+            self._phrase_re = re.compile(
+                r'\b' + r'[\s\-\']{0,3}'.join(re.escape(w) for w in phrase_words) + r'\b')
+        self._cjk_chars = list(cjk_chars)
+
+    def match(self, title):
+        """回傳標題命中的關鍵字列表（保持出現順序、不重複）；未命中回傳空列表"""
+        title_lower = title.lower()
+        hits = []
+        if self._keywords_re:
+            hits.extend(dict.fromkeys(self._keywords_re.findall(title_lower)))
+        if self._ticker_re and self._ticker_re.search(title_lower) and self._context_re.search(title_lower):
+            hits.append(self._ticker)
+        if not hits and self._phrase_re and self._phrase_re.search(title_lower):
+            hits.append(self.label)
+        if not hits and self._cjk_match(title_lower):
+            hits.append(self.label)
+        return hits
+
+    def is_relevant(self, title):
+        """布林判斷（任一規則命中即返回，不收集全部命中的關鍵字）"""
+        return self.is_relevant_lower(title.lower())
+
+    def is_relevant_lower(self, title_lower):
+        """同 is_relevant，但傳入已轉小寫的標題（NewsItem.title_lower）"""
+        if self.accept_all:
+            return True
+        if self._keywords_re and self._keywords_re.search(title_lower):
+            return True
+        if self._ticker_re and self._ticker_re.search(title_lower) and self._context_re.search(title_lower):
+            return True
+        if self._phrase_re and self._phrase_re.search(title_lower):
+            return True
+        return self._cjk_match(title_lower)
+
+    def _cjk_match(self, title_lower):
+        """中文逐字比對：全部命中，或三字以上時至少命中到只差一字（如「泰達電」→「台達電」）"""
+        chars = self._cjk_chars
+        if len(chars) < 2:
+            return False
+        matched = sum(1 for c in chars if c in title_lower)
+        return matched >= len(chars) or (len(chars) >= 3 and matched >= len(chars) - 1)
+
+
+def build_matcher(mode, custom_keyword=None):
+    """依搜尋模式建立比對器（規則與舊版 is_relevant 相同）"""
+    if mode == "company" and custom_keyword:
+        # 個別台商：中英文名稱用子字串比對（夠具體），泰交所代碼用完整單詞比對
+        info = COMPANY_MAP.get(custom_keyword, {})
+        names = [info.get("thai_cn", ""), info.get("tw_cn", ""), info.get("en", ""), custom_keyword]
+        return RelevanceMatcher(keywords=names, ticker=info.get("set", ""), label=custom_keyword)
+    if mode == "custom" and custom_keyword:
+        kw = custom_keyword.strip().lower()
+        if not kw:
+            return RelevanceMatcher(accept_all=True)
+        # 完整關鍵字 → 相鄰多詞 → 中文逐字（僅對非 ASCII 字元拆分）
+        return RelevanceMatcher(
+            keywords=[kw], phrase_words=kw.split(),
+            cjk_chars=[c for c in kw if ord(c) > 127], label=custom_keyword.strip(),
+        )
+    keywords = RELEVANCE_KEYWORDS.get(mode)
+    if not keywords:
+        return RelevanceMatcher(accept_all=True)
+    return RelevanceMatcher(keywords=keywords)
+
+
+@functools.lru_cache(maxsize=128)
+def get_matcher(mode, custom_keyword=None):
+    """取得快取的比對器（每個模式與關鍵字組合只編譯一次）"""
+    return build_matcher(mode, custom_keyword)
@@ -0,0 +1,81 @@
+"""
+Google News RSS 專用的輕量解析器。
+
+feedparser 為通用解析器，會偵測編碼、清理 HTML 並為每個條目建立完整的 dict；
+我們只需要 title、link、published、source 四個欄位。此模組以 expat 逐段解析
+已知的 Google News RSS 結構，只收集這四個欄位；文件不符合預期結構
+（非 rss/channel/item、XML 格式錯誤或含未定義的實體）時拋出 UnsupportedFeed，
+由呼叫端改用 feedparser。
+"""
+from xml.parsers import expat
+
+DEFAULT_SOURCE = "Google News"
+_FIELDS = {"title": "title", "link": "link", "pubDate": "published", "source": "source"}
+
+
+class UnsupportedFeed(Exception):
+    """文件不是可用快速路徑解析的 Google News RSS"""
+
+
+class GoogleNewsParser:
+    """
+    增量解析器：可多次呼叫 feed(data) 傳入片段，最後 close() 取得條目列表。
+    條目格式與 fetcher.entry_to_dict 相同。
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._path = []        # 目前所在的元素名稱堆疊
+        self._entry = None     # 解析中的條目
+        self._field = None     # 正在收集文字的欄位
+        self._text = []
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._chars
+
+    def feed(self, data):
+        try:
+            self._parser.Parse(data, False)
+        except expat.ExpatError as e:
+            raise UnsupportedFeed(str(e)) from e
+
+    def close(self):
+        try:
+            self._parser.Parse(b"", True)
+        except expat.ExpatError as e:
+            raise UnsupportedFeed(str(e)) from e
+        return self.entries
+
+    def _start(self, name, attrs):
+        depth = len(self._path)
+        if depth == 0 and name != "rss" or depth == 1 and name != "channel":
+            raise UnsupportedFeed(f"unexpected element <{name}>")
+        self._path.append(name)
+        if depth == 2 and name == "item":
+            self._entry = {"title": "", "link": "", "published": "", "source": DEFAULT_SOURCE}
+        elif depth == 3 and self._entry is not None and name in _FIELDS:
+            self._field = _FIELDS[name]
+            self._text = []
+
+    def _end(self, name):
+        self._path.pop()
+        depth = len(self._path)
+        if depth == 3 and self._field is not None:
+            self._entry[self._field] = "".join(self._text).strip()
+            self._field = None
+        elif depth == 2 and name == "item":
+            self.entries.append(self._entry)
+            self._entry = None
+
+    def _chars(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+
+def parse_google_news(body):
+    """以快速路徑解析整份 RSS 位元組；不符合預期結構時拋出 UnsupportedFeed"""
+    parser = GoogleNewsParser()
+    parser.feed(body)
+    return parser.close()
@@ -0,0 +1,159 @@
+"""
+歷史新聞的全文檢索索引（倒排索引，存放於歷史庫同一個 SQLite 檔）。
+
+中文、泰文等不以空白分詞的文字切成字元 bigram（索引另外收錄單字元，單字查詢也能命中），英數字則以單字為詞；
+新聞寫入時同步更新索引，查詢依 TF-IDF 加總排序並可依類別、日期過濾。
+總篇數由觸發程序維護（不必每次查詢 COUNT 整個 news 表）；查詢只從最少見的詞的 postings 取候選，
+候選數超過上限時只取最新存入者，避免常見詞掃過整個索引。
+"""
+import math
+import re
+import unicodedata
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_postings (
+    term TEXT NOT NULL,
+    news_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, news_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_news ON search_postings(news_id);
+CREATE TRIGGER IF NOT EXISTS trg_news_delete_postings AFTER DELETE ON news BEGIN
+    DELETE FROM search_postings WHERE news_id = old.id;
+END;
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS trg_news_insert_docs AFTER INSERT ON news BEGIN
+    UPDATE search_docs SET count = count + 1 WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_news_delete_docs AFTER DELETE ON news BEGIN
+    UPDATE search_docs SET count = count - 1 WHERE id = 0;
+END;
+"""
+
+INDEX_VERSION = "3"
+MAX_CANDIDATES = 5000  # 單次查詢評分的新聞上限（超過時只取最新存入者）
+
+_ASCII_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _is_script_char(ch):
+    """非 ASCII 的文字字元（含泰文母音、聲調等組合符號）"""
+    return ord(ch) > 127 and unicodedata.category(ch)[0] in "LMN"
+
+
+def tokenize(text, unigrams=False):
+    """
+    將文字切成檢索詞：英數字取完整單字，其他文字取字元 bigram（單字元片段保留原字）。
+    unigrams 時多字元片段另外收錄每個字元（建立索引用；查詢仍以 bigram 比對，不放寬多字查詢）。
+    """
+    text = text.lower()
+    tokens = _ASCII_WORD_RE.findall(text)
+    run = []
+    for ch in text + " ":
+        if _is_script_char(ch):
+            run.append(ch)
+            continue
+        if len(run) == 1:
+            tokens.append(run[0])
+        else:
+            tokens.extend(run[i] + run[i + 1] for i in range(len(run) - 1))
+            if unigrams:
+                tokens.extend(run)
+        run = []
+    return tokens
+
+
+def term_frequencies(*texts):
+    counts = {}
+    for text in texts:
+        for token in tokenize(text or "", unigrams=True):
+            counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+class SearchIndex:
+    """在既有連線上維護與查詢倒排索引"""
+
+    def ensure_schema(self, conn):
+        conn.executescript(SCHEMA)
+
+    def index_rows(self, conn, rows):
+        """(news_id, title, source) 逐筆重建索引詞"""
+        self.index_terms(conn, [(news_id, term_frequencies(title, source)) for news_id, title, source in rows])
+
+    def index_terms(self, conn, rows):
+        """(news_id, {詞: 次數}) 逐筆重建索引詞；詞頻可在開啟寫入交易前先算好，縮短持有寫入鎖的時間"""
+        rows = list(rows)
+        conn.executemany("DELETE FROM search_postings WHERE news_id = ?", [(row[0],) for row in rows])
+        conn.executemany(
+            "INSERT INTO search_postings (term, news_id, tf) VALUES (?, ?, ?)",
+            [(term, news_id, tf) for news_id, terms in rows for term, tf in terms.items()],
+        )
+
+    def rebuild(self, conn):
+        conn.execute("DELETE FROM search_postings")
+        conn.execute("INSERT OR REPLACE INTO search_docs VALUES (0, (SELECT COUNT(*) FROM news))")
+        self.index_rows(conn, conn.execute("SELECT id, title, source FROM news").fetchall())
+
+    def doc_count(self, conn):
+        """news 表的總篇數（由觸發程序維護）"""
+        return conn.execute("SELECT count FROM search_docs WHERE id = 0").fetchone()[0]
+
+    def search(self, conn, query, columns, where="", params=(), limit=50, offset=0, max_candidates=MAX_CANDIDATES):
+        """
+        依相關度排序查詢。查詢詞少於三個時須全部命中，否則至少命中四分之三；
+        where/params 為額外過濾條件（作用於 news 別名 n）。回傳 (rows, total)。
+        候選只來自最少見的幾個詞（命中足夠詞數的新聞必定含其中之一），最多 max_candidates 則；
+        超過時 total 只計入最新的候選。
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return [], 0
+        placeholders = ", ".join("?" * len(terms))
+        total_docs = self.doc_count(conn) or 1
+        df = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM search_postings WHERE term IN ({placeholders}) GROUP BY term",
+            terms,
+        ).fetchall())
+        min_hits = len(terms) if len(terms) < 3 else math.ceil(len(terms) * 0.75)
+        if sum(1 for t in terms if t in df) < min_hits:
+            return [], 0
+        # 至少命中 min_hits 個詞者，必定含最少見的 len - min_hits + 1 個詞之一
+        driving = sorted(terms, key=lambda t: df.get(t, 0))[:len(terms) - min_hits + 1]
+
+        idf_case = "CASE p.term " + " ".join("WHEN ? THEN ?" for _ in terms) + " END"
+        idf_params = [v for t in terms for v in (t, math.log(1 + total_docs / df.get(t, 1)))]
+        # 過濾條件在取候選時就套用，日期、類別範圍外的新聞不佔候選名額
+        candidates = f"""
+            SELECT DISTINCT d.news_id FROM search_postings d JOIN news n ON n.id = d.news_id
+            WHERE d.term IN ({', '.join('?' * len(driving))}){f' AND {where}' if where else ''}
+            ORDER BY d.news_id DESC LIMIT ?
+        """
+        matched = f"""
+            SELECT p.news_id, SUM(p.tf * {idf_case}) AS score
+            FROM ({candidates}) c CROSS JOIN search_postings p
+            WHERE p.term IN ({placeholders}) AND p.news_id = c.news_id
+            GROUP BY p.news_id
+            HAVING COUNT(*) >= ?
+        """
+        sql = f"""
+            SELECT n.id FROM ({matched}) m JOIN news n ON n.id = m.news_id
+            ORDER BY m.score DESC, n.published_ts DESC
+        """
+        # 先取得全部排序後的 id（單次聚合），總數與分頁都由此計算
+        ids = [row[0] for row in conn.execute(
+            sql, [*idf_params, *driving, *params, max_candidates, *terms, min_hits])]
+        page = ids[offset:offset + limit]
+        if not page:
+            return [], len(ids)
+        fetched = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                f"SELECT id, {', '.join(columns)} FROM news WHERE id IN ({', '.join('?' * len(page))})",
+                page,
+            )
+        }
+        return [fetched[news_id] for news_id in page], len(ids)
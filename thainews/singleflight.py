@@ -0,0 +1,96 @@
+"""
+程序內的請求合併（single-flight）與短期結果快取。
+
+Streamlit 每個工作階段在各自的執行緒執行；多位使用者同時點選相同主題時，
+只有第一個呼叫實際執行搜尋，其餘呼叫等待並取得同一份結果（或同一個例外）。
+完成的結果保留 ttl 秒，期間內相同的請求直接回傳，不再連網也不再寫入歷史庫。
+執行中被非 Exception 的 BaseException 中斷（如 Streamlit 工作階段重新執行的 RerunException）時
+只影響該呼叫本身：等待者不會收到這個例外，而是由其中一個改為重新執行。
+"""
+import threading
+import time
+
+
+class _Call:
+    """一次進行中的執行"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False  # 執行者被中斷，沒有結果可共用
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, ttl=120):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}     # key → _Call（進行中）
+        self._results = {}   # key → (完成時間, 結果)
+        self.stats = {"runs": 0, "joined": 0, "cached": 0}
+
+    def run(self, key, fn, force=False, on_wait=None):
+        """
+        執行 fn() 並回傳 (結果, shared)；shared 為 True 表示結果來自其他呼叫（進行中或快取）。
+        :param force: 忽略快取的結果（仍會加入進行中的相同執行，其結果本來就是最新的）
+        :param on_wait: on_wait() 需要等待其他呼叫完成時先呼叫一次，供顯示等待訊息
+        """
+        waited = False
+        while True:
+            with self._lock:
+                now = time.time()
+                self._purge(now)
+                cached = self._results.get(key)
+                if cached and not force:
+                    self.stats["cached"] += 1
+                    return cached[1], True
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.stats["runs"] += 1
+                else:
+                    call.waiters += 1
+                    self.stats["joined"] += 1
+            if leader:
+                break
+            if on_wait and not waited:
+                on_wait()
+            waited = True
+            call.done.wait()
+            if call.abandoned:
+                continue  # 執行者被中斷：重新檢查，由第一個回來的等待者接手執行
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            # 中斷屬於執行者自己的工作階段（如重新執行），不傳給等待者
+            call.abandoned = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and not call.abandoned:
+                    self._results[key] = (time.time(), call.result)
+            call.done.set()
+        return call.result, False
+
+    def invalidate(self, key=None):
+        """清除快取的結果（key 為 None 時全部清除）"""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def _purge(self, now):
+        expired = [key for key, (finished, _) in self._results.items() if now - finished >= self.ttl]
+        for key in expired:
+            del self._results[key]
@@ -0,0 +1,276 @@
+"""
+抓取排程：每個主機一個自適應速率限制與斷路器，失敗的請求以指數退避重試。
+
+- 速率：token bucket，成功時提高速率（近期未被限流時倍數成長，否則小幅增加），
+  遇到 429/503 時減半並暫停 Retry-After 秒（AIMD），穩定在不被限流的最高速率附近。
+- 重試：429、5xx 與連線錯誤最多重試 max_attempts 次，等待時間為 [0, base·2^n] 的隨機值（full jitter），
+  且不少於伺服器給的 Retry-After。
+- 斷路器：最近 window 個請求中連線錯誤與 5xx（不含 429）的比例超過 threshold 時開路，cooldown 秒內同主機的請求直接失敗（CircuitOpen），
+  之後只放行一個試探請求，成功才恢復。
+
+狀態以主機為單位在整個程序共用（多個工作階段的抓取各自跑在不同的 event loop），以 threading.Lock 保護。
+多個程序同時抓取（work_queue 的 worker）時以 share 分攤速率，避免 N 個程序送出 N 倍的請求。
+"""
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+PROBE = "probe"  # CircuitBreaker.allow 放行半開試探請求時的回傳值（真值）
+
+
+class CircuitOpen(Exception):
+    """主機的斷路器開路中，請求未送出"""
+
+
+def retry_after_seconds(headers, now=None):
+    """解析 Retry-After（秒數或 HTTP 日期），無法解析回傳 None"""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    可調整速率的 token bucket。等待中的請求每次醒來都依「當下」的速率重新判斷，
+    速率調降或暫停立即對所有排隊中的請求生效（不預先排定送出時間）。
+    """
+
+    def __init__(self, rate=10.0, burst=20, min_rate=0.5, max_rate=50.0, increase=0.2, decrease=0.5,
+                 decrease_interval=1.0, slow_start=1.1, recovery_interval=60.0, share=1):
+        # share：同時對同一主機限速的程序數，各程序只用 1/share 的速率，合計不超過單一程序的設定
+        self.rate = rate / share
+        self.burst = max(1.0, burst / share)
+        self.min_rate = min_rate / share
+        self.max_rate = max_rate / share
+        self.increase = increase / share  # 每次成功提高的速率（請求/秒）
+        self.decrease = decrease          # 被限流時速率乘上的比例
+        self.decrease_interval = decrease_interval  # 同一波限流回應只減速一次
+        self.slow_start = slow_start      # 近期未被限流時，每次成功速率乘上的比例（快速找到上限）
+        self.recovery_interval = recovery_interval  # 距上次限流超過此秒數才恢復倍數成長
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = -recovery_interval
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """取得一個 token 回傳 0；否則回傳下一個 token 可用前需要等待的秒數"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        import asyncio
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            if time.monotonic() - self._last_decrease >= self.recovery_interval:
+                self.rate = min(self.max_rate, self.rate * self.slow_start)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_interval:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+                # 清掉累積的 burst，避免恢復後立刻再送出一整批
+                self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+
+class CircuitBreaker:
+    """依最近 window 個請求的失敗比例開路；cooldown 後半開，放行一個試探請求"""
+
+    def __init__(self, window=20, threshold=0.5, min_requests=8, cooldown=30.0):
+        self.window = window
+        self.threshold = threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.opened = 0
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self._opened_at < self.cooldown
+
+    def allow(self):
+        """是否放行請求；放行的是半開時的試探請求則回傳 PROBE，結束後須呼叫 end_probe"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            # 冷卻結束：一次只放行一個試探請求
+            self.state = "half_open"
+            if self._probing:
+                return False
+            self._probing = True
+            return PROBE
+
+    def end_probe(self):
+        """試探請求結束；未記錄結果（例外、取消）時釋放試探權，讓下一個請求可以試探"""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok):
+        with self._lock:
+            if self.state == "open":
+                return  # 開路前已送出的請求，結果不影響冷卻
+            if self.state == "half_open":
+                self._probing = False
+                if ok:
+                    self.state = "closed"
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.threshold:
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened += 1
+        self._opened_at = time.monotonic()
+
+
+class HostThrottle:
+    """單一主機的速率限制、斷路器與統計"""
+
+    def __init__(self, **bucket_options):
+        self.bucket = TokenBucket(**bucket_options)
+        self.breaker = CircuitBreaker()
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "errors": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def count(self, **fields):
+        with self._lock:
+            for key, n in fields.items():
+                self.stats[key] += n
+
+
+class FetchScheduler:
+    """
+    以主機為單位排程請求。
+    :param max_attempts: 每個請求最多嘗試次數（含第一次）
+    :param backoff_base: 退避的基準秒數，第 n 次重試最多等待 backoff_base·2^(n-1) 秒
+    :param backoff_cap: 單次退避的上限秒數
+    :param bucket_options: 傳給 TokenBucket 的參數（初始速率、上下限等）
+    """
+
+    def __init__(self, max_attempts=4, backoff_base=0.5, backoff_cap=8.0, **bucket_options):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.bucket_options = bucket_options
+        self.hosts = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    def host(self, url):
+        name = urlsplit(url).netloc
+        with self._lock:
+            if name not in self.hosts:
+                self.hosts[name] = HostThrottle(**self.bucket_options)
+            return self.hosts[name]
+
+    def backoff(self, attempt, retry_after=None):
+        """第 attempt 次重試前的等待秒數（full jitter，且不少於 Retry-After）"""
+        delay = self._rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1)))
+        return max(delay, retry_after or 0.0)
+
+    async def get(self, fetcher, url, headers=None, **kwargs):
+        """
+        經速率限制送出請求，可重試的失敗自動退避重試；回傳 (Response, 重試次數)。
+        kwargs 原樣傳給 fetcher.get（如 allow_redirects）。
+        重試用盡時回傳最後一次的回應或拋出最後一次的例外；斷路器開路時拋出 CircuitOpen。
+        """
+        import asyncio  # 延遲載入，與 fetcher 相同（只在實際抓取時才需要）
+        host = self.host(url)
+        attempt = 0
+        while True:
+            if host.breaker.is_open():
+                host.count(rejected=1)
+                raise CircuitOpen(urlsplit(url).netloc)
+            await host.bucket.acquire()
+            # 等待期間斷路器可能已開路；半開時也在此決定由哪個請求試探
+            allowed = host.breaker.allow()
+            if not allowed:
+                host.count(rejected=1)
+                raise CircuitOpen(urlsplit(url).netloc)
+            host.count(requests=1)
+            retry_after = None
+            try:
+                resp = await fetcher.get(url, headers=headers, **kwargs)
+            except Exception:
+                host.count(errors=1)
+                host.breaker.record(False)
+                if attempt + 1 >= self.max_attempts:
+                    raise
+            else:
+                if resp.status not in RETRY_STATUSES:
+                    host.bucket.on_success()
+                    host.breaker.record(True)
+                    return resp, attempt
+                if resp.status in THROTTLE_STATUSES:
+                    retry_after = retry_after_seconds(resp.headers)
+                    host.bucket.on_throttle(retry_after)
+                    host.count(throttled=1)
+                if resp.status != 429 or allowed == PROBE:
+                    # 429 是明確的減速要求，交給速率限制處理；503 與其他 5xx 才計入斷路器。
+                    # 試探請求收到 429 表示主機仍在限流，同樣視為失敗、重新開路冷卻
+                    host.breaker.record(False)
+                    host.count(errors=1)
+                if attempt + 1 >= self.max_attempts:
+                    return resp, attempt
+            finally:
+                # 任何結果（含例外與取消）都結束試探，避免斷路器停在半開而拒絕之後所有請求
+                if allowed == PROBE:
+                    host.breaker.end_probe()
+            attempt += 1
+            host.count(retries=1)
+            await asyncio.sleep(self.backoff(attempt, retry_after))
+
+    def snapshot(self):
+        """各主機目前的速率、斷路器狀態與統計"""
+        with self._lock:
+            hosts = list(self.hosts.items())
+        return {name: {"rate": round(h.bucket.rate, 2), "circuit": h.breaker.state,
+                       "circuit_opened": h.breaker.opened, **h.stats} for name, h in hosts}
+
+
+# 整個程序共用的排程器（速率與斷路器狀態跨搜尋保留）
+DEFAULT_SCHEDULER = FetchScheduler()
@@ -0,0 +1,344 @@
+"""
+分散式抓取的工作佇列（SQLite，WAL 模式）。
+
+每個工作是一個 (模式, 關鍵字, 日期, 模板) 的逐日 RSS 來源（與 get_rss_sources 相同），
+任意數量的 worker 程序向佇列租用一批工作、抓取並過濾後，將結果寫入歷史庫的 scan_days
+（與增量搜尋共用），之後介面或命令列的搜尋只需補抓未完整的日期。
+
+- 租約：worker 租用工作時設定到期時間，逾時未完成（程序中斷）的工作可由其他 worker 接手。
+- 重試：抓取失敗的工作延後重新排入，嘗試次數達上限即標記為 failed，下次 enqueue 時重新排入。
+- 冪等：工作以 (模式, 關鍵字, 日期, 模板) 唯一，重複 enqueue 不會產生重複工作；
+  結果以同一鍵覆寫、新聞以 link upsert，同一工作被執行多次結果相同。
+- 已完整的過去日期不再重新排入；今天（抓取時尚未結束的日期）每次 enqueue 都會重新排入。
+
+用法:
+    python -m thainews.work_queue enqueue --days 30            # 所有主題與台商，近 30 天
+    python -m thainews.work_queue worker --processes 4          # 4 個 worker 程序，持續處理
+    python -m thainews.work_queue worker --exit-when-empty      # 處理完佇列即結束
+    python -m thainews.work_queue status
+
+多台機器共用時，佇列與歷史庫須放在所有 worker 都能存取且支援檔案鎖的位置。
+每個 worker 程序有各自的速率限制（thainews.throttle），被限流時各自減速；
+起始速率與上限依 --rate-share（預設為 --processes）平分，多個程序合計不超過單一程序的設定。
+多台機器時 --rate-share 應填所有機器的 worker 程序總數。
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from thainews.config import (
+    COMPANY_MAP, FEED_CACHE_PATH, LEGACY_JSON_PATH, LINK_CACHE_PATH, NEWS_DB_PATH,
+    QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS, TOPIC_MAP, WORK_QUEUE_PATH,
+)
+from thainews.fetcher import DEFAULT_CONCURRENCY, iter_fetch
+from thainews.news_store import SCAN_DAYS_KEEP
+from thainews.pipeline import MAX_NEWS_ITEMS, fetched_slots, filter_entries, get_rss_sources
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode TEXT NOT NULL,
+    keyword TEXT NOT NULL DEFAULT '',
+    day TEXT NOT NULL,
+    template TEXT NOT NULL,
+    source_json TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    finished_at REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_slot ON jobs(mode, keyword, day, template);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, available_at);
+"""
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+RETRY_BASE = 30      # 失敗後延後重試的基準秒數（每次加倍）
+RETRY_CAP = 15 * 60  # 延後重試的上限秒數
+BATCH_SIZE = 40      # 每次租用的工作數
+POLL_INTERVAL = 5.0  # 佇列暫無可租用工作時的等待秒數
+
+Job = namedtuple("Job", "id mode keyword day source attempts")
+
+
+class WorkQueue:
+    """工作佇列的存取介面（每次操作各自連線，可跨執行緒／程序使用）"""
+
+    def __init__(self, path=WORK_QUEUE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def enqueue(self, jobs, keep_days=SCAN_DAYS_KEEP):
+        """
+        排入工作 [(模式, 關鍵字, source)]，回傳新增或重新排入的數量。
+        已存在的工作僅在 failed 或「已完成但當時日期未結束」時重新排入；超過 keep_days 的舊工作一併刪除。
+        """
+        now = time.time()
+        rows = [
+            (mode, keyword or "", source["window"][0].isoformat(), source["category"],
+             json.dumps({key: source[key] for key in ("name", "url", "category", "order")}, ensure_ascii=False), now)
+            for mode, keyword, source in jobs
+        ]
+        oldest = (datetime.fromtimestamp(now).date() - timedelta(days=keep_days)).isoformat()
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT INTO jobs (mode, keyword, day, template, source_json, available_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(mode, keyword, day, template) DO UPDATE SET
+                    source_json = excluded.source_json,
+                    state = 'pending',
+                    attempts = 0,
+                    available_at = excluded.available_at,
+                    error = NULL
+                WHERE jobs.state = 'failed' OR (jobs.state = 'done' AND jobs.complete = 0)
+            """, rows)
+            changed = conn.total_changes - before
+            conn.execute("DELETE FROM jobs WHERE day < ? AND state != ?", (oldest, LEASED))
+        return changed
+
+    def lease(self, owner, limit=BATCH_SIZE, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS):
+        """
+        租用最多 limit 個可執行的工作（待處理或租約已過期者，新日期優先），回傳 [Job]。
+        租約過期且嘗試次數已達上限的工作（可能每次都讓 worker 中斷）直接標記為 failed。
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            # BEGIN IMMEDIATE 先取得寫入鎖，多個 worker 同時租用時不會拿到同一個工作
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET state = ?, error = 'lease expired', lease_owner = NULL, finished_at = ? "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, max_attempts),
+            )
+            rows = conn.execute("""
+                SELECT id, mode, keyword, day, source_json, attempts FROM jobs
+                WHERE (state = ? AND available_at <= ?) OR (state = ? AND lease_expires < ?)
+                ORDER BY day DESC, id LIMIT ?
+            """, (PENDING, now, LEASED, now, limit)).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ? WHERE id = ?",
+                [(LEASED, owner, now + lease_seconds, row[0]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        jobs = []
+        for job_id, mode, keyword, day, source_json, attempts in rows:
+            start = date.fromisoformat(day)
+            source = json.loads(source_json)
+            source.update(window=(start, start + timedelta(days=1)), order=tuple(source["order"]))
+            jobs.append(Job(job_id, mode, keyword or None, start, source, attempts + 1))
+        return jobs
+
+    def complete(self, owner, results):
+        """
+        標記工作完成：results 為 [(Job, 日期是否已結束)]。
+        只更新仍由 owner 租用中的工作（租約過期後已被其他 worker 接手者，結果相同，由接手者標記）。
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE jobs SET state = ?, complete = ?, finished_at = ?, error = NULL, lease_owner = NULL "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                [(DONE, int(complete), now, job.id, LEASED, owner) for job, complete in results],
+            )
+
+    def fail(self, owner, job, error, max_attempts=QUEUE_MAX_ATTEMPTS):
+        """工作失敗：未達嘗試上限則延後重新排入（指數退避加隨機），否則標記為 failed"""
+        now = time.time()
+        delay = random.uniform(0.5, 1.0) * min(RETRY_CAP, RETRY_BASE * 2 ** (job.attempts - 1))
+        state = FAILED if job.attempts >= max_attempts else PENDING
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, available_at = ?, error = ?, lease_owner = NULL, finished_at = ? "
+                "WHERE id = ? AND state = ? AND lease_owner = ?",
+                (state, now + delay, str(error), now, job.id, LEASED, owner),
+            )
+
+    def counts(self):
+        """各狀態的工作數 dict，另含 ready（目前可租用的待處理數）"""
+        now = time.time()
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            counts["ready"] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE (state = ? AND available_at <= ?) OR (state = ? AND lease_expires < ?)",
+                (PENDING, now, LEASED, now),
+            ).fetchone()[0]
+        return {state: counts.get(state, 0) for state in (PENDING, LEASED, DONE, FAILED, "ready")}
+
+    def next_available(self):
+        """最早可租用的待處理工作時間（epoch 秒）；沒有待處理工作回傳 None"""
+        with self._connect() as conn:
+            return conn.execute("SELECT MIN(available_at) FROM jobs WHERE state = ?", (PENDING,)).fetchone()[0]
+
+
+def build_jobs(days, modes=None, companies=None, keywords=()):
+    """
+    產生 [(模式, 關鍵字, source)]：各主題模式、個別台商與自訂關鍵字在範圍內的逐日來源。
+    modes 預設為所有主題模式，companies 預設為所有台商。
+    """
+    targets = [(mode, None) for mode in (TOPIC_MAP.values() if modes is None else modes)]
+    targets += [("company", name) for name in (COMPANY_MAP if companies is None else companies)]
+    targets += [("custom", keyword) for keyword in keywords]
+    return [(mode, keyword, source) for mode, keyword in targets for source in get_rss_sources(days, mode, keyword)]
+
+
+def process_batch(jobs, store, cache=None, max_concurrency=DEFAULT_CONCURRENCY, resolver=None, scheduler=None):
+    """
+    抓取並過濾一批工作，將逐日結果與新聞寫入歷史庫；回傳 (完成的 [(Job, 日期是否已結束)], 失敗的 [Job])。
+    提供 resolver（thainews.links.LinkResolver）時先將轉址連結還原為原始網址再寫入。
+    scheduler 為 None 時使用整個程序共用的 DEFAULT_SCHEDULER。
+    """
+    today = datetime.now().date()
+    done, failed = [], []
+    slots = {}  # (模式, 關鍵字) → 逐日結果
+    items = []
+    for index, source, entries in iter_fetch([job.source for job in jobs], cache=cache,
+                                             max_concurrency=max_concurrency, scheduler=scheduler):
+        job = jobs[index]
+        if entries is None:
+            failed.append(job)
+            continue
+        # 逐日來源只需排除該日以前的條目，天數取到涵蓋該日為止
+        filtered = filter_entries(entries, source, (today - job.day).days + 1, job.mode, job.keyword)
+        slots.setdefault((job.mode, job.keyword), []).extend(fetched_slots([(source, filtered)], set(), today))
+        items += filtered
+        done.append((job, job.day < today))
+    if done:
+        if resolver is not None:
+            resolver.canonicalize(items)
+        store.upsert_many(items)
+        store.apply_retention(max_items=MAX_NEWS_ITEMS)
+        for (mode, keyword), mode_slots in slots.items():
+            store.save_scan_days(mode, keyword, mode_slots)
+    return done, failed
+
+
+def run_worker(queue, store, cache=None, owner=None, batch_size=BATCH_SIZE, max_concurrency=DEFAULT_CONCURRENCY,
+               lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS, exit_when_empty=False,
+               poll_interval=POLL_INTERVAL, on_status=None, resolver=None, scheduler=None):
+    """
+    持續租用並處理工作；exit_when_empty 時佇列中沒有待處理工作即結束（其他 worker 租用中的不等待）。
+    回傳 {"done": 完成數, "failed": 失敗次數}。
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    on_status = on_status or (lambda text: None)
+    totals = {"done": 0, "failed": 0}
+    while True:
+        jobs = queue.lease(owner, batch_size, lease_seconds, max_attempts)
+        if not jobs:
+            next_at = queue.next_available()
+            if exit_when_empty and next_at is None:
+                return totals
+            time.sleep(min(poll_interval, max(0.1, next_at - time.time())) if next_at else poll_interval)
+            continue
+        start = time.perf_counter()
+        error = "fetch failed"
+        try:
+            done, failed = process_batch(jobs, store, cache, max_concurrency, resolver, scheduler)
+        except Exception as e:
+            # 過濾或寫入歷史庫失敗：整批視為失敗並記錄實際原因，稍後重試（結果以相同的鍵覆寫，重做不會重複）
+            done, failed = [], jobs
+            error = repr(e)
+            on_status(f"批次處理失敗: {e}")
+        queue.complete(owner, done)
+        for job in failed:
+            queue.fail(owner, job, error, max_attempts)
+        totals["done"] += len(done)
+        totals["failed"] += len(failed)
+        on_status(f"{len(done)} 個工作完成" + (f"，{len(failed)} 個失敗" if failed else "")
+                  + f" ({time.perf_counter() - start:.1f}s)")
+
+
+def _worker_main(args, index):
+    from thainews.feed_cache import FeedCache
+    from thainews.links import LinkCache, LinkResolver
+    from thainews.news_store import NewsStore
+    from thainews.throttle import FetchScheduler
+
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    cache = None if args.no_cache else FeedCache(FEED_CACHE_PATH)
+    store = NewsStore(args.store, legacy_json=LEGACY_JSON_PATH)
+    # RSS 抓取與轉址還原共用同一個排程器，兩者對 Google News 的請求合計分攤速率
+    scheduler = FetchScheduler(share=args.rate_share or args.processes)
+    resolver = None if args.no_resolve else LinkResolver(LinkCache(LINK_CACHE_PATH), scheduler=scheduler)
+
+    def on_status(text):
+        print(f"[worker {index}] {datetime.now():%H:%M:%S} {text}", flush=True)
+
+    totals = run_worker(WorkQueue(args.queue), store, cache, owner, args.batch, args.concurrency, args.lease,
+                        args.max_attempts, args.exit_when_empty, on_status=on_status, resolver=resolver,
+                        scheduler=scheduler)
+    on_status(f"結束：完成 {totals['done']} 個工作，失敗 {totals['failed']} 次")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m thainews.work_queue", description="分散式抓取的工作佇列")
+    parser.add_argument("--queue", default=WORK_QUEUE_PATH, help="佇列資料庫路徑")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="排入各主題與台商在範圍內的逐日工作")
+    enqueue.add_argument("--days", type=int, default=SCAN_DAYS_KEEP - 1, help="排入的天數範圍")
+    enqueue.add_argument("--modes", nargs="*", choices=list(TOPIC_MAP.values()), help="主題模式（預設全部）")
+    enqueue.add_argument("--no-companies", action="store_true", help="不排入個別台商")
+    enqueue.add_argument("--keyword", action="append", default=[], help="額外排入的自訂關鍵字（可重複）")
+
+    worker = commands.add_parser("worker", help="租用並處理工作")
+    worker.add_argument("--processes", type=int, default=1, help="啟動的 worker 程序數")
+    worker.add_argument("--rate-share", type=int, help="分攤每個主機速率的 worker 程序總數（預設為 --processes）")
+    worker.add_argument("--store", default=NEWS_DB_PATH, help="歷史庫路徑")
+    worker.add_argument("--batch", type=int, default=BATCH_SIZE, help="每次租用的工作數")
+    worker.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="每個程序同時進行的請求上限")
+    worker.add_argument("--lease", type=float, default=QUEUE_LEASE_SECONDS, help="租約秒數")
+    worker.add_argument("--max-attempts", type=int, default=QUEUE_MAX_ATTEMPTS, help="每個工作的最多嘗試次數")
+    worker.add_argument("--exit-when-empty", action="store_true", help="沒有待處理工作時結束")
+    worker.add_argument("--no-cache", action="store_true", help="不使用 RSS 條件式請求快取")
+    worker.add_argument("--no-resolve", action="store_true", help="不還原 Google News 轉址連結")
+
+    commands.add_parser("status", help="顯示各狀態的工作數")
+    args = parser.parse_args(argv)
+
+    if args.command == "enqueue":
+        if args.days < 1:
+            parser.error("--days 必須大於 0")
+        jobs = build_jobs(args.days, args.modes, [] if args.no_companies else None, args.keyword)
+        added = WorkQueue(args.queue).enqueue(jobs)
+        print(f"共 {len(jobs)} 個工作，新增或重新排入 {added} 個")
+    elif args.command == "worker":
+        if args.processes <= 1:
+            _worker_main(args, 0)
+            return
+        import multiprocessing
+        processes = [multiprocessing.Process(target=_worker_main, args=(args, i)) for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        counts = WorkQueue(args.queue).counts()
+        print("  ".join(f"{state}={n}" for state, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()